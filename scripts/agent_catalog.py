@@ -0,0 +1,271 @@
+#!/usr/bin/env -S uv run
+# /// script
+# requires-python = ">=3.11"
+# dependencies = [
+#     "pyyaml>=6.0",
+#     "rich>=13.0",
+# ]
+# ///
+"""
+Compile agent definitions into a single catalog file.
+
+Parses the frontmatter of every .claude/agents/*.md file with
+agent_frontmatter.extract_frontmatter() and writes it, keyed by agent
+file name, into one compact JSON file (.claude/agent-catalog.json). Each
+entry remembers the size and modification time of its source, so
+rebuilding re-parses only the agent files that changed, and an up-to-date
+catalog is not rewritten. The frontmatter is kept under its own key, so
+no agent's fields can be mistaken for the catalog's.
+
+Consumers load the whole roster with one file read:
+
+    from agent_catalog import load_catalog
+    agents = load_catalog()  # {"creative-copywriter": {"source": {...}, "frontmatter": {"name": ..., "tools": [...]}}}
+
+Usage:
+    # Build or refresh the catalog
+    uv run scripts/agent_catalog.py
+
+    # Rebuild from scratch and show the roster
+    uv run scripts/agent_catalog.py --rebuild --list
+
+    # From a hook: refresh silently, or report what changed as JSON. Neither
+    # imports rich, and an up-to-date catalog does not import PyYAML either
+    uv run scripts/agent_catalog.py --quiet
+    uv run scripts/agent_catalog.py --json
+
+    # A JSON line per agent re-parsed or removed, then a summary line
+    uv run scripts/agent_catalog.py --ndjson >> events.jsonl
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, NamedTuple, Optional, Tuple
+
+from scan_core import EventStream, LazyConsole, write_file_atomic
+
+console = LazyConsole()
+
+AGENTS_DIR = Path(".claude/agents")
+
+CATALOG_FILE_NAME = "agent-catalog.json"
+
+# Bumped whenever the entry format changes; older catalogs are rebuilt
+CATALOG_VERSION = 2
+
+
+class BuildStats(NamedTuple):
+    """What a catalog build did."""
+    parsed: int
+    reused: int
+    removed: int
+    written: bool
+
+
+def normalize_tools(tools: Any) -> Optional[list]:
+    """Return a tools: value as a list; agents write it as a comma-separated string or a list."""
+    if tools is None:
+        return None
+    if isinstance(tools, str):
+        return [tool.strip() for tool in tools.split(",") if tool.strip()]
+    if isinstance(tools, list):
+        return [str(tool) for tool in tools]
+    return [str(tools)]
+
+
+def compile_entry(file_path: Path, st: os.stat_result) -> Dict[str, Any]:
+    """Parse one agent file into a catalog entry: its source, and its frontmatter or an error."""
+    entry: Dict[str, Any] = {"source": {"file": file_path.name, "size": st.st_size, "mtime_ns": st.st_mtime_ns}}
+    try:
+        content = file_path.read_text(encoding="utf-8")
+    except (OSError, UnicodeDecodeError) as e:
+        entry["error"] = f"Unreadable: {e}"
+        return entry
+
+    # Imported here so that refreshing an up-to-date catalog loads neither it nor PyYAML
+    from agent_frontmatter import extract_frontmatter
+
+    frontmatter, frontmatter_text, _ = extract_frontmatter(content)
+    if not isinstance(frontmatter, dict):
+        entry["error"] = "Invalid YAML frontmatter" if frontmatter_text else "No frontmatter"
+        return entry
+
+    if "tools" in frontmatter:
+        frontmatter["tools"] = normalize_tools(frontmatter["tools"])
+    entry["frontmatter"] = frontmatter
+    return entry
+
+
+def read_catalog(catalog_path: Path) -> Optional[Dict[str, Any]]:
+    """Read a catalog file, or return None if it is missing, unreadable or outdated."""
+    try:
+        data = json.loads(catalog_path.read_bytes())
+    except (OSError, ValueError):
+        return None
+    if not isinstance(data, dict) or data.get("version") != CATALOG_VERSION or not isinstance(data.get("agents"), dict):
+        return None
+    return data
+
+
+def build_catalog(agents_dir: Path = AGENTS_DIR, catalog_path: Optional[Path] = None,
+                  rebuild: bool = False, events: Optional[EventStream] = None) -> Tuple[Dict[str, Any], BuildStats]:
+    """
+    Bring the catalog up to date with the agent files.
+
+    Entries whose source size and mtime are unchanged are kept as they are;
+    only new and modified agent files are parsed, and reported to events if
+    given. The file is written (atomically) only if something changed.
+
+    Returns:
+        tuple: (catalog, stats)
+    """
+    catalog_path = catalog_path or agents_dir.parent / CATALOG_FILE_NAME
+    previous = None if rebuild else read_catalog(catalog_path)
+    known: Dict[str, Any] = previous["agents"] if previous else {}
+
+    agents: Dict[str, Any] = {}
+    parsed = reused = 0
+    with os.scandir(agents_dir) as entries:
+        for dir_entry in sorted((e for e in entries if e.name.endswith(".md")), key=lambda e: e.name):
+            try:
+                st = dir_entry.stat()
+            except OSError:
+                continue
+            agent_id = dir_entry.name[:-3]
+            entry = known.get(agent_id)
+            source = entry.get("source") if isinstance(entry, dict) else None
+            if isinstance(source, dict) and source.get("size") == st.st_size \
+                    and source.get("mtime_ns") == st.st_mtime_ns:
+                reused += 1
+            else:
+                entry = compile_entry(Path(dir_entry.path), st)
+                parsed += 1
+                if events is not None:
+                    if "error" in entry:
+                        events.file("error", dir_entry.path, agent=agent_id, error=entry["error"])
+                    else:
+                        events.file("parsed", dir_entry.path, agent=agent_id)
+            agents[agent_id] = entry
+
+    removed_ids = set(known) - set(agents)
+    if events is not None:
+        for agent_id in sorted(removed_ids):
+            events.file("removed", agents_dir / f"{agent_id}.md", agent=agent_id)
+    removed = len(removed_ids)
+    catalog = {"version": CATALOG_VERSION, "agents": agents}
+    written = previous is None or parsed > 0 or removed > 0
+    if written:
+        write_file_atomic(
+            catalog_path,
+            json.dumps(catalog, ensure_ascii=False, separators=(",", ":"), default=str).encode("utf-8")
+        )
+    return catalog, BuildStats(parsed, reused, removed, written)
+
+
+def load_catalog(agents_dir: Path = AGENTS_DIR, catalog_path: Optional[Path] = None,
+                 refresh: bool = True) -> Dict[str, Any]:
+    """
+    Return the agent roster, keyed by agent file name without .md.
+
+    With refresh, the catalog is first brought up to date, which stats the
+    agent files but parses only changed ones. Without it, the catalog file
+    is read as it is (and built if it does not exist yet).
+    """
+    catalog_path = catalog_path or agents_dir.parent / CATALOG_FILE_NAME
+    if not refresh:
+        catalog = read_catalog(catalog_path)
+        if catalog is not None:
+            return catalog["agents"]
+    return build_catalog(agents_dir, catalog_path)[0]["agents"]
+
+
+def main() -> int:
+    """Main execution function."""
+    parser = argparse.ArgumentParser(description="Compile agent frontmatter into one catalog file")
+    parser.add_argument("--agents-dir", default=str(AGENTS_DIR), help=f"Agent definitions (default: {AGENTS_DIR})")
+    parser.add_argument("--output", help=f"Catalog file (default: {CATALOG_FILE_NAME} next to the agents directory)")
+    parser.add_argument("--rebuild", action="store_true", help="Parse every agent file, ignoring the existing catalog")
+    parser.add_argument("--list", action="store_true", help="Show the compiled roster")
+    parser.add_argument("--quiet", "-q", action="store_true", help="Print only failures, on stderr")
+    parser.add_argument("--json", action="store_true", help="Print the build counts (and with --list, the roster) as JSON")
+    parser.add_argument("--ndjson", action="store_true",
+                        help="Stream one JSON line per agent parsed or removed, then a summary line")
+    args = parser.parse_args()
+    if args.json and args.ndjson:
+        parser.error("--json and --ndjson cannot be combined")
+    events = EventStream("agent_catalog") if args.ndjson else None
+    console.quiet = args.quiet or args.json or args.ndjson
+
+    agents_dir = Path(args.agents_dir)
+    if not agents_dir.is_dir():
+        console.error(f"[red]Error: {agents_dir} directory not found![/red]")
+        return 1
+    catalog_path = Path(args.output) if args.output else agents_dir.parent / CATALOG_FILE_NAME
+
+    try:
+        start = time.perf_counter()
+        catalog, stats = build_catalog(agents_dir, catalog_path, rebuild=args.rebuild, events=events)
+        elapsed = time.perf_counter() - start
+    except OSError as e:
+        console.error(f"[red]Error: {e}[/red]")
+        if events is not None:
+            events.error(str(e))
+        return 1
+
+    agents = catalog["agents"]
+    invalid = {agent_id: entry["error"] for agent_id, entry in agents.items() if "error" in entry}
+    if args.json or events is not None:
+        summary = {
+            "catalog": str(catalog_path),
+            "written": stats.written,
+            "agents": len(agents),
+            "parsed": stats.parsed,
+            "reused": stats.reused,
+            "removed": stats.removed,
+            "invalid": invalid,
+        }
+        if events is not None:
+            # Invalid agents were each reported as they were parsed
+            summary["invalid"] = len(invalid)
+            events.summary(**summary)
+        else:
+            if args.list:
+                summary["roster"] = agents
+            print(json.dumps(summary, ensure_ascii=False, default=str))
+        return 0
+    if console.quiet:
+        return 0
+    state = "written" if stats.written else "already up to date"
+    console.print(
+        f"[green]✓[/green] Catalog {catalog_path} {state}: {len(agents)} agents "
+        f"({stats.parsed} parsed, {stats.reused} unchanged, {stats.removed} removed) in {elapsed * 1000:.1f} ms"
+    )
+    for agent_id, error in invalid.items():
+        console.print(f"[yellow]⚠ {agent_id}: {error}[/yellow]")
+
+    if args.list:
+        from rich.table import Table
+
+        table = Table(title=f"Agent Catalog ({len(agents)} agents)")
+        table.add_column("Agent", style="cyan", no_wrap=True)
+        table.add_column("Model", style="green", no_wrap=True, min_width=6)
+        table.add_column("Tools", justify="right", no_wrap=True, min_width=5)
+        table.add_column("Description", style="yellow", max_width=50, overflow="ellipsis", no_wrap=True)
+        for agent_id, entry in agents.items():
+            if "error" in entry:
+                continue
+            frontmatter = entry["frontmatter"]
+            tools = frontmatter.get("tools")
+            table.add_row(agent_id, str(frontmatter.get("model", "")), "all" if tools is None else str(len(tools)),
+                          str(frontmatter.get("description", "")))
+        console.print(table)
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
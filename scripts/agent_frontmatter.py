@@ -0,0 +1,581 @@
+"""
+Agent frontmatter name updates, run by update_agent_frontmatter.py.
+
+Finds all .md files in .claude/agents/ and updates the 'name:' field in
+their YAML frontmatter to match their filename (without .md extension).
+
+Only the value on the name: line is rewritten; the rest of the file is left
+byte for byte as it was. The frontmatter is parsed as YAML only when that
+line cannot be read on its own (a missing, repeated, multi-line or
+non-string name), using libyaml when PyYAML was built with it.
+
+Files found correct are recorded by path, size and modification time in
+.agent-frontmatter-cache.json, so a run over an unchanged tree only stats
+them; the rest are checked on a thread pool.
+
+update_agent_frontmatter.py only imports this module and calls main().
+Python compiles the script it is started with on every run, but loads
+imported modules from their cached bytecode, so a hook compiles a few lines
+instead of this whole file. Other scripts import from here, as
+agent_catalog.py does extract_frontmatter().
+"""
+
+import argparse
+import os
+import time
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Tuple, Optional
+import json
+import re
+
+from scan_core import (
+    EventStream, LazyConsole, LazyLogger, Metrics, ProfileSession, TreeWatcher, add_profile_arguments,
+    add_watch_arguments, default_jobs, make_progress, map_parallel, write_file_atomic
+)
+
+# Configured on first use: a hook run over an unchanged tree logs nothing
+logger = LazyLogger(__name__)
+
+console = LazyConsole()
+
+CACHE_FILE_NAME = ".agent-frontmatter-cache.json"
+
+# Bumped whenever what counts as a correct file changes; older caches are discarded
+CACHE_VERSION = 1
+
+# A top-level name: line whose value is a single-line scalar
+NAME_LINE_PATTERN = re.compile(
+    r'name:[ \t]+(?P<value>[A-Za-z_][\w.-]*|"[^"\\]*"|\'[^\']*\')(?:[ \t]+#.*)?[ \t]*\r?'
+)
+
+# Plain scalars that YAML resolves to something other than a string
+NON_STRING_PLAIN = re.compile(r'(?:y|Y|yes|Yes|YES|n|N|no|No|NO|true|True|TRUE|false|False|FALSE'
+                              r'|on|On|ON|off|Off|OFF|null|Null|NULL)')
+
+
+def _yaml():
+    # PyYAML is imported on first use: most runs only ever read name: lines
+    import yaml
+    return yaml
+
+
+class NameLine(NamedTuple):
+    """Position of the name: value within a file's content."""
+    start: int
+    end: int
+    value: str  # Unquoted
+    quote: str  # '"', "'" or '' for a plain scalar
+
+
+def split_frontmatter(content: str) -> Optional[Tuple[int, int, int]]:
+    """
+    Locate the frontmatter by scanning for its delimiter lines.
+    
+    Returns:
+        tuple: (start, end, body_start) such that content[start:end] is the
+        frontmatter text and content[body_start:] the body, or None
+    """
+    first_end = content.find('\n')
+    if first_end == -1 or not content.startswith('---') or content[3:first_end].strip():
+        return None
+    start = first_end + 1
+    search_from = first_end
+    while True:
+        end = content.find('\n---', search_from)
+        if end == -1:
+            return None
+        line_end = content.find('\n', end + 4)
+        if line_end == -1:
+            return None
+        if not content[end + 4:line_end].strip():
+            return start, max(start, end), line_end + 1
+        search_from = end + 1
+
+
+def find_name_line(content: str, start: int, end: int) -> Optional[NameLine]:
+    """
+    Find the name: line of the frontmatter in content[start:end].
+    
+    Returns None when the line is ambiguous and the frontmatter has to be
+    parsed as YAML: there is no top-level name: line or more than one, or
+    its value is not a single-line string scalar.
+    """
+    found = start if content.startswith('name:', start, end) else None
+    search_from = start
+    while True:
+        line_start = content.find('\nname:', search_from, end)
+        if line_start == -1:
+            break
+        if found is not None:
+            return None
+        found = search_from = line_start + 1
+    if found is None:
+        return None
+    
+    line_end = content.find('\n', found, end)
+    line_end = end if line_end == -1 else line_end
+    match = NAME_LINE_PATTERN.fullmatch(content, found, line_end)
+    if match is None:
+        return None
+    value = match.group('value')
+    quote = value[0] if value[0] in '"\'' else ''
+    if not quote:
+        if NON_STRING_PLAIN.fullmatch(value):
+            return None
+        # An indented line after a plain scalar continues it
+        next_end = content.find('\n', line_end + 1, end)
+        next_line = content[line_end + 1:end if next_end == -1 else next_end] if line_end < end else ''
+        if next_line[:1] in (' ', '\t') and next_line.strip():
+            return None
+    return NameLine(match.start('value'), match.end('value'), value[1:-1] if quote else value, quote)
+
+
+def format_name(name: str, quote: str = '') -> str:
+    """Render name as a YAML scalar, in the given quoting style where possible."""
+    if quote == "'":
+        return "'" + name.replace("'", "''") + "'"
+    if quote == '"' or not re.fullmatch(r'[A-Za-z_][\w.-]*', name) or NON_STRING_PLAIN.fullmatch(name):
+        return json.dumps(name, ensure_ascii=False)
+    return name
+
+
+def extract_frontmatter(content: str) -> Tuple[Optional[dict], str, str]:
+    """
+    Extract YAML frontmatter from markdown content.
+    
+    Returns:
+        tuple: (frontmatter_dict, frontmatter_text, body_content)
+    """
+    bounds = split_frontmatter(content)
+    if bounds is None:
+        return None, "", content
+    
+    start, end, body_start = bounds
+    frontmatter_text = content[start:end]
+    body_content = content[body_start:]
+    
+    yaml = _yaml()
+    try:
+        # libyaml bindings when available, otherwise the pure-Python implementation
+        frontmatter_dict = yaml.load(frontmatter_text, Loader=getattr(yaml, 'CSafeLoader', yaml.SafeLoader))
+        return frontmatter_dict, frontmatter_text, body_content
+    except yaml.YAMLError as e:
+        logger.warning(f"Failed to parse YAML frontmatter: {e}")
+        return None, frontmatter_text, body_content
+
+
+def update_frontmatter_name(frontmatter_dict: dict, new_name: str) -> dict:
+    """Update the name field in frontmatter dictionary."""
+    updated = frontmatter_dict.copy()
+    updated['name'] = new_name
+    return updated
+
+
+def serialize_frontmatter(frontmatter_dict: dict) -> str:
+    """Serialize frontmatter dictionary back to YAML string."""
+    yaml = _yaml()
+    dumper = getattr(yaml, 'CSafeDumper', yaml.SafeDumper)
+    return yaml.dump(frontmatter_dict, Dumper=dumper, default_flow_style=False, sort_keys=False).strip()
+
+
+def update_name_in_content(content: str, expected_name: str) -> Tuple[Optional[str], str]:
+    """
+    Set the frontmatter name in an agent file's content.
+    
+    Returns:
+        tuple: (new_content or None if unchanged, status_message)
+    """
+    bounds = split_frontmatter(content)
+    if bounds is None:
+        return None, "No valid frontmatter found"
+    
+    name_line = find_name_line(content, bounds[0], bounds[1])
+    if name_line is not None:
+        if name_line.value == expected_name:
+            return None, f"Name already matches: {expected_name}"
+        new_content = content[:name_line.start] + format_name(expected_name, name_line.quote) + content[name_line.end:]
+        return new_content, f"Updated: {name_line.value} → {expected_name}"
+    
+    # Ambiguous name line: parse the whole frontmatter and write it back
+    frontmatter_dict, frontmatter_text, body_content = extract_frontmatter(content.replace('\r\n', '\n'))
+    
+    if frontmatter_dict is None:
+        return None, "No valid frontmatter found"
+    
+    # Check current name
+    current_name = frontmatter_dict.get('name')
+    if current_name == expected_name:
+        return None, f"Name already matches: {current_name}"
+    
+    # Update frontmatter
+    updated_frontmatter = update_frontmatter_name(frontmatter_dict, expected_name)
+    
+    # Serialize updated frontmatter
+    new_frontmatter_text = serialize_frontmatter(updated_frontmatter)
+    
+    # Reconstruct file content
+    return f"---\n{new_frontmatter_text}\n---\n{body_content}", f"Updated: {current_name} → {expected_name}"
+
+
+class FrontmatterCache:
+    """Agent files known to need no update, keyed on path, size and mtime."""
+    
+    def __init__(self, path: Path):
+        self.path = path
+        self.entries: Dict[str, List[int]] = {}
+        self.dirty = False
+        try:
+            data = json.loads(path.read_text(encoding='utf-8'))
+            if data.get('version') == CACHE_VERSION:
+                self.entries = data['files']
+        except (OSError, ValueError, KeyError, AttributeError):
+            pass
+    
+    def is_current(self, path: str, st: os.stat_result) -> bool:
+        return self.entries.get(path) == [st.st_size, st.st_mtime_ns]
+    
+    def record(self, path: str, st: os.stat_result) -> None:
+        self.entries[path] = [st.st_size, st.st_mtime_ns]
+        self.dirty = True
+    
+    def save(self, paths: List[str]) -> None:
+        """Write the cache back, dropping files that no longer exist."""
+        keep = set(paths)
+        if not self.dirty and keep.issuperset(self.entries):
+            return
+        entries = {path: entry for path, entry in self.entries.items() if path in keep}
+        try:
+            write_file_atomic(self.path, json.dumps({'version': CACHE_VERSION, 'files': entries}).encode('utf-8'))
+        except OSError as e:
+            logger.warning(f"Could not save {self.path}: {e}")
+
+
+def process_agent_file(file_path: Path, check: bool = False) -> Tuple[bool, str, bool]:
+    """
+    Process a single agent file and update its frontmatter.
+    
+    In check mode the file is never written; was_changed then reports that
+    it would have been.
+    
+    Returns:
+        tuple: (was_changed, status_message, up_to_date), where up_to_date
+        means the file needs no further update
+    """
+    try:
+        # Extract expected name from filename
+        expected_name = file_path.stem  # filename without .md extension
+        
+        # Read file content, keeping its line endings
+        with open(file_path, encoding='utf-8', newline='') as f:
+            content = f.read()
+        
+        new_content, message = update_name_in_content(content, expected_name)
+        if new_content is None:
+            return False, message, True
+        if check:
+            return True, message.replace("Updated:", "Needs update:", 1), False
+        
+        # Write back to file, never leaving a half-written one
+        write_file_atomic(file_path, new_content.encode('utf-8'))
+        
+        return True, message, True
+        
+    except Exception as e:
+        logger.error(f"Error processing {file_path}: {e}")
+        return False, f"Error: {str(e)}", False
+
+
+def scan_agent_files() -> List[os.DirEntry]:
+    """Find all agent definition files in .claude/agents/, as sorted directory entries."""
+    agents_dir = Path(".claude/agents")
+    
+    if not agents_dir.exists():
+        raise FileNotFoundError(f"Directory not found: {agents_dir}")
+    
+    if not agents_dir.is_dir():
+        raise NotADirectoryError(f"Not a directory: {agents_dir}")
+    
+    # Find all .md files
+    with os.scandir(agents_dir) as entries:
+        agent_files = sorted((entry for entry in entries if entry.name.endswith(".md")), key=lambda entry: entry.name)
+    
+    if not agent_files:
+        raise FileNotFoundError(f"No .md files found in {agents_dir}")
+    
+    return agent_files
+
+
+def find_agent_files() -> List[Path]:
+    """Find all agent definition files in .claude/agents/."""
+    return [Path(entry.path) for entry in scan_agent_files()]
+
+
+def watch_agent_files(args: argparse.Namespace, events: Optional[EventStream] = None) -> int:
+    """
+    Process each agent file as it is saved, until interrupted.
+    
+    Only the files in a batch of changes are read, so each save is handled
+    in about the time it takes to process one file. The file written by an
+    update comes back as a change of its own, then matches and is left alone.
+    """
+    agents_dir = Path(".claude/agents")
+    with TreeWatcher.from_args(
+        args, [agents_dir],
+        skip_dir=lambda name, rel_path: True,
+        select_file=lambda name, rel_path: name.endswith(".md")
+    ) as watcher:
+        console.print(f"\n[bold blue]Watching {agents_dir} ({watcher.backend}), press Ctrl+C to stop...[/bold blue]")
+        if events is not None:
+            events.emit("watch", paths=[str(agents_dir)], backend=watcher.backend)
+        try:
+            for batch in watcher.batches():
+                start = time.perf_counter()
+                changed_count = error_count = 0
+                for file_path in batch.changed:
+                    file_start = time.perf_counter()
+                    was_changed, message, _ = process_agent_file(file_path, check=args.check)
+                    file_ms = (time.perf_counter() - file_start) * 1000
+                    if message.startswith("Error:"):
+                        error_count += 1
+                        console.error(f"[red]✗[/red] {file_path.name}: {message}")
+                        if events is not None:
+                            events.file("error", file_path, message=message)
+                    elif was_changed:
+                        changed_count += 1
+                        console.print(f"[green]✓[/green] {file_path.name}: {message} ({file_ms:.1f} ms)")
+                        if events is not None:
+                            events.file("outdated" if args.check else "updated", file_path, message=message,
+                                        ms=round(file_ms, 3))
+                elapsed_ms = (time.perf_counter() - start) * 1000
+                # A batch holding only the files the last one wrote has nothing to report
+                if events is not None and (changed_count or error_count):
+                    events.emit(
+                        "batch", files=len(batch.changed), rescanned=batch.rescanned,
+                        **{"files_needing_update" if args.check else "files_changed": changed_count},
+                        errors=error_count, ms=round(elapsed_ms, 3)
+                    )
+        except KeyboardInterrupt:
+            console.print("\n[bold blue]Stopped watching.[/bold blue]")
+    return 0
+
+
+def report_error(error: Exception, args: argparse.Namespace, events: Optional[EventStream] = None) -> None:
+    """Show a fatal error in the output mode the run asked for."""
+    if events is not None:
+        events.error(str(error))
+    elif args.json:
+        print(json.dumps({"error": str(error)}))
+    else:
+        console.error(f"[bold red]Error:[/bold red] {error}")
+
+
+def main() -> int:
+    """Main execution function."""
+    parser = argparse.ArgumentParser(description="Update agent frontmatter names to match their filenames")
+    parser.add_argument(
+        "--check",
+        action="store_true",
+        help="Only report files whose name is out of date, exiting with status 1 if there are any"
+    )
+    parser.add_argument(
+        "--jobs",
+        "-j",
+        type=int,
+        default=None,
+        metavar="N",
+        help="Number of threads checking files (default: based on the CPU count)"
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help=f"Check every file, ignoring and not updating {CACHE_FILE_NAME}"
+    )
+    parser.add_argument(
+        "--metrics",
+        action="store_true",
+        help="Show phase timings and file counts when done"
+    )
+    parser.add_argument(
+        "--quiet",
+        "-q",
+        action="store_true",
+        help="Print nothing; the exit status tells the result"
+    )
+    parser.add_argument(
+        "--json",
+        action="store_true",
+        help="Print a JSON summary instead of tables"
+    )
+    parser.add_argument(
+        "--ndjson",
+        action="store_true",
+        help="Stream one JSON line per updated, outdated or failed file, then a summary line"
+    )
+    add_profile_arguments(parser)
+    add_watch_arguments(parser)
+    args = parser.parse_args()
+
+    if args.jobs is not None and args.jobs < 1:
+        parser.error("--jobs must be at least 1")
+    if args.profile_top < 1:
+        parser.error("--profile-top must be at least 1")
+    if args.json and args.ndjson:
+        parser.error("--json and --ndjson cannot be combined")
+    if args.watch and args.json:
+        parser.error("--watch reports as it goes: use --ndjson instead of --json")
+    if args.debounce < 0 or (args.poll is not None and args.poll <= 0):
+        parser.error("--debounce cannot be negative and --poll must be positive")
+
+    events = EventStream("update_agent_frontmatter") if args.ndjson else None
+    console.quiet = args.quiet or args.json or args.ndjson
+    if console.quiet:
+        logger.set_root_level("WARNING")
+    metrics = Metrics()
+    profile = ProfileSession.from_args(metrics, args, "update_agent_frontmatter.py")
+    profile.start()
+    try:
+        console.print("\n[bold blue]Agent Frontmatter Updater[/bold blue]")
+        if args.check:
+            console.print("Checking name fields against filenames...\n")
+        else:
+            console.print("Updating name fields to match filenames...\n")
+        
+        # Find agent files
+        with metrics.timer("scan agent files"):
+            agent_files = scan_agent_files()
+        console.print(f"Found {len(agent_files)} agent files to process\n")
+        
+        # Files unchanged since they were last found correct need no reading;
+        # this path sticks to directory entries and strings, as building
+        # thousands of Path objects would cost more than the stat calls
+        with metrics.timer("check cache"):
+            cache = None if args.no_cache else FrontmatterCache(Path(CACHE_FILE_NAME))
+            stats: Dict[str, os.stat_result] = {}
+            pending = []
+            for entry in agent_files:
+                try:
+                    stats[entry.path] = entry.stat()
+                except OSError:
+                    pass
+                if cache is None or entry.path not in stats or not cache.is_current(entry.path, stats[entry.path]):
+                    pending.append(Path(entry.path))
+        cached_count = len(agent_files) - len(pending)
+        metrics.count("files found", len(agent_files))
+        metrics.count("files verified by cache", cached_count)
+        
+        # Process files with progress tracking
+        results = []
+        changed_count = 0
+        error_count = 0
+        
+        if pending:
+            with make_progress(console) as progress, metrics.timer("process files"):
+                task = progress.add_task("Processing files...", total=len(pending))
+                
+                outcomes = map_parallel(lambda file_path: process_agent_file(file_path, check=args.check),
+                                        pending, args.jobs or default_jobs(),
+                                        metrics=metrics, phase="process files")
+                for file_path, (was_changed, message, up_to_date) in zip(pending, outcomes):
+                    if events is None:
+                        results.append((file_path.name, was_changed, message))
+                    elif message.startswith("Error:"):
+                        events.file("error", file_path, message=message)
+                    elif was_changed:
+                        events.file("outdated" if args.check else "updated", file_path, message=message)
+                    
+                    if was_changed:
+                        changed_count += 1
+                    if message.startswith("Error:"):
+                        error_count += 1
+                    if cache is not None and up_to_date:
+                        try:
+                            # A written file has a new size and mtime
+                            cache.record(str(file_path), file_path.stat() if was_changed else stats[str(file_path)])
+                        except (OSError, KeyError):
+                            pass
+                    
+                    progress.update(task, advance=1)
+        
+        if cache is not None:
+            with metrics.timer("save cache"):
+                cache.save([entry.path for entry in agent_files])
+        metrics.count("files read", len(pending))
+        metrics.count("files needing update" if args.check else "files changed", changed_count)
+        metrics.count("errors", error_count)
+        
+        if args.json or events is not None:
+            summary = {
+                "check": args.check,
+                "files": len(agent_files),
+                "files_unchanged_since_verified": cached_count,
+                "files_needing_update" if args.check else "files_changed": changed_count,
+                "errors": error_count,
+            }
+            if args.metrics:
+                summary["metrics"] = metrics.as_dict()
+            if events is not None:
+                events.summary(**summary)
+            else:
+                summary["results"] = [
+                    {"file": filename, "message": message}
+                    for filename, was_changed, message in results if was_changed or message.startswith("Error:")
+                ]
+                print(json.dumps(summary))
+        
+        # Display results in a table
+        if results and not console.quiet:
+            from rich.table import Table
+            
+            table = Table(title="Processing Results")
+            table.add_column("File", style="cyan")
+            table.add_column("Status", style="green")
+            table.add_column("Details", style="yellow")
+            
+            for filename, was_changed, message in results:
+                if was_changed:
+                    status = "❌ Outdated" if args.check else "✅ Changed"
+                else:
+                    status = "ℹ️  Skipped"
+                table.add_row(filename, status, message)
+            
+            console.print(table)
+        
+        # Summary
+        console.print(f"\n[bold green]Summary:[/bold green]")
+        console.print(f"  Files processed: {len(agent_files)}")
+        if cached_count:
+            console.print(f"  Files unchanged since last verified: {cached_count}")
+        if args.check:
+            console.print(f"  Files needing update: {changed_count}")
+        else:
+            console.print(f"  Files changed: {changed_count}")
+            console.print(f"  Files skipped: {len(agent_files) - changed_count}")
+        
+        exit_status = 0
+        if args.check:
+            if changed_count > 0 or error_count > 0:
+                console.print(f"\n[bold red]✗ {changed_count} agent files have outdated names, "
+                              f"{error_count} could not be checked.[/bold red]")
+                exit_status = 1
+            else:
+                console.print(f"\n[bold blue]ℹ️  All agent files already have correct names.[/bold blue]")
+        elif changed_count > 0:
+            console.print(f"\n[bold yellow]✨ Successfully updated {changed_count} agent files![/bold yellow]")
+        else:
+            console.print(f"\n[bold blue]ℹ️  All agent files already have correct names.[/bold blue]")
+        
+        if args.watch:
+            return watch_agent_files(args, events)
+        return exit_status
+        
+    except FileNotFoundError as e:
+        report_error(e, args, events)
+        return 1
+    except Exception as e:
+        logger.error(f"Script failed: {e}")
+        report_error(e, args, events)
+        return 1
+    finally:
+        if args.metrics and not console.quiet:
+            console.print(metrics.table("Frontmatter Metrics"))
+        profile.finish(console)
@@ -0,0 +1,149 @@
+#!/usr/bin/env -S uv run
+# /// script
+# requires-python = ">=3.11"
+# dependencies = [
+#     "pyyaml>=6.0",
+#     "rich>=13.0",
+# ]
+# ///
+"""
+Micro-benchmark for update_agent_frontmatter.py.
+
+Generates a synthetic set of agent files (5k by default) with realistic
+frontmatter, a share of which carry a stale name, then times setting every
+name in memory with:
+
+- the legacy path (DOTALL regex split, yaml.safe_load, yaml.dump of the whole
+  mapping, kept here as the reference)
+- the legacy path on the libyaml loader and dumper, when PyYAML has them
+- update_name_in_content(), which rewrites only the name: line
+
+The "Restyled" column counts updated files in which lines other than the
+name changed, which is the churn the line rewrite avoids.
+
+Usage:
+    uv run scripts/benchmarks/bench_frontmatter.py
+    uv run scripts/benchmarks/bench_frontmatter.py --files 20000 --stale 0.5
+"""
+
+import argparse
+import random
+import re
+import sys
+import time
+from pathlib import Path
+from typing import Callable, List, Optional, Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import yaml  # noqa: E402
+from rich.console import Console  # noqa: E402
+from rich.table import Table  # noqa: E402
+
+import agent_frontmatter  # noqa: E402
+
+console = Console()
+
+WORDS = (
+    "agent team review deploy build test release design research plan "
+    "document pipeline service config handoff workflow sprint task"
+).split()
+
+TOOLS = ["Read", "Write", "Edit", "Bash", "Grep", "Glob", "WebSearch", "WebFetch", "mcp__freecrawl__scrape"]
+
+
+def legacy_update(content: str, expected_name: str, loader=yaml.SafeLoader, dumper=yaml.Dumper) -> Optional[str]:
+    """The pre-fast-path process_agent_file() logic, without the file I/O."""
+    match = re.match(r'^---\s*\n(.*?)\n---\s*\n(.*)', content, re.DOTALL)
+    if not match:
+        return None
+    frontmatter = yaml.load(match.group(1), Loader=loader)
+    if frontmatter is None or frontmatter.get('name') == expected_name:
+        return None
+    updated = frontmatter.copy()
+    updated['name'] = expected_name
+    text = yaml.dump(updated, Dumper=dumper, default_flow_style=False, sort_keys=False).strip()
+    return f"---\n{text}\n---\n{match.group(2)}"
+
+
+def build_agents(files: int, stale: float, seed: int = 0) -> List[Tuple[str, str]]:
+    """Create (expected_name, content) pairs; stale of them carry another name."""
+    rng = random.Random(seed)
+    agents = []
+    for number in range(files):
+        name = f"{rng.choice(WORDS)}-{rng.choice(WORDS)}-{number}"
+        current = f"{name}-old" if rng.random() < stale else name
+        description = " ".join(rng.choices(WORDS, k=25))
+        lines = [
+            "---",
+            f"name: {current}",
+            f"description: Use this agent to {description}. For example",
+            f"  <example>{' '.join(rng.choices(WORDS, k=12))}</example>",
+            f"tools: {', '.join(rng.sample(TOOLS, 4))}",
+            f"model: {rng.choice(['sonnet', 'opus', 'haiku'])}",
+            f"color: {rng.choice(['blue', 'green', 'purple'])}",
+            "---",
+        ]
+        lines += [" ".join(rng.choices(WORDS, k=12)) for _ in range(40)]
+        agents.append((name, "\n".join(lines) + "\n"))
+    return agents
+
+
+def run(update: Callable[[str, str], Optional[str]], agents: List[Tuple[str, str]]) -> Tuple[int, int]:
+    """Return (files updated, updated files with lines besides the name changed)."""
+    updated = restyled = 0
+    for name, content in agents:
+        new_content = update(content, name)
+        if new_content is None:
+            continue
+        updated += 1
+        changed = sum(1 for old, new in zip(content.splitlines(), new_content.splitlines()) if old != new)
+        if changed > 1 or content.count("\n") != new_content.count("\n"):
+            restyled += 1
+    return updated, restyled
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark update_agent_frontmatter.py name rewriting")
+    parser.add_argument("--files", type=int, default=5_000, help="Number of agent files to generate")
+    parser.add_argument("--stale", type=float, default=0.3, help="Share of files whose name needs updating")
+    parser.add_argument("--repeat", type=int, default=3, help="Best-of-N repetitions per measurement")
+    args = parser.parse_args()
+
+    console.print(f"[blue]Generating {args.files:,} agent files...[/blue]")
+    agents = build_agents(args.files, args.stale)
+
+    runs = [("legacy regex + yaml", lambda content, name: legacy_update(content, name))]
+    if hasattr(yaml, "CSafeLoader"):
+        runs.append(("legacy regex + libyaml", lambda content, name: legacy_update(
+            content, name, loader=yaml.CSafeLoader, dumper=yaml.CSafeDumper)))
+    runs.append(("name line rewrite", lambda content, name: agent_frontmatter.update_name_in_content(
+        content, name)[0]))
+
+    table = Table(title=f"Updating {args.files:,} agent files ({args.stale:.0%} stale, best of {args.repeat})")
+    table.add_column("Implementation", style="cyan")
+    table.add_column("Seconds", justify="right", style="green")
+    table.add_column("Files/s", justify="right")
+    table.add_column("Updated", justify="right")
+    table.add_column("Restyled", justify="right", style="yellow")
+    table.add_column("Speedup", justify="right", style="magenta")
+
+    baseline = None
+    for label, update in runs:
+        best = float("inf")
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            for name, content in agents:
+                update(content, name)
+            best = min(best, time.perf_counter() - start)
+        updated, restyled = run(update, agents)
+        baseline = baseline or best
+        table.add_row(label, f"{best:.3f}", f"{args.files / best:,.0f}", f"{updated:,}",
+                      f"{restyled:,}", f"{baseline / best:.1f}x")
+
+    console.print(table)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,142 @@
+#!/usr/bin/env -S uv run
+# /// script
+# requires-python = ">=3.11"
+# dependencies = [
+#     "rich>=13.0",
+# ]
+# ///
+"""
+Micro-benchmark for the install.py ignore matcher.
+
+Builds a synthetic source tree (100k files by default) with a realistic mix of
+installable files, build artifacts and vendored directories, then times:
+
+- the legacy per-path should_skip_path() scan (kept here as the reference)
+- the compiled IgnoreMatcher walk from install.get_files_to_copy()
+- the compiled matcher with a large .installignore, to show that lookup cost
+  does not grow with the number of rules
+
+Usage:
+    uv run scripts/benchmarks/bench_install_ignore.py
+    uv run scripts/benchmarks/bench_install_ignore.py --files 20000 --rules 5000
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import List, Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import install  # noqa: E402
+from rich.console import Console  # noqa: E402
+from rich.table import Table  # noqa: E402
+
+console = Console()
+
+
+def legacy_should_skip_path(path: Path) -> bool:
+    """The pre-matcher implementation of install.should_skip_path()."""
+    for part in path.parts:
+        if part in install.SKIP_PATTERNS:
+            return True
+        if part.startswith('.') and part not in {'.claude', '.github', '.env.sample', '.mcp.json'}:
+            return True
+
+    if path.suffix in install.SKIP_EXTENSIONS:
+        return True
+
+    name = path.name
+    for pattern in install.SKIP_PATTERNS:
+        if '*' in pattern:
+            if pattern.replace('*', '') in name:
+                return True
+        elif name == pattern:
+            return True
+
+    return False
+
+
+def legacy_get_files_to_copy(source_dir: Path) -> List[Tuple[Path, Path]]:
+    """The pre-matcher implementation of install.get_files_to_copy()."""
+    files_to_copy = []
+    for root, dirs, files in os.walk(source_dir):
+        root_path = Path(root)
+        dirs[:] = [d for d in dirs if not legacy_should_skip_path(root_path.relative_to(source_dir) / d)]
+        for file in files:
+            file_path = root_path / file
+            if not legacy_should_skip_path(file_path.relative_to(source_dir)):
+                files_to_copy.append((file_path, file_path.relative_to(source_dir)))
+    return files_to_copy
+
+
+def build_tree(root: Path, total_files: int) -> None:
+    """Create a synthetic scaffolding tree with roughly total_files files."""
+    layout = [
+        # (directory template, file name template, share of files)
+        (".claude/agents", "agent-{i}.md", 0.20),
+        (".claude/commands/group{g}", "command-{i}.md", 0.20),
+        ("ai_docs/topic{g}", "doc-{i}.md", 0.20),
+        ("scripts/pkg{g}/__pycache__", "mod{i}.cpython-311.pyc", 0.10),
+        ("node_modules/dep{g}/lib", "index{i}.js", 0.20),
+        ("logs/run{g}", "run-{i}.log", 0.05),
+        (".git/objects/{g:02x}", "obj{i}", 0.05),
+    ]
+    for directory, name, share in layout:
+        count = int(total_files * share)
+        for i in range(count):
+            folder = root / directory.format(g=i // 500)
+            if i % 500 == 0:
+                folder.mkdir(parents=True, exist_ok=True)
+            (folder / name.format(i=i)).touch()
+
+
+def timed(func, *args) -> Tuple[float, int]:
+    start = time.perf_counter()
+    result = func(*args)
+    return time.perf_counter() - start, len(result)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the install.py ignore matcher")
+    parser.add_argument("--files", type=int, default=100_000, help="Number of files in the synthetic tree")
+    parser.add_argument("--rules", type=int, default=2_000, help="Extra .installignore rules for the scaling run")
+    parser.add_argument("--repeat", type=int, default=3, help="Best-of-N repetitions per measurement")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="bench-installignore-") as tmp:
+        root = Path(tmp)
+        console.print(f"[blue]Building synthetic tree with {args.files:,} files...[/blue]")
+        build_tree(root, args.files)
+
+        small = install.IgnoreMatcher.for_source(root)
+        extra_rules = [f"generated-{i}/" if i % 3 else f"*.ext{i}" for i in range(args.rules)]
+        large = install.IgnoreMatcher(install.default_ignore_rules() + extra_rules)
+
+        runs = [
+            ("legacy should_skip_path", lambda: legacy_get_files_to_copy(root)),
+            ("IgnoreMatcher (defaults)", lambda: install.get_files_to_copy(root, small)),
+            (f"IgnoreMatcher (+{args.rules} rules)", lambda: install.get_files_to_copy(root, large)),
+        ]
+
+        table = Table(title=f"Source scan over {args.files:,} files (best of {args.repeat})")
+        table.add_column("Implementation", style="cyan")
+        table.add_column("Seconds", justify="right", style="green")
+        table.add_column("Files kept", justify="right")
+        table.add_column("Speedup", justify="right", style="magenta")
+
+        baseline = None
+        for label, func in runs:
+            best, kept = min(timed(func) for _ in range(args.repeat))
+            baseline = baseline or best
+            table.add_row(label, f"{best:.3f}", f"{kept:,}", f"{baseline / best:.1f}x")
+
+        console.print(table)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,130 @@
+#!/usr/bin/env -S uv run
+# /// script
+# requires-python = ">=3.11"
+# dependencies = [
+#     "rich>=13.0",
+#     "typer>=0.9",
+# ]
+# ///
+"""
+Micro-benchmark for running several replace_firecrawl.py migrations.
+
+Generates a synthetic corpus of agent documents (5k by default, about 4 KB
+each) that mention tools of several MCP servers, builds one migration spec per
+server, and times finding every edit in the corpus with:
+
+- one ToolMigrator per spec, each searching the whole corpus (the cost of
+  running the migrations one after another)
+- a single ToolMigrator loaded with every spec
+
+Usage:
+    uv run scripts/benchmarks/bench_migrations.py
+    uv run scripts/benchmarks/bench_migrations.py --migrations 10 --docs 20000
+"""
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+from typing import List
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from replace_firecrawl import FIRECRAWL_MIGRATION, MigrationSpec, ToolMigrator  # noqa: E402
+from rich.console import Console  # noqa: E402
+from rich.table import Table  # noqa: E402
+
+console = Console()
+
+WORDS = (
+    "agent team review deploy build test release design research plan "
+    "document pipeline service config handoff workflow sprint task"
+).split()
+
+OPERATIONS = ["query", "fetch", "list_items", "update", "delete", "status"]
+
+
+def build_specs(count: int) -> List[MigrationSpec]:
+    """The built-in Firecrawl spec plus count - 1 synthetic server migrations."""
+    specs = [FIRECRAWL_MIGRATION]
+    for number in range(1, count):
+        old, new = f"mcp__server{number}__", f"mcp__server{number}_v2__"
+        specs.append(MigrationSpec(
+            name=f"server{number}",
+            renames={old + operation: new + operation for operation in OPERATIONS[:-1]},
+            patterns=[(old + r'([a-z_]+)', new + r'\1')],
+            tools={old + OPERATIONS[-1]: [new + "query", new + "fetch"]},
+        ))
+    return specs
+
+
+def build_corpus(docs: int, specs: List[MigrationSpec], hit_rate: float, seed: int = 0) -> List[bytes]:
+    """Create docs synthetic agent documents; hit_rate of the lines mention a tool."""
+    rng = random.Random(seed)
+    names = [name for spec in specs for name in [*spec.renames, *spec.tools]]
+    corpus = []
+    for _ in range(docs):
+        tools = ", ".join(["Read", *rng.sample(names, 3)])
+        lines = ["---", "name: synthetic", f"tools: {tools}", "---"]
+        for _ in range(60):
+            words = rng.choices(WORDS, k=10)
+            if rng.random() < hit_rate:
+                words[rng.randrange(10)] = rng.choice(names)
+            lines.append(" ".join(words))
+        corpus.append(("\n".join(lines) + "\n").encode())
+    return corpus
+
+
+def count_edits(migrators: List[ToolMigrator], corpus: List[bytes]) -> int:
+    total = 0
+    for migrator in migrators:
+        for content in corpus:
+            if migrator.has_marker(content):
+                total += sum(1 for _ in migrator.iter_edits(content))
+    return total
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark combined vs one-at-a-time tool migrations")
+    parser.add_argument("--migrations", type=int, default=5, help="Number of migrations to run")
+    parser.add_argument("--docs", type=int, default=5_000, help="Number of documents in the corpus")
+    parser.add_argument("--hit-rate", type=float, default=0.05, help="Share of lines that mention a tool")
+    parser.add_argument("--repeat", type=int, default=3, help="Best-of-N repetitions per measurement")
+    args = parser.parse_args()
+
+    specs = build_specs(args.migrations)
+    console.print(f"[blue]Generating {args.docs:,} documents...[/blue]")
+    corpus = build_corpus(args.docs, specs, args.hit_rate)
+    size_mb = sum(len(doc) for doc in corpus) / 1e6
+
+    root = Path.cwd()
+    runs = [
+        ("first spec only", [ToolMigrator(root, specs=specs[:1])]),
+        (f"{len(specs)} specs, one pass each", [ToolMigrator(root, specs=[spec]) for spec in specs]),
+        (f"{len(specs)} specs, combined", [ToolMigrator(root, specs=specs)]),
+    ]
+
+    table = Table(title=f"Migrating {args.docs:,} documents ({size_mb:.1f} MB, best of {args.repeat})")
+    table.add_column("Run", style="cyan")
+    table.add_column("Seconds", justify="right", style="green")
+    table.add_column("MB/s", justify="right")
+    table.add_column("Edits", justify="right")
+    table.add_column("vs first spec", justify="right", style="magenta")
+
+    baseline = None
+    for label, migrators in runs:
+        best = float("inf")
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            total = count_edits(migrators, corpus)
+            best = min(best, time.perf_counter() - start)
+        baseline = baseline or best
+        table.add_row(label, f"{best:.3f}", f"{size_mb / best:.1f}", f"{total:,}", f"{best / baseline:.1f}x")
+
+    console.print(table)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,131 @@
+#!/usr/bin/env -S uv run
+# /// script
+# requires-python = ">=3.11"
+# dependencies = [
+#     "rich>=13.0",
+# ]
+# ///
+"""
+Micro-benchmark for the rename_agents.py reference rewriter.
+
+Generates a synthetic corpus of markdown-like documents (5k by default, about
+4 KB each) in which a share of the documents mention agent names, then times
+rewriting the whole corpus in memory with:
+
+- the legacy per-name loop (re.findall + re.sub for every mapping entry,
+  kept here as the reference)
+- the single-pass ReferenceRewriter
+
+It also rewrites the output a second time to show that the legacy loop keeps
+renaming names it already renamed while the rewriter leaves them alone.
+
+Usage:
+    uv run scripts/benchmarks/bench_rename_rewrite.py
+    uv run scripts/benchmarks/bench_rename_rewrite.py --docs 20000 --hit-rate 0.5
+"""
+
+import argparse
+import random
+import re
+import sys
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import rename_agents  # noqa: E402
+from rich.console import Console  # noqa: E402
+from rich.table import Table  # noqa: E402
+
+console = Console()
+
+WORDS = (
+    "agent team review deploy build test release design research plan "
+    "document pipeline service config handoff workflow sprint task"
+).split()
+
+
+def legacy_rewrite(content: str, mapping: Dict[str, str]) -> Tuple[str, int]:
+    """The pre-rewriter loop from rename_agents.update_file_references()."""
+    replacements_made = 0
+    sorted_mapping = sorted(mapping.items(), key=lambda x: len(x[0]), reverse=True)
+    for old_name, new_name in sorted_mapping:
+        if old_name != new_name:
+            pattern = r'\b' + re.escape(old_name) + r'\b'
+            matches = re.findall(pattern, content)
+            if matches:
+                content = re.sub(pattern, new_name, content)
+                replacements_made += len(matches)
+    return content, replacements_made
+
+
+def build_corpus(docs: int, hit_rate: float, seed: int = 0) -> List[str]:
+    """Create docs synthetic documents; hit_rate of them mention agents."""
+    rng = random.Random(seed)
+    names = list(rename_agents.AGENT_MAPPING)
+    corpus = []
+    for _ in range(docs):
+        lines = []
+        for _ in range(60):
+            words = rng.choices(WORDS, k=10)
+            if rng.random() < hit_rate / 10:
+                words[rng.randrange(10)] = rng.choice(names)
+            lines.append(" ".join(words))
+        corpus.append("\n".join(lines) + "\n")
+    return corpus
+
+
+def rewrite_corpus(rewrite: Callable[[str], Tuple[str, int]], corpus: List[str]) -> Tuple[List[str], int]:
+    output, total = [], 0
+    for content in corpus:
+        content, count = rewrite(content)
+        output.append(content)
+        total += count
+    return output, total
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the rename_agents.py reference rewriter")
+    parser.add_argument("--docs", type=int, default=5_000, help="Number of documents in the corpus")
+    parser.add_argument("--hit-rate", type=float, default=0.2, help="Average agent mentions per 10 lines")
+    parser.add_argument("--repeat", type=int, default=3, help="Best-of-N repetitions per measurement")
+    args = parser.parse_args()
+
+    mapping = rename_agents.AGENT_MAPPING
+    console.print(f"[blue]Generating {args.docs:,} documents...[/blue]")
+    corpus = build_corpus(args.docs, args.hit_rate)
+    size_mb = sum(len(doc) for doc in corpus) / 1e6
+
+    rewriter = rename_agents.ReferenceRewriter(mapping)
+    runs = [
+        ("legacy per-name loop", lambda content: legacy_rewrite(content, mapping)),
+        ("ReferenceRewriter", rewriter.rewrite),
+    ]
+
+    table = Table(title=f"Rewriting {args.docs:,} documents ({size_mb:.1f} MB, best of {args.repeat})")
+    table.add_column("Implementation", style="cyan")
+    table.add_column("Seconds", justify="right", style="green")
+    table.add_column("MB/s", justify="right")
+    table.add_column("Replacements", justify="right")
+    table.add_column("On rerun", justify="right", style="yellow")
+    table.add_column("Speedup", justify="right", style="magenta")
+
+    baseline = None
+    for label, rewrite in runs:
+        best = float("inf")
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            output, total = rewrite_corpus(rewrite, corpus)
+            best = min(best, time.perf_counter() - start)
+        _, rerun_total = rewrite_corpus(rewrite, output)
+        baseline = baseline or best
+        table.add_row(label, f"{best:.3f}", f"{size_mb / best:.1f}", f"{total:,}",
+                      f"{rerun_total:,}", f"{baseline / best:.1f}x")
+
+    console.print(table)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,377 @@
+#!/usr/bin/env -S uv run
+# /// script
+# requires-python = ">=3.11"
+# dependencies = [
+#     "pyyaml>=6.0",
+#     "rich>=13.0",
+#     "typer>=0.9",
+# ]
+# ///
+"""
+Benchmark suite for the scaffolding scripts.
+
+Generates a synthetic repository with synthetic_repo.py and times each phase
+of the scripts on it:
+
+    install/scan         install.iter_source_files()
+    install/copy         install.copy_files() into an empty target
+    install/reinstall    install.copy_files() again, with every file unchanged
+    rename/scan          rename_agents.get_all_files_to_update()
+    rename/update        rename_agents.iter_reference_updates() on those files
+    frontmatter/update   agent_frontmatter.process_agent_file() on every agent
+    firecrawl/find       ToolMigrator.find_target_files()
+    firecrawl/analyze    ToolMigrator.analyze_file() on every target
+    firecrawl/apply      ToolMigrator.apply_changes() on every change
+
+Every run of a phase happens in a fresh process on a fresh copy of the
+repository, so no run benefits from another's in-memory caches and the peak
+RSS reported is that phase's own (setup included, worker processes counted).
+The fastest of --repeat runs is kept.
+
+Results can be saved as JSON with --output. Given a results file saved
+earlier as --baseline, phases that got more than --threshold slower are
+reported as regressions and the exit status is 1.
+
+Usage:
+    uv run scripts/benchmarks/bench_suite.py
+    uv run scripts/benchmarks/bench_suite.py --docs 20000 --size-median 16384
+    uv run scripts/benchmarks/bench_suite.py --phase install --phase rename/update
+
+    # Record a baseline, then check a change against it
+    uv run scripts/benchmarks/bench_suite.py --output bench-baseline.json
+    uv run scripts/benchmarks/bench_suite.py --baseline bench-baseline.json --threshold 0.1
+"""
+
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import install  # noqa: E402
+import rename_agents  # noqa: E402
+import agent_frontmatter  # noqa: E402
+from replace_firecrawl import ToolMigrator  # noqa: E402
+from rich.console import Console  # noqa: E402
+from rich.table import Table  # noqa: E402
+from scan_core import default_jobs, map_parallel  # noqa: E402
+from synthetic_repo import RepoSpec, add_arguments, generate_repo, spec_from_args  # noqa: E402
+
+console = Console()
+
+# Bumped whenever the results format changes
+RESULTS_VERSION = 1
+
+# A phase's setup takes the repository copy and the --jobs value, and
+# returns the timed work, which returns the files it covered
+PhaseRun = Callable[[], Iterable[Path]]
+
+
+def _install_scan(repo: Path, jobs: Optional[int]) -> PhaseRun:
+    return lambda: [item.path for item in install.iter_source_files(repo)]
+
+
+def _install_copy(repo: Path, jobs: Optional[int]) -> PhaseRun:
+    target = repo.parent / "target"
+
+    def run() -> List[Path]:
+        stats = install.copy_files(repo, target, install.iter_source_files(repo), jobs=jobs)
+        return [target / path for path in stats.manifest]
+    return run
+
+
+def _install_reinstall(repo: Path, jobs: Optional[int]) -> PhaseRun:
+    target = repo.parent / "target"
+    manifest = install.copy_files(repo, target, install.iter_source_files(repo), jobs=jobs).manifest
+
+    def run() -> List[Path]:
+        stats = install.copy_files(repo, target, install.iter_source_files(repo), manifest=manifest, jobs=jobs)
+        return [target / path for path in stats.manifest]
+    return run
+
+
+def _rename_scan(repo: Path, jobs: Optional[int]) -> PhaseRun:
+    os.chdir(repo)  # The script works on the current directory
+    return rename_agents.get_all_files_to_update
+
+
+def _rename_update(repo: Path, jobs: Optional[int]) -> PhaseRun:
+    os.chdir(repo)
+    files = rename_agents.get_all_files_to_update()
+    rewriter = rename_agents.ReferenceRewriter(rename_agents.AGENT_MAPPING)
+
+    def run() -> Iterable[Path]:
+        for _ in rename_agents.iter_reference_updates(files, rewriter, jobs or os.cpu_count() or 1):
+            pass
+        return files
+    return run
+
+
+def _frontmatter_update(repo: Path, jobs: Optional[int]) -> PhaseRun:
+    os.chdir(repo)
+    files = agent_frontmatter.find_agent_files()
+
+    def run() -> List[Path]:
+        for _ in map_parallel(agent_frontmatter.process_agent_file, files, jobs or default_jobs()):
+            pass
+        return files
+    return run
+
+
+def _firecrawl_find(repo: Path, jobs: Optional[int]) -> PhaseRun:
+    migrator = ToolMigrator(repo, force=True, jobs=jobs)
+    # Every searched file counts, not just the ones found
+    candidates = [file_path for file_path, _ in migrator.iter_candidate_files()]
+
+    def run() -> List[Path]:
+        migrator.find_target_files()
+        return candidates
+    return run
+
+
+def _firecrawl_analyze(repo: Path, jobs: Optional[int]) -> PhaseRun:
+    migrator = ToolMigrator(repo, force=True, jobs=jobs)
+    targets = migrator.find_target_files()
+
+    def run() -> List[Path]:
+        for file_path in targets:
+            migrator.analyze_file(file_path)
+        return targets
+    return run
+
+
+def _firecrawl_apply(repo: Path, jobs: Optional[int]) -> PhaseRun:
+    migrator = ToolMigrator(repo, force=True, jobs=jobs)
+    changes = [change for change in map(migrator.analyze_file, migrator.find_target_files()) if change]
+
+    def run() -> List[Path]:
+        for change in changes:
+            migrator.apply_changes(change)
+        return [change.file_path for change in changes]
+    return run
+
+
+PHASES: Dict[str, Callable[[Path, Optional[int]], PhaseRun]] = {
+    "install/scan": _install_scan,
+    "install/copy": _install_copy,
+    "install/reinstall": _install_reinstall,
+    "rename/scan": _rename_scan,
+    "rename/update": _rename_update,
+    "frontmatter/update": _frontmatter_update,
+    "firecrawl/find": _firecrawl_find,
+    "firecrawl/analyze": _firecrawl_analyze,
+    "firecrawl/apply": _firecrawl_apply,
+}
+
+
+def peak_rss_mb() -> Optional[float]:
+    """Peak resident set size of this process or any finished child, in MB."""
+    if resource is None:
+        return None
+    peak = max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+               resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+    # Kilobytes on Linux, bytes on macOS
+    return peak / (1 << 20 if sys.platform == "darwin" else 1 << 10)
+
+
+def _total_size(paths: Iterable[Path]) -> int:
+    size = 0
+    for path in paths:
+        try:
+            size += os.stat(path).st_size
+        except OSError:
+            pass
+    return size
+
+
+def run_phase(name: str, source: Path, workdir: Path, jobs: Optional[int]) -> dict:
+    """Run one phase on a copy of source; called in a fresh process."""
+    install.console.quiet = True
+    logging.disable(logging.INFO)
+
+    repo = workdir / "repo"
+    shutil.copytree(source, repo, symlinks=True)
+    run = PHASES[name](repo, jobs)
+
+    start = time.perf_counter()
+    files = list(run())
+    seconds = time.perf_counter() - start
+
+    return {"seconds": seconds, "files": len(files), "bytes": _total_size(files), "peak_rss_mb": peak_rss_mb()}
+
+
+def measure(name: str, source: Path, jobs: Optional[int], repeat: int, workdir: Optional[Path]) -> dict:
+    """Run a phase repeat times, keeping the fastest time and the highest peak RSS."""
+    context = multiprocessing.get_context("spawn")
+    runs = []
+    for _ in range(repeat):
+        with tempfile.TemporaryDirectory(prefix="bench-suite-", dir=workdir) as run_dir:
+            with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+                runs.append(executor.submit(run_phase, name, source, Path(run_dir), jobs).result())
+
+    best = min(runs, key=lambda run: run["seconds"])
+    seconds = max(best["seconds"], 1e-9)
+    peaks = [run["peak_rss_mb"] for run in runs if run["peak_rss_mb"] is not None]
+    return {
+        "seconds": best["seconds"],
+        "files": best["files"],
+        "bytes": best["bytes"],
+        "files_per_second": best["files"] / seconds,
+        "bytes_per_second": best["bytes"] / seconds,
+        "peak_rss_mb": max(peaks) if peaks else None,
+    }
+
+
+def select_phases(patterns: Optional[List[str]]) -> List[str]:
+    """Resolve --phase values, each a phase name or a script name such as "install"."""
+    if not patterns:
+        return list(PHASES)
+    selected = []
+    for pattern in patterns:
+        matches = [name for name in PHASES if name == pattern or name.split("/")[0] == pattern]
+        if not matches:
+            raise ValueError(f"Unknown phase {pattern!r}; choose from {', '.join(PHASES)}")
+        selected += [name for name in matches if name not in selected]
+    return selected
+
+
+def load_results(path: Path) -> dict:
+    data = json.loads(path.read_text(encoding="utf-8"))
+    if not isinstance(data, dict) or data.get("version") != RESULTS_VERSION or not isinstance(data.get("phases"), dict):
+        raise ValueError(f"{path} is not a results file of version {RESULTS_VERSION}")
+    return data
+
+
+def find_regressions(results: dict, baseline: dict, threshold: float) -> Dict[str, float]:
+    """Return the relative slowdown of every phase slower than the baseline by more than threshold."""
+    regressions = {}
+    for name, phase in results["phases"].items():
+        reference = baseline["phases"].get(name)
+        if not reference or reference["seconds"] <= 0:
+            continue
+        change = phase["seconds"] / reference["seconds"] - 1
+        if change > threshold:
+            regressions[name] = change
+    return regressions
+
+
+def results_table(results: dict, baseline: Optional[dict], threshold: float) -> Table:
+    repo = results["repo"]
+    table = Table(title=f"Benchmark suite: {repo['files']:,} files ({repo['bytes'] / 1e6:.1f} MB), "
+                        f"best of {results['repeat']}")
+    table.add_column("Phase", style="cyan", no_wrap=True)
+    table.add_column("Seconds", justify="right", style="green")
+    table.add_column("Files/s", justify="right")
+    table.add_column("MB/s", justify="right")
+    table.add_column("RSS MB", justify="right")
+    if baseline:
+        table.add_column("Baseline", justify="right")
+        table.add_column("Change", justify="right", style="magenta")
+
+    regressions = find_regressions(results, baseline, threshold) if baseline else {}
+    for name, phase in results["phases"].items():
+        peak = phase["peak_rss_mb"]
+        row = [
+            name,
+            f"{phase['seconds']:.3f}",
+            f"{phase['files_per_second']:,.0f}",
+            f"{phase['bytes_per_second'] / 1e6:.1f}",
+            "n/a" if peak is None else f"{peak:.0f}",
+        ]
+        if baseline:
+            reference = baseline["phases"].get(name)
+            if reference:
+                change = phase["seconds"] / reference["seconds"] - 1 if reference["seconds"] > 0 else 0.0
+                marker = " [red]✗[/red]" if name in regressions else ""
+                row += [f"{reference['seconds']:.3f}", f"{change:+.0%}{marker}"]
+            else:
+                row += ["-", "new"]
+        table.add_row(*row)
+    return table
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the scaffolding scripts on a synthetic repository")
+    add_arguments(parser)
+    parser.add_argument("--phase", action="append", metavar="NAME",
+                        help="Phase or script to run, such as install/copy or rename; repeatable (default: all)")
+    parser.add_argument("--jobs", "-j", type=int, default=None, metavar="N",
+                        help="Worker count passed to the phases (default: each script's own)")
+    parser.add_argument("--repeat", type=int, default=3, help="Best-of-N repetitions per phase")
+    parser.add_argument("--workdir", help="Directory for the generated repository and its copies "
+                                          "(default: the system temp directory)")
+    parser.add_argument("--output", help="Save the results as JSON, for use as a later --baseline")
+    parser.add_argument("--baseline", help="Results file to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="Slowdown relative to the baseline that counts as a regression (default: 0.2)")
+    args = parser.parse_args()
+
+    if args.repeat < 1:
+        parser.error("--repeat must be at least 1")
+    if args.jobs is not None and args.jobs < 1:
+        parser.error("--jobs must be at least 1")
+    try:
+        phases = select_phases(args.phase)
+        baseline = load_results(Path(args.baseline)) if args.baseline else None
+    except (OSError, ValueError) as e:
+        parser.error(str(e))
+
+    spec: RepoSpec = spec_from_args(args)
+    workdir = Path(args.workdir) if args.workdir else None
+    with tempfile.TemporaryDirectory(prefix="bench-suite-repo-", dir=workdir) as repo_dir:
+        source = Path(repo_dir)
+        console.print("[blue]Generating synthetic repository...[/blue]")
+        stats = generate_repo(source, spec)
+
+        results = {
+            "version": RESULTS_VERSION,
+            "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "machine": {"python": platform.python_version(), "platform": platform.platform(),
+                        "cpus": os.cpu_count()},
+            "repo": {**asdict(spec), "files": stats.files, "bytes": stats.bytes},
+            "jobs": args.jobs,
+            "repeat": args.repeat,
+            "phases": {},
+        }
+        for name in phases:
+            console.print(f"[blue]Running {name}...[/blue]")
+            results["phases"][name] = measure(name, source, args.jobs, args.repeat, workdir)
+
+    if baseline and (baseline.get("repo") != results["repo"] or baseline.get("jobs") != results["jobs"]):
+        console.print("[yellow]⚠ The baseline was recorded on a different repository or --jobs; "
+                      "the comparison is only indicative[/yellow]")
+    console.print(results_table(results, baseline, args.threshold))
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, indent=2) + "\n", encoding="utf-8")
+        console.print(f"[green]✓[/green] Results saved to {args.output}")
+
+    if baseline:
+        regressions = find_regressions(results, baseline, args.threshold)
+        if regressions:
+            console.print(f"[bold red]✗ {len(regressions)} phases regressed by more than {args.threshold:.0%}: "
+                          f"{', '.join(regressions)}[/bold red]")
+            return 1
+        console.print(f"[green]✓ No phase regressed by more than {args.threshold:.0%}[/green]")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,210 @@
+#!/usr/bin/env -S uv run
+# /// script
+# requires-python = ">=3.11"
+# dependencies = [
+#     "pyyaml>=6.0",
+#     "rich>=13.0",
+#     "typer>=0.9",
+# ]
+# ///
+"""
+Import-time and hook-latency budgets for the scaffolding scripts.
+
+The scripts run from git hooks and slash commands, where every invocation
+pays for interpreter startup and imports before doing any work. This check
+keeps that cost down:
+
+- Each script module is imported in a fresh interpreter under
+  `python -X importtime`; its cumulative import time must stay within
+  IMPORT_BUDGETS_MS, and none of rich, yaml or typer may be among the
+  modules it loads.
+- The hook commands in HOOK_RUNS are run on a synthetic repository in which
+  nothing needs doing (each is run once beforehand, to fill its cache); the
+  median wall time must stay under HOOK_BUDGET_MS, and the -X importtime
+  output of the run must not show rich, or yaml, being loaded.
+
+The fastest of --repeat imports and the median of --repeat hook runs are
+compared with the budgets, multiplied by --scale for slower machines. The
+exit status is 1 if any budget is exceeded.
+
+The scripts are byte-compiled first, so imports are measured as they are in
+normal use, with the bytecode cache in place.
+
+Usage:
+    uv run scripts/benchmarks/check_import_time.py
+    uv run scripts/benchmarks/check_import_time.py --repeat 10 --scale 2
+"""
+
+import argparse
+import compileall
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Set, Tuple
+
+SCRIPTS_DIR = Path(__file__).resolve().parent.parent
+
+sys.path.insert(0, str(SCRIPTS_DIR))
+
+from rich.console import Console  # noqa: E402
+from rich.table import Table  # noqa: E402
+from synthetic_repo import RepoSpec, generate_repo  # noqa: E402
+
+console = Console()
+
+# Cumulative import time of each module, in milliseconds, stdlib dependencies included
+IMPORT_BUDGETS_MS = {
+    "scan_core": 40,
+    "reference_index": 60,
+    "agent_frontmatter": 60,
+    "update_agent_frontmatter": 60,
+    "agent_catalog": 55,
+    "rename_agents": 75,
+    "install": 100,
+    "replace_firecrawl": 100,
+}
+
+# Imported only when a script draws output, parses YAML or builds its CLI
+LAZY_MODULES = {"rich", "yaml", "typer"}
+
+# Wall time of a hook invocation on an unchanged tree, interpreter startup included
+HOOK_BUDGET_MS = 100
+
+# Hook commands: (script, arguments, modules the run must not load)
+HOOK_RUNS = [
+    ("update_agent_frontmatter.py", ["--check", "--quiet"], {"rich", "yaml"}),
+    ("agent_catalog.py", ["--quiet"], {"rich", "yaml"}),
+]
+
+
+class ImportTimes(NamedTuple):
+    """What one `python -X importtime` run reported."""
+    cumulative_us: Dict[str, int]  # Top-level package name -> largest cumulative time
+    modules: Set[str]
+
+
+def parse_importtime(stderr: str) -> ImportTimes:
+    """Parse the `import time: self | cumulative | name` lines of -X importtime output."""
+    cumulative: Dict[str, int] = {}
+    modules: Set[str] = set()
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        fields = line[len("import time:"):].split("|")
+        if len(fields) != 3 or not fields[1].strip().isdigit():
+            continue  # The header line
+        name = fields[2].strip()
+        modules.add(name)
+        cumulative[name] = max(cumulative.get(name, 0), int(fields[1]))
+    return ImportTimes(cumulative, modules)
+
+
+def loaded_packages(modules: Set[str]) -> Set[str]:
+    """Top-level packages among the loaded modules."""
+    return {name.split(".")[0] for name in modules}
+
+
+def run_python(args: List[str], cwd: Path) -> subprocess.CompletedProcess:
+    env = dict(os.environ, PYTHONPATH=str(SCRIPTS_DIR))
+    return subprocess.run([sys.executable, *args], cwd=cwd, env=env, capture_output=True, text=True)
+
+
+def measure_import(module: str, repeat: int) -> Tuple[float, Set[str]]:
+    """Return the fastest cumulative import time in ms, and the packages the import loaded."""
+    best = float("inf")
+    packages: Set[str] = set()
+    for _ in range(repeat):
+        result = run_python(["-X", "importtime", "-c", f"import {module}"], SCRIPTS_DIR)
+        if result.returncode != 0:
+            raise RuntimeError(f"import {module} failed:\n{result.stderr}")
+        times = parse_importtime(result.stderr)
+        best = min(best, times.cumulative_us[module] / 1000)
+        packages = loaded_packages(times.modules)
+    return best, packages
+
+
+def measure_hook(script: str, arguments: List[str], repo: Path, repeat: int) -> Tuple[float, Set[str], int]:
+    """Return the median wall time in ms, the packages a run loaded and its exit status."""
+    command = [str(SCRIPTS_DIR / script), *arguments]
+    run_python(command, repo)  # Fills the script's cache, as the previous hook run would have
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = run_python(command, repo)
+        samples.append((time.perf_counter() - start) * 1000)
+    traced = run_python(["-X", "importtime", *command], repo)
+    return statistics.median(samples), loaded_packages(parse_importtime(traced.stderr).modules), result.returncode
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Check the scripts' import times and hook latency against budgets")
+    parser.add_argument("--repeat", type=int, default=5, help="Imports and hook runs per measurement (default: 5)")
+    parser.add_argument("--scale", type=float, default=1.0,
+                        help="Multiply every budget by this factor, for slower machines (default: 1)")
+    parser.add_argument("--agents", type=int, default=200, help="Agent definitions in the synthetic repository")
+    args = parser.parse_args()
+
+    if args.repeat < 1:
+        parser.error("--repeat must be at least 1")
+    if args.scale <= 0:
+        parser.error("--scale must be positive")
+
+    compileall.compile_dir(SCRIPTS_DIR, maxlevels=0, quiet=1)
+    failures = []
+
+    table = Table(title=f"Import times (fastest of {args.repeat})")
+    table.add_column("Module", style="cyan", no_wrap=True)
+    table.add_column("ms", justify="right", style="green")
+    table.add_column("Budget", justify="right")
+    table.add_column("Eager imports", style="yellow")
+    for module, budget in IMPORT_BUDGETS_MS.items():
+        budget *= args.scale
+        milliseconds, packages = measure_import(module, args.repeat)
+        eager = sorted(packages & LAZY_MODULES)
+        if milliseconds > budget:
+            failures.append(f"import {module} took {milliseconds:.1f} ms (budget {budget:.0f} ms)")
+        if eager:
+            failures.append(f"import {module} loads {', '.join(eager)}")
+        marker = " [red]✗[/red]" if milliseconds > budget else ""
+        table.add_row(module, f"{milliseconds:.1f}{marker}", f"{budget:.0f}", ", ".join(eager) or "-")
+    console.print(table)
+
+    with tempfile.TemporaryDirectory(prefix="import-budget-repo-") as repo_dir:
+        repo = Path(repo_dir)
+        generate_repo(repo, RepoSpec(agents=args.agents, commands=0, docs=0, stale=0))
+
+        table = Table(title=f"Hook runs on an unchanged tree (median of {args.repeat})")
+        table.add_column("Command", style="cyan", no_wrap=True)
+        table.add_column("ms", justify="right", style="green")
+        table.add_column("Budget", justify="right")
+        table.add_column("Loaded", style="yellow")
+        budget = HOOK_BUDGET_MS * args.scale
+        for script, arguments, forbidden in HOOK_RUNS:
+            label = " ".join([script, *arguments])
+            milliseconds, packages, returncode = measure_hook(script, arguments, repo, args.repeat)
+            loaded = sorted(packages & forbidden)
+            if returncode != 0:
+                failures.append(f"{label} exited with status {returncode}")
+            if milliseconds > budget:
+                failures.append(f"{label} took {milliseconds:.1f} ms (budget {budget:.0f} ms)")
+            if loaded:
+                failures.append(f"{label} loads {', '.join(loaded)}")
+            marker = " [red]✗[/red]" if milliseconds > budget else ""
+            table.add_row(label, f"{milliseconds:.1f}{marker}", f"{budget:.0f}", ", ".join(loaded) or "-")
+        console.print(table)
+
+    if failures:
+        console.print(f"[bold red]✗ {len(failures)} budget checks failed:[/bold red]")
+        for failure in failures:
+            console.print(f"  [red]•[/red] {failure}")
+        return 1
+    console.print("[green]✓ All import and hook latency budgets met[/green]")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,220 @@
+#!/usr/bin/env -S uv run
+# /// script
+# requires-python = ">=3.11"
+# dependencies = [
+#     "rich>=13.0",
+#     "typer>=0.9",
+# ]
+# ///
+"""
+Synthetic repository generator for the benchmarks.
+
+Creates a tree shaped like a project scaffolded from this repository:
+
+- .claude/agents/*.md: agent definitions with frontmatter, a share of them
+  carrying a stale name
+- .claude/commands/<team>/*.md: slash commands
+- docs/<section>/part-<n>/*.md: documentation
+
+A given share of lines mentions an agent, a slash command or an MCP tool,
+including the Firecrawl ones replace_firecrawl.py migrates. File
+sizes follow a log-normal distribution around a median, so most files are
+small and a few are large, as in real trees.
+
+bench_suite.py generates its repositories with generate_repo(); run this
+script to get one to try the other scripts on by hand.
+
+Usage:
+    uv run scripts/benchmarks/synthetic_repo.py /tmp/synthetic
+    uv run scripts/benchmarks/synthetic_repo.py /tmp/synthetic --agents 500 --docs 20000 --density 0.1
+"""
+
+import argparse
+import random
+import sys
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import List, NamedTuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from rename_agents import AGENT_MAPPING  # noqa: E402
+from replace_firecrawl import FIRECRAWL_MIGRATION  # noqa: E402
+from rich.console import Console  # noqa: E402
+
+console = Console()
+
+WORDS = (
+    "agent team review deploy build test release design research plan "
+    "document pipeline service config handoff workflow sprint task"
+).split()
+
+TEAMS = ["engineering", "product", "qa", "devops", "creative", "marketing", "data", "research", "meta"]
+
+TOOLS = ["Read", "Write", "Edit", "Bash", "Grep", "Glob", "WebSearch", "WebFetch"]
+
+SECTIONS = ["guides", "reference", "architecture", "runbooks", "decisions"]
+
+
+@dataclass
+class RepoSpec:
+    """Shape of a synthetic repository."""
+    agents: int = 200
+    commands: int = 100
+    docs: int = 2_000
+    density: float = 0.05  # Share of lines that mention an agent, command or tool
+    size_median: int = 4_096  # Bytes
+    size_sigma: float = 1.0  # Spread of the log-normal size distribution
+    max_size: int = 4 << 20
+    stale: float = 0.3  # Share of agents whose frontmatter name is out of date
+    seed: int = 0
+
+
+class RepoStats(NamedTuple):
+    files: int
+    bytes: int
+
+
+class _Writer:
+    """Produces the text of the generated files."""
+
+    def __init__(self, spec: RepoSpec):
+        self.spec = spec
+        self.rng = random.Random(spec.seed)
+        self.agent_names = self._agent_names()
+        self.command_names = [
+            f"{TEAMS[number % len(TEAMS)]}:{self.rng.choice(WORDS)}-{number}" for number in range(spec.commands)
+        ]
+        # Old agent names are what rename_agents.py rewrites
+        self.references = (
+            self.agent_names
+            + [f"/{name}" for name in self.command_names]
+            + list(FIRECRAWL_MIGRATION.renames)
+            + ["mcp__firecrawl__*", "mcp__github__create_issue", "mcp__playwright__navigate"]
+        )
+
+    def _agent_names(self) -> List[str]:
+        names = list(AGENT_MAPPING)[:self.spec.agents]
+        for number in range(len(names), self.spec.agents):
+            names.append(f"{TEAMS[number % len(TEAMS)]}-{self.rng.choice(WORDS)}-{number}")
+        return names
+
+    def size(self) -> int:
+        size = int(self.rng.lognormvariate(0, self.spec.size_sigma) * self.spec.size_median)
+        return max(256, min(size, self.spec.max_size))
+
+    def line(self) -> str:
+        words = self.rng.choices(WORDS, k=self.rng.randint(8, 14))
+        if self.rng.random() < self.spec.density:
+            words[self.rng.randrange(len(words))] = self.rng.choice(self.references)
+        return " ".join(words)
+
+    def body(self, header: List[str], size: int) -> str:
+        lines = list(header)
+        length = sum(len(line) + 1 for line in lines)
+        while length < size:
+            line = self.line()
+            if self.rng.random() < 0.05:
+                line = f"## {line.title()}"
+            lines.append(line)
+            length += len(line) + 1
+        return "\n".join(lines) + "\n"
+
+    def agent(self, name: str) -> str:
+        current = f"{name}-old" if self.rng.random() < self.spec.stale else name
+        tools = self.rng.sample(TOOLS, 4)
+        if self.rng.random() < 0.2:
+            tools.append(self.rng.choice(list(FIRECRAWL_MIGRATION.renames)))
+        return self.body([
+            "---",
+            f"name: {current}",
+            f"description: Use this agent to {' '.join(self.rng.choices(WORDS, k=20))}.",
+            f"tools: {', '.join(tools)}",
+            f"model: {self.rng.choice(['sonnet', 'opus', 'haiku'])}",
+            f"color: {self.rng.choice(['blue', 'green', 'purple'])}",
+            "---",
+        ], self.size())
+
+    def command(self) -> str:
+        return self.body([
+            "---",
+            f"description: {' '.join(self.rng.choices(WORDS, k=8))}",
+            f"allowed-tools: {', '.join(self.rng.sample(TOOLS, 3))}",
+            "---",
+        ], self.size())
+
+    def doc(self) -> str:
+        return self.body([f"# {' '.join(self.rng.choices(WORDS, k=4)).title()}", ""], self.size())
+
+
+def _write(path: Path, text: str) -> int:
+    data = text.encode("utf-8")
+    path.write_bytes(data)
+    return len(data)
+
+
+def generate_repo(root: Path, spec: RepoSpec) -> RepoStats:
+    """Write a synthetic repository under root, which should be empty or missing."""
+    writer = _Writer(spec)
+    files = size = 0
+
+    agents_dir = root / ".claude" / "agents"
+    agents_dir.mkdir(parents=True, exist_ok=True)
+    for name in writer.agent_names:
+        size += _write(agents_dir / f"{name}.md", writer.agent(name))
+        files += 1
+
+    for name in writer.command_names:
+        team, command = name.split(":")
+        command_dir = root / ".claude" / "commands" / team
+        command_dir.mkdir(parents=True, exist_ok=True)
+        size += _write(command_dir / f"{command}.md", writer.command())
+        files += 1
+
+    for number in range(spec.docs):
+        # Two levels, so walks have directories to descend into
+        doc_dir = root / "docs" / SECTIONS[number % len(SECTIONS)] / f"part-{number // 100}"
+        doc_dir.mkdir(parents=True, exist_ok=True)
+        size += _write(doc_dir / f"doc-{number}.md", writer.doc())
+        files += 1
+
+    return RepoStats(files, size)
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    """Add the RepoSpec options to a parser."""
+    defaults = RepoSpec()
+    parser.add_argument("--agents", type=int, default=defaults.agents, help="Number of agent definitions")
+    parser.add_argument("--commands", type=int, default=defaults.commands, help="Number of slash commands")
+    parser.add_argument("--docs", type=int, default=defaults.docs, help="Number of documentation files")
+    parser.add_argument("--density", type=float, default=defaults.density,
+                        help="Share of lines that mention an agent, command or tool")
+    parser.add_argument("--size-median", type=int, default=defaults.size_median, help="Median file size in bytes")
+    parser.add_argument("--size-sigma", type=float, default=defaults.size_sigma,
+                        help="Spread of the log-normal file size distribution (0 makes every file the median)")
+    parser.add_argument("--max-size", type=int, default=defaults.max_size, help="Largest file size in bytes")
+    parser.add_argument("--stale", type=float, default=defaults.stale,
+                        help="Share of agents whose frontmatter name is out of date")
+    parser.add_argument("--seed", type=int, default=defaults.seed, help="Random seed")
+
+
+def spec_from_args(args: argparse.Namespace) -> RepoSpec:
+    return RepoSpec(**{name: getattr(args, name) for name in asdict(RepoSpec())})
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Generate a synthetic repository for benchmarking")
+    parser.add_argument("root", help="Directory to create the repository in")
+    add_arguments(parser)
+    args = parser.parse_args()
+
+    root = Path(args.root)
+    if root.exists() and any(root.iterdir()):
+        parser.error(f"{root} is not empty")
+    stats = generate_repo(root, spec_from_args(args))
+    console.print(f"[green]✓[/green] Generated {stats.files:,} files ({stats.bytes / 1e6:.1f} MB) in {root}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -14,11 +14,25 @@ or installs it globally to the user's ~/.claude/ directory.
 
 Features:
 - Copy entire directory structure with preserved permissions
-- Skip build artifacts and version control files
+- Skip build artifacts and version control files, plus gitignore-style rules
+  from an optional .installignore file in the source directory
 - Colored terminal output with progress indicators
 - Dry-run mode for previewing changes
 - Force mode for overwriting existing files
+- Incremental reinstalls driven by a content-hash manifest in the target
+- Streaming scan, conflict check and copy pipeline with bounded memory
+- Concurrent copying on a bounded thread pool
+- Copy, reflink, hardlink or symlink install strategies with copy fallback
 - Global installation with backup and merge capabilities
+- Three-way merge of upstream changes into installed files you edited:
+  JSON structurally, other text line by line
+- Incremental, deduplicated backups of only the files an install changes,
+  restorable with --restore
+- Transactional global installs: staged in a sibling directory, swapped in
+  with one rename and recovered from a journal if interrupted
+- --quiet and --json modes for hooks and other tools, which skip importing
+  rich unless something fails, and an --ndjson event stream with one line per
+  file written, merged, removed or failed
 - Comprehensive error handling and validation
 
 Usage:
@@ -26,31 +40,61 @@ Usage:
     uv run scripts/install.py /path/to/project
     uv run scripts/install.py --dry-run /path/to/project
     uv run scripts/install.py --force /path/to/project
+    uv run scripts/install.py --full /path/to/project
+    uv run scripts/install.py --jobs 8 /path/to/project
+    uv run scripts/install.py --strategy reflink /path/to/project
+    uv run scripts/install.py --uninstall /path/to/project
     
     # Global installation
     uv run scripts/install.py --global
     uv run scripts/install.py --global --dry-run
     uv run scripts/install.py --global --force
+    uv run scripts/install.py --global --list-backups
+    uv run scripts/install.py --global --restore 20250820_101500
+    
+    # Find out where the time goes: phase spans, slowest files, Chrome trace
+    uv run scripts/install.py --global --profile --trace-json install-trace.json
+    
+    # From a hook or another tool: no output, or a JSON summary
+    uv run scripts/install.py --quiet /path/to/project
+    uv run scripts/install.py --json /path/to/project
+    uv run scripts/install.py --ndjson /path/to/project >> events.jsonl
     
     uv run scripts/install.py --help
 """
 
 import argparse
+import ctypes
+import errno
+import hashlib
+import json
 import os
+import re
 import shutil
+import stat
 import sys
+import threading
 import time
+from dataclasses import dataclass, field
+from difflib import SequenceMatcher
 from pathlib import Path
-from typing import List, Set, Tuple
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
 
-from rich.console import Console
-from rich.progress import Progress, TaskID
-from rich.panel import Panel
-from rich.table import Table
-from rich import print as rprint
+from scan_core import (
+    EventStream, LazyConsole, Metrics, ProfileSession, add_profile_arguments, default_jobs, make_progress,
+    run_parallel, walk_tree, write_file_atomic
+)
 
-# Configure rich console
-console = Console()
+# Configure rich console; rich itself is imported on first output
+console = LazyConsole()
+
+# Phase timings and counts, shown with --metrics
+metrics = Metrics()
 
 # Files and directories to skip during copy
 SKIP_PATTERNS = {
@@ -69,121 +113,1305 @@ SKIP_PATTERNS = {
     '.DS_Store',
     '.ropeproject',
     'logs',
-    'output'
+    'output',
+    # Built from .claude/agents by agent_catalog.py; each project builds its own
+    'agent-catalog.json',
 }
 
 # Extensions to skip
 SKIP_EXTENSIONS = {'.pyc', '.pyo', '.pyd', '.so', '.dylib', '.dll'}
 
+# Dotfiles and dot-directories that are still installed
+DOTFILE_ALLOWLIST = {'.claude', '.github', '.env.sample', '.mcp.json'}
 
-def should_skip_path(path: Path) -> bool:
-    """Check if a path should be skipped during copy operation."""
-    # Check if any part of the path matches skip patterns
-    for part in path.parts:
-        if part in SKIP_PATTERNS:
-            return True
-        if part.startswith('.') and part not in {'.claude', '.github', '.env.sample', '.mcp.json'}:
-            return True
+# Optional gitignore-style rules in the source directory
+IGNORE_FILE_NAME = ".installignore"
 
-    # Check file extension
-    if path.suffix in SKIP_EXTENSIONS:
-        return True
+# Manifest of installed files, written into the target directory
+MANIFEST_NAME = ".claude-install-manifest.json"
+MANIFEST_VERSION = 1
 
-    # Skip any file matching patterns
-    name = path.name
-    for pattern in SKIP_PATTERNS:
-        if '*' in pattern:
-            if pattern.replace('*', '') in name:
-                return True
-        elif name == pattern:
-            return True
+# Ways of materializing a source file in the target
+STRATEGIES = ("copy", "reflink", "hardlink", "symlink")
+
+# ioctl request for a copy-on-write clone (linux/fs.h)
+FICLONE = 0x40049409
+
+# Written next to a merged file when both sides changed the same part
+MERGE_CONFLICT_SUFFIX = ".merge-conflict"
+
+# Stands in for a JSON key that one side of a merge does not have
+_MISSING = object()
+
+# Snapshot format written by BackupStore
+BACKUP_SNAPSHOT_VERSION = 1
+
+# Marks a staging directory; its token ties it to the transaction journal
+TRANSACTION_MARKER = ".claude-install-txn"
+
+# renameat2() arguments (linux/fcntl.h, linux/fs.h)
+AT_FDCWD = -100
+RENAME_EXCHANGE = 1 << 1
+
+
+class SourceFile(NamedTuple):
+    """A file yielded by iter_source_files()."""
+    path: Path
+    relative_path: Path
+    stat: Optional[os.stat_result]
+
+
+@dataclass
+class CopyStats:
+    """Counters reported by copy_files()."""
+    scanned: int = 0
+    copied: int = 0
+    replaced: int = 0
+    skipped: int = 0
+    removed: int = 0
+    created_dirs: int = 0
+    fallbacks: int = 0
+    merged: int = 0
+    kept: int = 0
+    manifest: Dict[str, dict] = field(default_factory=dict)
+    conflicts: List[Path] = field(default_factory=list)
+    errors: List[Tuple[Path, str]] = field(default_factory=list)
 
-    return False
 
+def default_ignore_rules() -> List[str]:
+    """Build the built-in skip rules in gitignore syntax."""
+    rules = sorted(SKIP_PATTERNS)
+    rules += [f"*{ext}" for ext in sorted(SKIP_EXTENSIONS)]
+    rules.append(".*")
+    rules += [f"!{name}" for name in sorted(DOTFILE_ALLOWLIST)]
+    return rules
+
+
+def translate_glob(pattern: str) -> str:
+    """Translate a gitignore glob into an unanchored regular expression."""
+    out = []
+    i, n = 0, len(pattern)
+    while i < n:
+        c = pattern[i]
+        if pattern.startswith('**/', i):
+            # Zero or more leading directories
+            out.append('(?:.*/)?')
+            i += 3
+            continue
+        if pattern.startswith('**', i):
+            out.append('.*')
+            i += 2
+            continue
+        if c == '*':
+            out.append('[^/]*')
+        elif c == '?':
+            out.append('[^/]')
+        elif c == '[' and ']' in pattern[i + 2:]:
+            j = pattern.index(']', i + 2)
+            body = pattern[i + 1:j].replace('\\', '\\\\')
+            if body.startswith('!'):
+                body = '^' + body[1:]
+            out.append(f'[{body}]')
+            i = j + 1
+            continue
+        elif c == '\\' and i + 1 < n:
+            out.append(re.escape(pattern[i + 1]))
+            i += 2
+            continue
+        else:
+            out.append(re.escape(c))
+        i += 1
+    return ''.join(out)
+
+
+class IgnoreMatcher:
+    """Precompiled gitignore-style matcher for source paths.
+
+    Rules are bucketed once: literal names and `*.ext` patterns go into dicts
+    and every other glob is folded into a single combined regex per bucket.
+    A lookup is a few dict probes plus at most four regex matches, however
+    many rules were loaded. As in gitignore, the last matching rule wins, `!`
+    re-includes, a trailing `/` restricts a rule to directories and a rule
+    containing `/` is anchored to the source root.
+    """
+
+    GLOB_CHARS = re.compile(r'[*?\[\\]')
+
+    def __init__(self, rules: Iterable[str]):
+        # Buckets map a key to the index of the last rule that set it;
+        # index 0 is for rules that apply to anything, 1 for directories only
+        self._names: Tuple[Dict[str, int], Dict[str, int]] = ({}, {})
+        self._extensions: Tuple[Dict[str, int], Dict[str, int]] = ({}, {})
+        self._negated: List[bool] = []
+        name_globs: Tuple[List[Tuple[int, str]], List[Tuple[int, str]]] = ([], [])
+        path_globs: Tuple[List[Tuple[int, str]], List[Tuple[int, str]]] = ([], [])
+
+        for line in rules:
+            rule = line.strip()
+            if not rule or rule.startswith('#'):
+                continue
+            negate = rule.startswith('!')
+            if negate:
+                rule = rule[1:]
+            elif rule.startswith('\\'):
+                rule = rule[1:]
+            dir_only = rule.endswith('/')
+            rule = rule.rstrip('/')
+            if not rule:
+                continue
+
+            index = len(self._negated)
+            self._negated.append(negate)
+
+            if '/' in rule:
+                path_globs[dir_only].append((index, rule.lstrip('/')))
+            elif not self.GLOB_CHARS.search(rule):
+                self._names[dir_only][rule] = index
+            elif rule.startswith('*.') and not self.GLOB_CHARS.search(rule[1:]) and '.' not in rule[2:]:
+                self._extensions[dir_only][rule[1:]] = index
+            else:
+                name_globs[dir_only].append((index, rule))
+
+        self._name_res = tuple(self._compile(globs) for globs in name_globs)
+        self._path_res = tuple(self._compile(globs) for globs in path_globs)
+
+    @staticmethod
+    def _compile(globs: List[Tuple[int, str]]) -> Optional[re.Pattern]:
+        """Fold globs into one regex whose first matching branch is the latest rule."""
+        if not globs:
+            return None
+        branches = [f"(?P<r{index}>{translate_glob(glob)})" for index, glob in reversed(globs)]
+        return re.compile('|'.join(branches))
+
+    @staticmethod
+    def _match_index(regex: Optional[re.Pattern], text: str) -> int:
+        if regex is None:
+            return -1
+        match = regex.fullmatch(text)
+        return int(match.lastgroup[1:]) if match else -1
+
+    @classmethod
+    def for_source(cls, source_dir: Path) -> "IgnoreMatcher":
+        """Build the matcher from the default rules plus the source's .installignore."""
+        rules = default_ignore_rules()
+        ignore_file = source_dir / IGNORE_FILE_NAME
+        if ignore_file.is_file():
+            rules += ignore_file.read_text(encoding='utf-8').splitlines()
+        return cls(rules)
+
+    def ignores(self, name: str, rel_path: str, is_dir: bool = False) -> bool:
+        """Check whether a file or directory should be skipped.
+
+        Args:
+            name: the entry's basename
+            rel_path: its '/'-separated path relative to the source root
+            is_dir: whether the entry is a directory
+        """
+        dot = name.rfind('.')
+        extension = name[dot:] if dot != -1 else ''
 
-def get_files_to_copy(source_dir: Path) -> List[Tuple[Path, Path]]:
+        best = -1
+        for kind in ((0, 1) if is_dir else (0,)):
+            best = max(
+                best,
+                self._names[kind].get(name, -1),
+                self._extensions[kind].get(extension, -1),
+                self._match_index(self._name_res[kind], name),
+                self._match_index(self._path_res[kind], rel_path),
+            )
+        return best != -1 and not self._negated[best]
+
+
+def iter_source_files(source_dir: Path, matcher: Optional[IgnoreMatcher] = None) -> Iterator[SourceFile]:
+    """Lazily walk the source tree, yielding installable files as they are found.
+
+    Ignored directories are pruned before they are opened, so nothing below
+    them is ever listed or matched. Each file's stat comes from its os.scandir
+    DirEntry, and all files of a directory are yielded before descending, so
+    memory is bounded by the tree's depth and fan-out rather than its size.
+    """
+    if matcher is None:
+        matcher = IgnoreMatcher.for_source(source_dir)
+
+    for rel_path, entry in walk_tree(
+        source_dir,
+        skip_dir=lambda name, rel_path: matcher.ignores(name, rel_path, True),
+        select_file=lambda name, rel_path: not matcher.ignores(name, rel_path)
+    ):
+        try:
+            st = entry.stat()
+        except OSError:
+            # Dangling symlink or vanished file; install_file reports it
+            st = None
+        yield SourceFile(Path(entry.path), Path(rel_path), st)
+
+
+def get_files_to_copy(source_dir: Path, matcher: Optional[IgnoreMatcher] = None) -> List[Tuple[Path, Path]]:
     """Get list of (source, relative_path) tuples for files to copy."""
-    files_to_copy = []
+    return [(f.path, f.relative_path) for f in iter_source_files(source_dir, matcher)]
 
-    for root, dirs, files in os.walk(source_dir):
-        root_path = Path(root)
 
-        # Filter directories in-place to skip unwanted ones
-        dirs[:] = [d for d in dirs if not should_skip_path(root_path / d)]
+def hash_file(path: Path) -> str:
+    """Return the SHA-256 hex digest of a file's contents."""
+    with open(path, 'rb') as f:
+        return hashlib.file_digest(f, 'sha256').hexdigest()
 
-        for file in files:
-            file_path = root_path / file
-            if not should_skip_path(file_path):
-                relative_path = file_path.relative_to(source_dir)
-                files_to_copy.append((file_path, relative_path))
 
-    return files_to_copy
+def load_manifest(target_dir: Path) -> Dict[str, dict]:
+    """Load the install manifest from the target directory, if present."""
+    manifest_path = target_dir / MANIFEST_NAME
+    try:
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except FileNotFoundError:
+        return {}
+    except (OSError, ValueError) as e:
+        console.print(f"[yellow]⚠ Ignoring unreadable manifest {manifest_path}: {e}[/yellow]")
+        return {}
 
+    if data.get("version") != MANIFEST_VERSION:
+        return {}
+    return data.get("files", {})
+
+
+def save_manifest(target_dir: Path, source_dir: Path, entries: Dict[str, dict]) -> None:
+    """Atomically write the install manifest into the target directory."""
+    manifest_path = target_dir / MANIFEST_NAME
+    tmp_path = manifest_path.with_name(manifest_path.name + ".tmp")
+    data = {
+        "version": MANIFEST_VERSION,
+        "source": str(source_dir),
+        "files": dict(sorted(entries.items())),
+    }
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, separators=(",", ":"))
+        f.write("\n")
+    os.replace(tmp_path, manifest_path)
 
-def check_conflicts(target_dir: Path, files_to_copy: List[Tuple[Path, Path]]) -> List[Path]:
-    """Check for existing files that would be overwritten."""
-    conflicts = []
 
-    for _, relative_path in files_to_copy:
+def stat_matches(entry: dict, st: os.stat_result) -> bool:
+    """Check whether a stat result matches a manifest entry."""
+    return entry["size"] == st.st_size and entry["mtime_ns"] == st.st_mtime_ns
+
+
+def target_stat_matches(entry: dict, st: os.stat_result) -> bool:
+    """Check whether an installed file's stat result matches its manifest entry.
+
+    Merged files differ from their source, so their entries record the
+    target's own size and mtime as well.
+    """
+    return (entry.get("target_size", entry["size"]) == st.st_size
+            and entry.get("target_mtime_ns", entry["mtime_ns"]) == st.st_mtime_ns)
+
+
+def target_unchanged(
+    entry: Optional[dict],
+    target_path: Path,
+    source_path: Optional[Path] = None
+) -> bool:
+    """Check whether an installed file is still exactly as the manifest recorded it.
+
+    Symlinked files are checked by link target. Hardlinked files also count as
+    unchanged while they still share an inode with their source, since in-place
+    edits of the source show through them.
+    """
+    if entry is None:
+        return False
+    try:
+        if entry.get("method") == "symlink":
+            return os.readlink(target_path) == entry["link"]
+        target_stat = target_path.lstat()
+        if target_stat_matches(entry, target_stat):
+            return True
+        if entry.get("method") == "hardlink" and source_path is not None:
+            return os.path.samestat(target_stat, source_path.stat())
+    except OSError:
+        return False
+    return False
+
+
+def iter_conflicts(
+    target_dir: Path,
+    files: Iterable[SourceFile],
+    manifest: Optional[Dict[str, dict]] = None
+) -> Iterator[Path]:
+    """Yield existing target files that would be overwritten.
+
+    Files recorded in the manifest and left untouched since the last install
+    are ours to replace and are not reported.
+    """
+    manifest = manifest or {}
+
+    for source_path, relative_path, _ in files:
         target_path = target_dir / relative_path
+        if target_unchanged(manifest.get(relative_path.as_posix()), target_path, source_path):
+            continue
         if target_path.exists():
-            conflicts.append(target_path)
+            yield target_path
+
+
+def is_empty_dir(path: Path) -> bool:
+    """Check whether a directory is missing or has no entries."""
+    try:
+        with os.scandir(path) as entries:
+            return next(entries, None) is None
+    except FileNotFoundError:
+        return True
+
+
+def prune_empty_parents(path: Path, stop_dir: Path) -> None:
+    """Remove directories left empty by deleting path, up to stop_dir."""
+    parent = path.parent
+    while parent != stop_dir:
+        try:
+            parent.rmdir()
+        except OSError:
+            break
+        parent = parent.parent
+
+
+def remove_stale_files(
+    target_dir: Path,
+    manifest: Dict[str, dict],
+    wanted: Iterable[str],
+    dry_run: bool = False,
+    backup: Optional["BackupStore"] = None,
+    events: Optional[EventStream] = None
+) -> int:
+    """Remove previously installed files that no longer exist in the source.
+
+    Files the user modified since the last install are left in place.
+    """
+    removed = 0
+    for key, entry in manifest.items():
+        if key in wanted:
+            continue
+        target_path = target_dir / key
+        if not target_unchanged(entry, target_path):
+            continue
+        if not dry_run:
+            if backup is not None:
+                backup.save(target_path, entry.get("sha256"))
+            target_path.unlink()
+            prune_empty_parents(target_path, target_dir)
+        if events is not None:
+            events.file("removed", key, dry_run=dry_run)
+        removed += 1
+    return removed
+
 
-    return conflicts
+def reflink_file(source_path: Path, target_path: Path) -> None:
+    """Create target as a copy-on-write clone of source (Linux FICLONE)."""
+    if fcntl is None or not sys.platform.startswith('linux'):
+        raise OSError(errno.EOPNOTSUPP, "reflinks are not supported on this platform")
+    with open(source_path, 'rb') as src, open(target_path, 'wb') as dst:
+        fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+    shutil.copystat(source_path, target_path)
+
+
+def place_file(source_path: Path, target_path: Path, strategy: str = "copy") -> str:
+    """Materialize source at target using strategy, falling back to a copy.
+
+    The file is created under a temporary name and renamed over the target, so
+    an existing hardlink or symlink is replaced rather than written through.
+
+    Returns:
+        str: the method actually used
+    """
+    if strategy == "hardlink":
+        # rename() is a no-op between two links to one inode, so stop early
+        try:
+            if os.path.samestat(target_path.lstat(), source_path.stat()):
+                return "hardlink"
+        except OSError:
+            pass
+
+    tmp_path = target_path.with_name(f".{target_path.name}.{os.getpid()}.tmp")
+    method = strategy
+    try:
+        try:
+            if strategy == "reflink":
+                reflink_file(source_path, tmp_path)
+            elif strategy == "hardlink":
+                # link() does not follow a symlinked source on Linux
+                os.link(os.path.realpath(source_path), tmp_path)
+            elif strategy == "symlink":
+                os.symlink(os.path.abspath(source_path), tmp_path)
+            else:
+                # copy2 already carries permissions and timestamps over
+                shutil.copy2(source_path, tmp_path)
+        except OSError:
+            # Cross-device links, unsupported filesystems, missing privileges
+            if strategy == "copy":
+                raise
+            tmp_path.unlink(missing_ok=True)
+            shutil.copy2(source_path, tmp_path)
+            method = "copy"
+        os.replace(tmp_path, target_path)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+    return method
+
+
+def _with_newline(lines: List[str]) -> List[str]:
+    # Conflict markers must start on a line of their own
+    if lines and not lines[-1].endswith("\n"):
+        return [*lines[:-1], lines[-1] + "\n"]
+    return lines
+
+
+def merge_lines(base: List[str], ours: List[str], theirs: List[str]) -> Tuple[List[str], List[str], int]:
+    """Three-way merge of two edited versions of a list of lines.
+
+    Works like diff3: stretches of base that neither side touched anchor the
+    merge, and between them a side's change is taken when the other side left
+    the stretch alone or made the identical change. Anything else is a
+    conflict, resolved in favour of ours in the merged result.
+
+    Returns:
+        tuple: (merged, merged_with_conflict_markers, conflict_count)
+    """
+    ours_blocks = SequenceMatcher(None, base, ours, autojunk=False).get_matching_blocks()
+    theirs_blocks = SequenceMatcher(None, base, theirs, autojunk=False).get_matching_blocks()
+
+    # Base ranges unchanged on both sides, with where they start in each side
+    regions = []
+    i = j = 0
+    while i < len(ours_blocks) and j < len(theirs_blocks):
+        ours_base, ours_start, ours_len = ours_blocks[i]
+        theirs_base, theirs_start, theirs_len = theirs_blocks[j]
+        start = max(ours_base, theirs_base)
+        end = min(ours_base + ours_len, theirs_base + theirs_len)
+        if start < end:
+            regions.append((start, end, ours_start + start - ours_base, theirs_start + start - theirs_base))
+        if ours_base + ours_len < theirs_base + theirs_len:
+            i += 1
+        else:
+            j += 1
+    regions.append((len(base), len(base), len(ours), len(theirs)))
+
+    merged: List[str] = []
+    marked: List[str] = []
+    conflicts = 0
+    base_pos = ours_pos = theirs_pos = 0
+    for start, end, ours_start, theirs_start in regions:
+        base_chunk = base[base_pos:start]
+        ours_chunk = ours[ours_pos:ours_start]
+        theirs_chunk = theirs[theirs_pos:theirs_start]
+        if ours_chunk == theirs_chunk or theirs_chunk == base_chunk:
+            merged += ours_chunk
+            marked += ours_chunk
+        elif ours_chunk == base_chunk:
+            merged += theirs_chunk
+            marked += theirs_chunk
+        else:
+            conflicts += 1
+            merged += ours_chunk
+            marked += [
+                "<<<<<<< yours\n", *_with_newline(ours_chunk),
+                "||||||| base\n", *_with_newline(base_chunk),
+                "=======\n", *_with_newline(theirs_chunk),
+                ">>>>>>> upstream\n",
+            ]
+        merged += base[start:end]
+        marked += base[start:end]
+        base_pos, ours_pos, theirs_pos = end, ours_start + end - start, theirs_start + end - start
+
+    return merged, marked, conflicts
+
+
+def _is_json_scalar(value) -> bool:
+    return value is None or isinstance(value, (str, int, float, bool))
+
+
+def merge_json(base, ours, theirs, path: str = "") -> Tuple[object, Dict[str, dict]]:
+    """Three-way merge of parsed JSON values.
+
+    Objects merge key by key and lists of scalars merge their additions and
+    removals, so independent edits to different settings combine cleanly.
+    Other values changed differently on both sides are conflicts that keep
+    ours. A key missing on one side is passed as _MISSING.
+
+    Returns:
+        tuple: (merged_value, conflicts keyed by dotted path)
+    """
+    if ours == theirs or theirs == base:
+        return ours, {}
+    if ours == base:
+        return theirs, {}
+
+    if isinstance(ours, dict) and isinstance(theirs, dict):
+        base_dict = base if isinstance(base, dict) else {}
+        merged, conflicts = {}, {}
+        for key in [*ours, *(key for key in theirs if key not in ours)]:
+            value, key_conflicts = merge_json(
+                base_dict.get(key, _MISSING),
+                ours.get(key, _MISSING),
+                theirs.get(key, _MISSING),
+                f"{path}.{key}" if path else key,
+            )
+            conflicts.update(key_conflicts)
+            if value is not _MISSING:
+                merged[key] = value
+        return merged, conflicts
+
+    if isinstance(ours, list) and isinstance(theirs, list) and all(map(_is_json_scalar, ours + theirs)):
+        base_list = base if isinstance(base, list) else []
+        dropped = [value for value in base_list if value not in theirs]
+        added = [value for value in theirs if value not in base_list and value not in ours]
+        return [value for value in ours if value not in dropped] + added, {}
+
+    sides = (("base", base), ("yours", ours), ("upstream", theirs))
+    return ours, {path or "(root)": {name: value for name, value in sides if value is not _MISSING}}
+
+
+class ThreeWayMerger:
+    """Merges upstream changes into installed files the user has edited.
+
+    The contents each file was installed with are kept in the BackupStore
+    object store under the SHA-256 the manifest already records, and serve as
+    the merge base on the next install. JSON files are merged structurally,
+    other text line by line. Where both sides changed the same part the
+    user's version wins, and the conflict is written next to the file with a
+    .merge-conflict suffix for review.
+
+    JSON files that exist but were never installed (the first install over an
+    existing ~/.claude) are merged without a base: settings only one side has
+    are combined, and settings both sides give different values keep the user's.
+    """
+
+    def __init__(self, store: "BackupStore"):
+        self.store = store
+
+    def remember(self, path: Path, digest: str) -> None:
+        """Keep the installed contents of path as the base for later merges."""
+        self.store.store_object(path, digest)
+
+    @staticmethod
+    def merge_contents(suffix: str, base: Optional[bytes], ours: bytes, theirs: bytes) -> Tuple[bytes, Optional[bytes], int]:
+        """Merge two edited versions of a file against their common base.
+
+        Without a base every differing part is a conflict. Raises
+        UnicodeDecodeError for files that are not UTF-8 text.
+
+        Returns:
+            tuple: (merged_contents, conflict_report or None, conflict_count)
+        """
+        base_text = base.decode('utf-8') if base is not None else None
+        ours_text = ours.decode('utf-8')
+        theirs_text = theirs.decode('utf-8')
+
+        if suffix == ".json":
+            try:
+                base_value = json.loads(base_text) if base_text is not None else _MISSING
+                ours_value = json.loads(ours_text)
+                theirs_value = json.loads(theirs_text)
+            except ValueError:
+                pass  # Not valid JSON on some side; merge it as text
+            else:
+                value, conflicts = merge_json(base_value, ours_value, theirs_value)
+                # Keep the user's formatting when nothing upstream got in
+                merged = ours if value == ours_value else (json.dumps(value, indent=2, ensure_ascii=False) + "\n").encode('utf-8')
+                report = (json.dumps(conflicts, indent=2, ensure_ascii=False) + "\n").encode('utf-8') if conflicts else None
+                return merged, report, len(conflicts)
+
+        merged_lines, marked_lines, conflicts = merge_lines(
+            (base_text or "").splitlines(keepends=True),
+            ours_text.splitlines(keepends=True),
+            theirs_text.splitlines(keepends=True),
+        )
+        report = "".join(marked_lines).encode('utf-8') if conflicts else None
+        return "".join(merged_lines).encode('utf-8'), report, conflicts
+
+    def merge(
+        self,
+        source_path: Path,
+        target_path: Path,
+        entry: Optional[dict],
+        source_stat: os.stat_result,
+        dry_run: bool = False,
+        backup: Optional["BackupStore"] = None
+    ) -> Optional[Tuple[str, dict]]:
+        """Bring upstream changes into a target file modified since the last install.
+
+        Without a manifest entry the target was not installed by us, and is
+        merged without a base. The entry returned records the merged target's
+        own stat, so that the next install can skip it while neither side
+        changes.
+
+        Returns:
+            None when the file should simply be installed (the merge comes
+            out as the new version itself), otherwise
+            (action, manifest_entry) where action is "kept" (only the user
+            changed it), "merged" or "conflict"
+        """
+        if entry is None:
+            source_sha = hash_file(source_path)
+        else:
+            source_sha = entry["sha256"] if stat_matches(entry, source_stat) else hash_file(source_path)
+            if source_sha == entry["sha256"]:
+                return "kept", {**entry, "mtime_ns": source_stat.st_mtime_ns}
+
+        ours = target_path.read_bytes()
+        theirs = source_path.read_bytes()
+        if ours == theirs:
+            return None
+
+        base = self.store.read_object(entry["sha256"]) if entry is not None else None
+        try:
+            merged, report, conflicts = self.merge_contents(target_path.suffix, base, ours, theirs)
+        except UnicodeDecodeError:
+            # Binary files cannot be merged; keep the user's copy
+            merged, report, conflicts = ours, theirs, 1
+
+        if conflicts:
+            action = "conflict"
+        elif merged == theirs:
+            return None
+        else:
+            action = "kept" if merged == ours else "merged"
+
+        if not dry_run:
+            if merged != ours:
+                if backup is not None:
+                    backup.save(target_path)
+                write_file_atomic(target_path, merged)
+            if report is not None:
+                conflict_path = target_path.with_name(target_path.name + MERGE_CONFLICT_SUFFIX)
+                if backup is not None:
+                    if os.path.lexists(conflict_path):
+                        backup.save(conflict_path)
+                    else:
+                        backup.note_created(conflict_path)
+                write_file_atomic(conflict_path, report)
+            self.remember(source_path, source_sha)
+
+        # The new upstream version is the base for the next merge
+        new_entry = {
+            "size": source_stat.st_size,
+            "mtime_ns": source_stat.st_mtime_ns,
+            "sha256": source_sha,
+            "strategy": entry.get("strategy", "copy") if entry is not None else "copy",
+            "method": "merge",
+            "base": True,
+        }
+        if not dry_run:
+            target_stat = target_path.lstat()
+            new_entry["target_size"] = target_stat.st_size
+            new_entry["target_mtime_ns"] = target_stat.st_mtime_ns
+        return action, new_entry
+
+
+def install_file(
+    source_path: Path,
+    target_path: Path,
+    entry: Optional[dict],
+    dry_run: bool = False,
+    strategy: str = "copy",
+    source_stat: Optional[os.stat_result] = None,
+    backup: Optional["BackupStore"] = None,
+    merger: Optional[ThreeWayMerger] = None
+) -> Tuple[str, dict]:
+    """Install a single file unless the manifest shows it is unchanged.
+
+    A file installed with a different strategy than requested is placed again.
+    Pass source_stat when the caller already has it to save a stat call, and
+    a BackupStore to record the file's previous state before it is replaced.
+    With a ThreeWayMerger, files edited since the last install, and JSON
+    files we never installed, are merged with the new version instead of
+    overwritten.
+
+    Returns:
+        tuple: (action, manifest_entry) where action is "skipped", "copied",
+        "replaced" (an existing file we did not install was overwritten) or
+        one of the ThreeWayMerger.merge() actions
+    """
+    if source_stat is None:
+        source_stat = source_path.stat()
+
+    unchanged = target_unchanged(entry, target_path, source_path)
+    if unchanged and entry.get("strategy", "copy") == strategy:
+        if merger is not None and not entry.get("base") and not dry_run:
+            # Installed before merge bases were kept; what is there now is the base
+            merger.remember(target_path, entry["sha256"])
+            entry = {**entry, "base": True}
+        if stat_matches(entry, source_stat):
+            return "skipped", entry
+        # Source was touched (e.g. by a checkout) but may hold the same bytes
+        method = entry.get("method", "copy")
+        if method in ("copy", "reflink", "merge") and hash_file(source_path) == entry["sha256"]:
+            # A merged target keeps its own mtime, recorded separately
+            if not dry_run and method != "merge":
+                os.utime(target_path, ns=(source_stat.st_atime_ns, source_stat.st_mtime_ns))
+            return "skipped", {**entry, "mtime_ns": source_stat.st_mtime_ns}
+
+    # Without a base, every text edit would conflict; JSON merges setting by setting
+    mergeable = entry is not None or target_path.suffix == ".json"
+    # A merged target holds the user's edits even while it is unchanged since
+    merged_before = unchanged and entry.get("method") == "merge"
+    matches_source = False
+    if merger is not None and mergeable and (merged_before or not unchanged) and os.path.lexists(target_path):
+        result = merger.merge(source_path, target_path, entry, source_stat, dry_run, backup)
+        if result is not None:
+            return result
+        matches_source = True
+
+    exists = unchanged or os.path.lexists(target_path)
+    action = "copied" if unchanged or not exists or matches_source else "replaced"
+    if backup is not None and not dry_run:
+        if exists:
+            # Only a plain installed copy is known to hold the recorded contents
+            known = unchanged and entry.get("method", "copy") not in ("symlink", "merge")
+            backup.save(target_path, entry["sha256"] if known else None)
+        else:
+            backup.note_created(target_path)
+    method = strategy if dry_run else place_file(source_path, target_path, strategy)
+
+    new_entry = {
+        "size": source_stat.st_size,
+        "mtime_ns": source_stat.st_mtime_ns,
+        "sha256": hash_file(source_path),
+        "strategy": strategy,
+        "method": method,
+    }
+    if method == "symlink":
+        new_entry["link"] = os.path.abspath(source_path)
+    if merger is not None and not dry_run:
+        merger.remember(source_path, new_entry["sha256"])
+        new_entry["base"] = True
+    return action, new_entry
 
 
 def copy_files(
     source_dir: Path,
     target_dir: Path,
-    files_to_copy: List[Tuple[Path, Path]],
-    dry_run: bool = False
-) -> Tuple[int, int]:
-    """Copy files from source to target directory."""
-    copied_files = 0
-    created_dirs = 0
-    created_dir_set: Set[Path] = set()
-
-    with Progress() as progress:
-        task = progress.add_task("[green]Copying files...", total=len(files_to_copy))
-
-        for source_path, relative_path in files_to_copy:
-            target_path = target_dir / relative_path
-
-            # Create parent directories if needed
-            parent_dir = target_path.parent
-            if parent_dir not in created_dir_set and not parent_dir.exists():
-                if not dry_run:
-                    parent_dir.mkdir(parents=True, exist_ok=True)
-                created_dir_set.add(parent_dir)
-                created_dirs += 1
-
-            # Copy file
-            if not dry_run:
-                shutil.copy2(source_path, target_path)
-                # Preserve permissions
-                shutil.copystat(source_path, target_path)
+    files: Iterable[SourceFile],
+    dry_run: bool = False,
+    manifest: Optional[Dict[str, dict]] = None,
+    jobs: Optional[int] = None,
+    strategy: str = "copy",
+    backup: Optional["BackupStore"] = None,
+    merger: Optional[ThreeWayMerger] = None,
+    events: Optional[EventStream] = None
+) -> CopyStats:
+    """Install a stream of source files into the target directory.
+
+    Files are consumed lazily, normally straight from iter_source_files(), and
+    installed with the given strategy on a pool of `jobs` worker threads.
+    Each target directory is created before any file in it is handed to a
+    worker. Files whose source and target both still match the manifest are
+    skipped after one stat call per side. Per-file errors are collected in
+    the returned stats instead of aborting the run. Dry runs go through the
+    same pipeline without writing. With a BackupStore, every file that is
+    overwritten or removed is backed up first; with a ThreeWayMerger, files
+    the user edited are merged rather than overwritten. With an EventStream,
+    every file that is not skipped is reported as it completes.
+    """
+    manifest = manifest or {}
+    stats = CopyStats()
+    jobs = jobs or default_jobs()
 
-            copied_files += 1
+    def with_parent_dirs(items: Iterable[SourceFile]) -> Iterator[SourceFile]:
+        # Files arrive grouped by directory, so one lookup per directory suffices
+        last_parent = None
+        for item in items:
+            parent_dir = target_dir / item.relative_path.parent
+            if parent_dir != last_parent:
+                if not parent_dir.exists():
+                    if not dry_run:
+                        parent_dir.mkdir(parents=True, exist_ok=True)
+                    stats.created_dirs += 1
+                last_parent = parent_dir
+            stats.scanned += 1
+            yield item
+
+    def copy_one(item: SourceFile) -> Tuple[str, dict]:
+        entry = manifest.get(item.relative_path.as_posix())
+        return install_file(item.path, target_dir / item.relative_path, entry, dry_run, strategy, item.stat, backup, merger)
+
+    with make_progress(console) as progress:
+        task = progress.add_task("[green]Copying files...", total=None)
+
+        for item, result, error in run_parallel(copy_one, with_parent_dirs(files), jobs, metrics=metrics,
+                                                phase="scan and copy",
+                                                label=lambda item: item.relative_path.as_posix()):
+            key = item.relative_path.as_posix()
+            if error is not None:
+                stats.errors.append((item.relative_path, str(error)))
+                # Keep the previous record so the file is retried next run
+                if key in manifest:
+                    stats.manifest[key] = manifest[key]
+                if events is not None:
+                    events.file("error", key, error=str(error))
+            else:
+                action, entry = result
+                stats.manifest[key] = entry
+                if events is not None and action != "skipped":
+                    events.file(action, key, method=entry.get("method"), dry_run=dry_run)
+                if action == "skipped":
+                    stats.skipped += 1
+                elif action == "kept":
+                    stats.kept += 1
+                elif action in ("merged", "conflict"):
+                    stats.merged += 1
+                    if action == "conflict":
+                        stats.conflicts.append(item.relative_path)
+                else:
+                    stats.copied += 1
+                    if action == "replaced":
+                        stats.replaced += 1
+                    if entry["method"] != strategy:
+                        stats.fallbacks += 1
             progress.update(task, advance=1)
 
-    return copied_files, created_dirs
+    # An empty scan means a broken source, not a request to delete everything
+    if stats.scanned:
+        stats.removed = remove_stale_files(target_dir, manifest, stats.manifest.keys(), dry_run, backup, events)
 
+    return stats
 
-def create_backup(target_dir: Path, dry_run: bool = False) -> Path:
-    """Create a backup of the existing target directory."""
-    if not target_dir.exists():
-        return None
-    
-    timestamp = time.strftime("%Y%m%d_%H%M%S")
-    backup_dir = target_dir.parent / f"{target_dir.name}_backup_{timestamp}"
-    
+
+def uninstall_files(target_dir: Path, manifest: Dict[str, dict], dry_run: bool = False,
+                    events: Optional[EventStream] = None) -> Tuple[int, List[Path]]:
+    """Remove every installed file recorded in the manifest.
+
+    Returns:
+        tuple: (removed_count, modified_files_left_in_place)
+    """
+    modified = [
+        target_dir / key
+        for key, entry in manifest.items()
+        if os.path.lexists(target_dir / key) and not target_unchanged(entry, target_dir / key)
+    ]
+    removed = remove_stale_files(target_dir, manifest, set(), dry_run, events=events)
     if not dry_run:
-        shutil.copytree(target_dir, backup_dir)
-        console.print(f"[green]✓ Created backup: {backup_dir}[/green]")
-    else:
-        console.print(f"[yellow]Would create backup: {backup_dir}[/yellow]")
-    
-    return backup_dir
+        (target_dir / MANIFEST_NAME).unlink(missing_ok=True)
+    return removed, modified
+
+
+class BackupStore:
+    """Content-addressed, deduplicated backups of the files an install changes.
+
+    Instead of copying the whole target directory, only files that are about
+    to be overwritten or removed are saved, so backup cost follows the size of
+    the change. Layout under `<target>_backups/`:
+
+        objects/ab/cdef...     file contents keyed by SHA-256, shared by all snapshots
+        snapshots/<id>.json    one run's touched paths; null marks a file the run created
+    """
+
+    def __init__(self, target_dir: Path, root: Optional[Path] = None):
+        self.target_dir = target_dir
+        # Where the files currently live; a staging directory during a transaction
+        self.work_dir = target_dir
+        self.root = root or target_dir.parent / f"{target_dir.name}_backups"
+        self.files: Dict[str, Optional[dict]] = {}
+        self._lock = threading.Lock()
+
+    def object_path(self, digest: str) -> Path:
+        """Path of the stored object for a content hash."""
+        return self.root / "objects" / digest[:2] / digest[2:]
+
+    def store_object(self, path: Path, digest: str) -> None:
+        """Copy a file into the object store unless its contents are already there."""
+        obj = self.object_path(digest)
+        if obj.exists():
+            return
+        obj.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = obj.with_name(f"{obj.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        shutil.copyfile(path, tmp_path)
+        os.replace(tmp_path, obj)
+
+    def read_object(self, digest: str) -> Optional[bytes]:
+        """Return stored contents for a content hash, or None if not stored."""
+        try:
+            return self.object_path(digest).read_bytes()
+        except FileNotFoundError:
+            return None
+
+    def _claim(self, key: str) -> bool:
+        # Only the first state seen in a run is the one worth restoring
+        with self._lock:
+            if key in self.files:
+                return False
+            self.files[key] = None
+            return True
+
+    def save(self, path: Path, sha256: Optional[str] = None) -> None:
+        """Back up the current state of a target file before it is changed.
+
+        Pass sha256 when the contents are already known to skip hashing; the
+        bytes are only copied if no earlier snapshot stored them.
+        """
+        key = path.relative_to(self.work_dir).as_posix()
+        if not self._claim(key):
+            return
+        try:
+            st = path.lstat()
+        except FileNotFoundError:
+            return
+        if stat.S_ISLNK(st.st_mode):
+            record = {"link": os.readlink(path)}
+        else:
+            digest = sha256 or hash_file(path)
+            self.store_object(path, digest)
+            record = {"sha256": digest, "mode": stat.S_IMODE(st.st_mode), "mtime_ns": st.st_mtime_ns}
+        with self._lock:
+            self.files[key] = record
+
+    def note_created(self, path: Path) -> None:
+        """Record that a file did not exist before this run."""
+        self._claim(path.relative_to(self.work_dir).as_posix())
+
+    def save_tree(self) -> None:
+        """Back up every file in the target, for operations that replace it wholesale."""
+        for root, _, files in os.walk(self.work_dir):
+            for file in files:
+                self.save(Path(root) / file)
+
+    def commit(self) -> Optional[str]:
+        """Write the snapshot for this run and return its backup id.
+
+        Returns None when nothing was backed up.
+        """
+        if not self.files:
+            return None
+        snapshots_dir = self.root / "snapshots"
+        snapshots_dir.mkdir(parents=True, exist_ok=True)
+        base_id = time.strftime("%Y%m%d_%H%M%S")
+        backup_id, suffix = base_id, 1
+        while (snapshots_dir / f"{backup_id}.json").exists():
+            backup_id = f"{base_id}_{suffix}"
+            suffix += 1
+
+        data = {
+            "version": BACKUP_SNAPSHOT_VERSION,
+            "id": backup_id,
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "target": str(self.target_dir),
+            "files": dict(sorted(self.files.items())),
+        }
+        tmp_path = snapshots_dir / f".{backup_id}.json.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=1)
+        os.replace(tmp_path, snapshots_dir / f"{backup_id}.json")
+        return backup_id
+
+    def list_snapshots(self) -> List[dict]:
+        """Return stored snapshots, oldest first."""
+        snapshots = []
+        for path in sorted((self.root / "snapshots").glob("*.json")):
+            with open(path, 'r', encoding='utf-8') as f:
+                snapshots.append(json.load(f))
+        return snapshots
+
+    def restore(self, backup_id: str, dry_run: bool = False) -> Tuple[int, int]:
+        """Put every file touched by a snapshot back into its recorded state.
+
+        The files being replaced are themselves saved in this store, so
+        committing afterwards makes the restore undoable.
+
+        Returns:
+            tuple: (files_restored, files_removed)
+        """
+        snapshot_path = self.root / "snapshots" / f"{backup_id}.json"
+        if not snapshot_path.is_file():
+            raise FileNotFoundError(f"No backup named {backup_id} in {self.root}")
+        with open(snapshot_path, 'r', encoding='utf-8') as f:
+            snapshot = json.load(f)
+
+        restored = removed = 0
+        for key, record in snapshot["files"].items():
+            path = self.target_dir / key
+            if record is None:
+                if os.path.lexists(path):
+                    if not dry_run:
+                        self.save(path)
+                        path.unlink()
+                        prune_empty_parents(path, self.target_dir)
+                    removed += 1
+                continue
+
+            if not dry_run:
+                if os.path.lexists(path):
+                    self.save(path)
+                else:
+                    self.note_created(path)
+                path.parent.mkdir(parents=True, exist_ok=True)
+                tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+                if "link" in record:
+                    os.symlink(record["link"], tmp_path)
+                else:
+                    shutil.copyfile(self.object_path(record["sha256"]), tmp_path)
+                    os.chmod(tmp_path, record["mode"])
+                    os.utime(tmp_path, ns=(record["mtime_ns"], record["mtime_ns"]))
+                os.replace(tmp_path, path)
+            restored += 1
+        return restored, removed
+
+
+def exchange_paths(first: Path, second: Path) -> bool:
+    """Atomically swap two paths with renameat2(RENAME_EXCHANGE).
+
+    Returns False when the platform, C library or filesystem lacks support.
+    """
+    if not sys.platform.startswith('linux'):
+        return False
+    try:
+        renameat2 = ctypes.CDLL(None, use_errno=True).renameat2
+    except (OSError, AttributeError):  # glibc older than 2.28
+        return False
+    renameat2.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_int, ctypes.c_char_p, ctypes.c_uint]
+    if renameat2(AT_FDCWD, os.fsencode(first), AT_FDCWD, os.fsencode(second), RENAME_EXCHANGE) == 0:
+        return True
+    err = ctypes.get_errno()
+    if err in (errno.ENOSYS, errno.EINVAL, errno.EOPNOTSUPP):
+        return False
+    raise OSError(err, os.strerror(err), str(first))
+
+
+def entry_state(path: Path) -> Optional[List[int]]:
+    """Identify the current version of a file by inode, size and mtime, or None if it is missing."""
+    try:
+        st = path.lstat()
+    except FileNotFoundError:
+        return None
+    return [st.st_ino, st.st_size, st.st_mtime_ns]
+
+
+def iter_tree_keys(root: Path) -> Iterator[str]:
+    """Yield the relative path of every file, symlink and symlinked directory under root."""
+    for dirpath, dirs, files in os.walk(root):
+        rel_root = Path(dirpath).relative_to(root)
+        for name in dirs:
+            # os.walk lists symlinked directories here but does not descend
+            if os.path.islink(os.path.join(dirpath, name)):
+                yield (rel_root / name).as_posix()
+        for name in files:
+            yield (rel_root / name).as_posix()
+
+
+def clone_tree(source: Path, destination: Path) -> Dict[str, List[Optional[List[int]]]]:
+    """Recreate a directory tree using hardlinks, copying where linking fails.
+
+    Writers must replace files by rename (as place_file does) so the original
+    tree never sees their changes.
+
+    Returns:
+        dict: relative path -> [source state, clone state] (see entry_state())
+        for every file cloned, to tell later which side changed it
+    """
+    states = {}
+    for root, dirs, files in os.walk(source):
+        rel_root = Path(root).relative_to(source)
+        dest_root = destination / rel_root
+        dest_root.mkdir(exist_ok=True)
+        shutil.copymode(root, dest_root)
+        links = [name for name in dirs if os.path.islink(os.path.join(root, name))]
+        for name in links + files:
+            source_path = Path(root) / name
+            state = entry_state(source_path)
+            if state is None:
+                continue  # Deleted while we walked
+            if source_path.is_symlink():
+                os.symlink(os.readlink(source_path), dest_root / name)
+            else:
+                try:
+                    os.link(source_path, dest_root / name)
+                except OSError:
+                    shutil.copy2(source_path, dest_root / name)
+            states[(rel_root / name).as_posix()] = [state, entry_state(dest_root / name)]
+    return states
+
+
+class InstallTransaction:
+    """Stage an install in a sibling directory and swap it in with one rename.
+
+    A journal next to the target records progress so that an interrupted run
+    is rolled back (staging incomplete) or forward (staging complete) by
+    recover() on the next start:
+
+        staging  -> the staging directory is being built; roll back
+        ready    -> staging is complete; finish the swap
+        swapped  -> the new tree is live; only cleanup remains
+
+    The swap uses renameat2(RENAME_EXCHANGE) where available, so the target
+    path is never missing; otherwise it falls back to two renames and the
+    journal covers the gap between them.
+
+    A cloned staging tree records the state of every live file when staging
+    starts. Files that running sessions create, change or delete in the live
+    tree meanwhile are carried over into the new tree after the swap, unless
+    the install changed the same file; changed_during_staging() reports those
+    so the caller can abort instead of losing the edit.
+    """
+
+    def __init__(self, target_dir: Path):
+        self.target_dir = target_dir
+        parent, name = target_dir.parent, target_dir.name.lstrip('.')
+        self.staging_dir = parent / f".{name}.install-staging"
+        self.old_dir = parent / f".{name}.install-old"
+        self.journal_path = parent / f".{name}.install-journal.json"
+        self.snapshot_path = parent / f".{name}.install-snapshot.json"
+        self.journal: Optional[dict] = None
+
+    @property
+    def active(self) -> bool:
+        return self.journal is not None
+
+    def _write_journal(self, **changes) -> None:
+        self.journal = {**(self.journal or {}), **changes}
+        tmp_path = self.journal_path.with_name(self.journal_path.name + ".tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.journal, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.journal_path)
+
+    def _has_marker(self, directory: Path) -> bool:
+        try:
+            return (directory / TRANSACTION_MARKER).read_text(encoding='utf-8') == self.journal["token"]
+        except OSError:
+            return False
+
+    def begin(self, clone: bool = True) -> Path:
+        """Create the staging directory and return it.
+
+        With clone, it starts as a hardlinked copy of the current target;
+        otherwise it starts empty and replaces the target wholesale.
+        """
+        token = f"{os.getpid()}-{time.time_ns()}"
+        self._write_journal(state="staging", token=token, carry_over=clone)
+        if os.path.lexists(self.staging_dir):
+            shutil.rmtree(self.staging_dir)
+        if clone and self.target_dir.is_dir():
+            states = clone_tree(self.target_dir, self.staging_dir)
+        else:
+            states = {}
+            self.staging_dir.mkdir(parents=True)
+        # Read back by _finish(), also when an interrupted run is rolled forward
+        with open(self.snapshot_path, 'w', encoding='utf-8') as f:
+            json.dump(states, f, separators=(",", ":"))
+            f.flush()
+            os.fsync(f.fileno())
+        (self.staging_dir / TRANSACTION_MARKER).write_text(token, encoding='utf-8')
+        return self.staging_dir
+
+    def changed_during_staging(self) -> List[str]:
+        """List the files both the install and the live tree changed since staging began.
+
+        Swapping now would lose the live tree's version of these files.
+        """
+        return [key for key, _, conflict in self._staging_changes(self.target_dir, self.staging_dir) if conflict]
+
+    def commit(self) -> None:
+        """Swap the staged tree into place and clean up."""
+        self._write_journal(state="ready")
+        self._swap()
+        self._finish()
+
+    def abort(self) -> None:
+        """Discard the staging directory, leaving the target untouched."""
+        if os.path.lexists(self.staging_dir) and self._has_marker(self.staging_dir):
+            shutil.rmtree(self.staging_dir)
+        self.snapshot_path.unlink(missing_ok=True)
+        self.journal_path.unlink(missing_ok=True)
+        self.journal = None
+
+    def recover(self) -> Optional[str]:
+        """Complete or undo a transaction left behind by an interrupted run.
+
+        Returns:
+            str: what was done, or None if there was nothing to recover
+        """
+        try:
+            with open(self.journal_path, 'r', encoding='utf-8') as f:
+                self.journal = json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError):
+            # A torn journal write means the swap had not started
+            self.journal = {"state": "staging", "token": None}
+
+        state = self.journal.get("state")
+        if state == "staging":
+            self.abort()
+            return "rolled back an incomplete install"
+        if state == "ready" and not self._has_marker(self.target_dir):
+            self._swap()
+        self._finish()
+        return "rolled forward a completed install"
+
+    def _swap(self) -> None:
+        if not os.path.lexists(self.target_dir):
+            # Fresh target, or the fallback stopped between its two renames
+            os.rename(self.staging_dir, self.target_dir)
+            self._write_journal(state="swapped", old=str(self.old_dir))
+        elif exchange_paths(self.staging_dir, self.target_dir):
+            self._write_journal(state="swapped", old=str(self.staging_dir))
+        else:
+            if os.path.lexists(self.old_dir):
+                shutil.rmtree(self.old_dir)
+            os.rename(self.target_dir, self.old_dir)
+            os.rename(self.staging_dir, self.target_dir)
+            self._write_journal(state="swapped", old=str(self.old_dir))
+
+    def _finish(self) -> None:
+        old = self.journal.get("old")
+        if old is None:
+            # Swapped, but interrupted before the journal said so
+            old = self.staging_dir if os.path.lexists(self.staging_dir) else self.old_dir
+        old = Path(old)
+        if old.is_dir() and not self._has_marker(old):
+            if self.journal.get("carry_over"):
+                self._carry_over(old)
+            shutil.rmtree(old)
+        (self.target_dir / TRANSACTION_MARKER).unlink(missing_ok=True)
+        self.snapshot_path.unlink(missing_ok=True)
+        self.journal_path.unlink(missing_ok=True)
+        self.journal = None
+
+    def _staging_changes(self, live: Path, staged: Path) -> Iterator[Tuple[str, Optional[List[int]], bool]]:
+        """Yield the files the live tree changed since staging began.
+
+        Yields:
+            tuple: (relative_path, live_state, conflict) where live_state is
+            None for a deleted file and conflict tells whether the staged tree
+            changed the file too
+        """
+        try:
+            with open(self.snapshot_path, 'r', encoding='utf-8') as f:
+                states = json.load(f)
+        except (OSError, ValueError):
+            return  # Nothing recorded, so nothing can be told apart
+        for key in set(states) | set(iter_tree_keys(live)):
+            live_before, staged_before = states.get(key, (None, None))
+            live_state = entry_state(live / key)
+            if live_state == live_before:
+                continue
+            staged_state = entry_state(staged / key)
+            if live_state == staged_state:
+                continue  # Edited in place through a shared hardlink, or deleted on both sides
+            yield key, live_state, staged_state != staged_before
+
+    def _carry_over(self, old: Path) -> None:
+        """Apply the changes made to the live tree during staging to the new tree.
+
+        A file the install changed too keeps the installed version, and the
+        live one is kept next to it with a merge conflict suffix.
+        """
+        for key, live_state, conflict in self._staging_changes(old, self.target_dir):
+            source_path = old / key
+            new_path = self.target_dir / key
+            if live_state is None:
+                if not conflict:
+                    new_path.unlink(missing_ok=True)
+                continue
+            if conflict:
+                new_path = new_path.with_name(new_path.name + MERGE_CONFLICT_SUFFIX)
+            new_path.parent.mkdir(parents=True, exist_ok=True)
+            os.replace(source_path, new_path)
 
 
 def merge_directories(source_dir: Path, target_dir: Path, dry_run: bool = False) -> bool:
@@ -212,7 +1440,7 @@ def merge_directories(source_dir: Path, target_dir: Path, dry_run: bool = False)
             console.print(f"  [yellow]•[/yellow] {conflict}")
         if len(conflicts) > 5:
             console.print(f"  [yellow]... and {len(conflicts) - 5} more[/yellow]")
-        console.print("[blue]These files will be overwritten with new versions[/blue]")
+        console.print("[blue]Files you edited since the last install are merged with the new versions; others are overwritten[/blue]")
     
     return True
 
@@ -220,38 +1448,122 @@ def merge_directories(source_dir: Path, target_dir: Path, dry_run: bool = False)
 def display_summary(
     source_dir: Path,
     target_dir: Path,
-    files_to_copy: List[Tuple[Path, Path]],
-    copied_files: int,
-    created_dirs: int,
+    stats: CopyStats,
     dry_run: bool,
-    backup_created: Path = None,
-    is_global: bool = False
+    backup_created: Optional[str] = None,
+    is_global: bool = False,
+    strategy: str = "copy"
 ):
     """Display operation summary."""
+    from rich.table import Table
+
     table = Table(title="Installation Summary")
     table.add_column("Item", style="cyan")
     table.add_column("Count", style="green")
 
     table.add_row("Source Directory", str(source_dir))
     table.add_row("Target Directory", str(target_dir))
-    table.add_row("Files to Copy", str(len(files_to_copy)))
-    table.add_row("Directories Created", str(created_dirs))
+    table.add_row("Files Scanned", str(stats.scanned))
+    table.add_row("Directories Created", str(stats.created_dirs))
     
     if is_global:
         table.add_row("Installation Type", "[blue]Global (~/.claude/)[/blue]")
     
     if backup_created:
-        table.add_row("Backup Created", str(backup_created))
+        table.add_row("Backup Created", backup_created)
+
+    table.add_row("Install Strategy", strategy)
+    if stats.fallbacks:
+        table.add_row("Fell Back to Copy", str(stats.fallbacks))
 
     if dry_run:
+        table.add_row("Files That Would Be Copied", str(stats.copied))
+        if stats.merged:
+            table.add_row("Files That Would Be Merged", str(stats.merged))
+        table.add_row("Files Unchanged", str(stats.skipped))
+        table.add_row("Files That Would Be Removed", str(stats.removed))
         table.add_row("Mode", "[yellow]DRY RUN - No changes made[/yellow]")
     else:
-        table.add_row("Files Copied", str(copied_files))
-        table.add_row("Status", "[green]✓ Installation Complete[/green]")
+        table.add_row("Files Copied", str(stats.copied))
+        if stats.replaced:
+            table.add_row("Existing Files Overwritten", str(stats.replaced))
+        if stats.merged:
+            table.add_row("Files Merged", str(stats.merged))
+        if stats.kept:
+            table.add_row("Your Edits Kept", str(stats.kept))
+        if stats.conflicts:
+            table.add_row("Merge Conflicts", f"[yellow]{len(stats.conflicts)}[/yellow]")
+        table.add_row("Files Skipped (unchanged)", str(stats.skipped))
+        table.add_row("Files Removed", str(stats.removed))
+        if stats.errors:
+            table.add_row("Errors", f"[red]{len(stats.errors)}[/red]")
+            table.add_row("Status", "[red]✗ Installation Incomplete[/red]")
+        else:
+            table.add_row("Status", "[green]✓ Installation Complete[/green]")
 
     console.print(table)
 
 
+def summary_dict(
+    target_dir: Path,
+    stats: CopyStats,
+    dry_run: bool,
+    backup_created: Optional[str] = None,
+    strategy: str = "copy",
+    details: bool = True
+) -> dict:
+    """The operation summary as --json prints it.
+
+    Without details, the conflicts and errors lists are left out, as the
+    --ndjson stream has already reported each of those files.
+    """
+    summary = {
+        "target": str(target_dir),
+        "dry_run": dry_run,
+        "strategy": strategy,
+        "scanned": stats.scanned,
+        "copied": stats.copied,
+        "replaced": stats.replaced,
+        "merged": stats.merged,
+        "kept": stats.kept,
+        "skipped": stats.skipped,
+        "removed": stats.removed,
+        "fallbacks": stats.fallbacks,
+        "backup": backup_created,
+    }
+    if details:
+        summary["conflicts"] = [str(path) for path in stats.conflicts]
+        summary["errors"] = [{"file": str(path), "error": str(error)} for path, error in stats.errors]
+    else:
+        summary["conflicts"] = len(stats.conflicts)
+        summary["errors"] = len(stats.errors)
+    return summary
+
+
+def print_summary(summary: dict, events: Optional[EventStream] = None) -> None:
+    """Print a --json summary, or write it as the final record of an --ndjson stream."""
+    if events is None:
+        print(json.dumps(summary))
+    else:
+        events.summary(**summary)
+
+
+def report_error(message: str, args: argparse.Namespace, events: Optional[EventStream] = None,
+                 exit_status: int = 1, **fields) -> int:
+    """Report a failure that ends the run, and return the exit status to end it with.
+
+    The message goes to the console (stderr when quiet), and a --json run
+    also prints it as an error object, with the exit status and any fields
+    given, so that callers always have JSON to parse.
+    """
+    console.error(f"[red]✗ {message}[/red]")
+    if events is not None:
+        events.error(message)
+    elif args.json:
+        print(json.dumps({"error": message, **fields, "exit_status": exit_status}, default=str))
+    return exit_status
+
+
 def main() -> int:
     """Main execution function."""
     parser = argparse.ArgumentParser(
@@ -262,9 +1574,15 @@ Examples:
   uv run scripts/install.py /path/to/project
   uv run scripts/install.py --dry-run /path/to/project
   uv run scripts/install.py --force /path/to/project
+  uv run scripts/install.py --full /path/to/project
+  uv run scripts/install.py --jobs 8 /path/to/project
+  uv run scripts/install.py --strategy reflink /path/to/project
+  uv run scripts/install.py --uninstall /path/to/project
   uv run scripts/install.py --global
   uv run scripts/install.py --global --dry-run
   uv run scripts/install.py --global --force
+  uv run scripts/install.py --global --list-backups
+  uv run scripts/install.py --global --restore 20250820_101500
   uv run scripts/install.py --help
         """
     )
@@ -288,17 +1606,86 @@ Examples:
         "--global",
         action="store_true",
         dest="global_install",
-        help="Install scaffolding into global Claude directory (~/.claude/). Creates backup of existing directory and merges configurations unless --force is used"
+        help="Install scaffolding into global Claude directory (~/.claude/). Backs up the files it changes, merges configurations unless --force is used, and swaps the result in atomically"
+    )
+    parser.add_argument(
+        "--full",
+        action="store_true",
+        help=f"Ignore the install manifest ({MANIFEST_NAME}) and copy every file"
+    )
+    parser.add_argument(
+        "--jobs",
+        "-j",
+        type=int,
+        default=None,
+        metavar="N",
+        help=f"Number of concurrent copy workers (default: {default_jobs()}, 1 copies sequentially)"
+    )
+    parser.add_argument(
+        "--strategy",
+        choices=STRATEGIES,
+        default="copy",
+        help="How to place files: copy bytes, reflink (copy-on-write clone), hardlink or symlink to the source. "
+             "Falls back to copy when the filesystem refuses. Hardlinked files share edits with the source"
     )
+    parser.add_argument(
+        "--uninstall",
+        action="store_true",
+        help="Remove files recorded in the install manifest, leaving files you modified in place"
+    )
+    parser.add_argument(
+        "--restore",
+        metavar="BACKUP_ID",
+        help="Restore the files changed by the install that created this backup"
+    )
+    parser.add_argument(
+        "--list-backups",
+        action="store_true",
+        help="List the backups stored for the target directory"
+    )
+    parser.add_argument(
+        "--metrics",
+        action="store_true",
+        help="Show phase timings and file counts when done"
+    )
+    parser.add_argument(
+        "--quiet",
+        "-q",
+        action="store_true",
+        help="Print only failures, on stderr; the exit status tells the result"
+    )
+    parser.add_argument(
+        "--json",
+        action="store_true",
+        help="Print a JSON summary instead of tables and messages"
+    )
+    parser.add_argument(
+        "--ndjson",
+        action="store_true",
+        help="Stream one JSON line per file copied, merged, removed or failed, then a summary line"
+    )
+    add_profile_arguments(parser)
 
     # Parse arguments
     args = parser.parse_args()
 
+    if args.jobs is not None and args.jobs < 1:
+        parser.error("--jobs must be at least 1")
+    if args.profile_top < 1:
+        parser.error("--profile-top must be at least 1")
+    if args.json and args.ndjson:
+        parser.error("--json and --ndjson cannot be combined")
+
     # Show help if no target path provided and not global install
     if not args.target_path and not args.global_install:
         parser.print_help()
         return 0
 
+    events = EventStream("install") if args.ndjson else None
+    console.quiet = args.quiet or args.json or args.ndjson
+    transaction = None
+    profile = ProfileSession.from_args(metrics, args, "install.py")
+    profile.start()
     try:
         # Determine source directory (directory containing this script)
         script_dir = Path(__file__).parent
@@ -306,12 +1693,10 @@ Examples:
 
         # Validate source directory
         if not source_dir.exists():
-            console.print(f"[red]✗ Source directory not found: {source_dir}[/red]")
-            return 1
+            return report_error(f"Source directory not found: {source_dir}", args, events)
 
         if not (source_dir / ".claude").exists():
-            console.print(f"[red]✗ Invalid source directory: .claude directory not found in {source_dir}[/red]")
-            return 1
+            return report_error(f"Invalid source directory: .claude directory not found in {source_dir}", args, events)
 
         # Process target path
         if args.global_install:
@@ -320,63 +1705,231 @@ Examples:
             target_dir = Path(args.target_path).resolve()
 
         install_type = "Global (~/.claude/)" if args.global_install else "Local"
-        console.print(Panel.fit(
-            f"[bold]Claude Code Development Team Scaffolding Installer[/bold]\n\n"
-            f"Source: [cyan]{source_dir}[/cyan]\n"
-            f"Target: [cyan]{target_dir}[/cyan]\n"
-            f"Type: [blue]{install_type}[/blue]\n"
-            f"Mode: [yellow]{'DRY RUN' if args.dry_run else 'INSTALL'}[/yellow]"
-        ))
-
-        # Handle global installation backup and merge logic
-        backup_created = None
+        if args.dry_run:
+            mode = "DRY RUN"
+        elif args.list_backups:
+            mode = "LIST BACKUPS"
+        elif args.restore:
+            mode = "RESTORE"
+        elif args.uninstall:
+            mode = "UNINSTALL"
+        else:
+            mode = "INSTALL"
+        if not console.quiet:
+            from rich.panel import Panel
+
+            console.print(Panel.fit(
+                f"[bold]Claude Code Development Team Scaffolding Installer[/bold]\n\n"
+                f"Source: [cyan]{source_dir}[/cyan]\n"
+                f"Target: [cyan]{target_dir}[/cyan]\n"
+                f"Type: [blue]{install_type}[/blue]\n"
+                f"Strategy: [blue]{args.strategy}[/blue]\n"
+                f"Mode: [yellow]{mode}[/yellow]"
+            ))
+
+        backup_store = BackupStore(target_dir)
+
+        # Finish or undo an install that was interrupted last time
+        transaction = InstallTransaction(target_dir)
+        if args.dry_run:
+            if transaction.journal_path.exists():
+                console.print(f"[yellow]⚠ Found an interrupted install of {target_dir}; run without --dry-run to recover it[/yellow]")
+        else:
+            recovered = transaction.recover()
+            if recovered:
+                console.print(f"[yellow]⚠ Found an interrupted install of {target_dir} and {recovered}[/yellow]")
+
+        if args.list_backups:
+            snapshots = backup_store.list_snapshots()
+            if args.json or events is not None:
+                print_summary({"backups": [
+                    {"id": snapshot["id"], "created": snapshot["created"], "files": len(snapshot["files"])}
+                    for snapshot in snapshots
+                ]}, events)
+                return 0
+            if not snapshots:
+                console.print(f"[yellow]No backups found in {backup_store.root}[/yellow]")
+                return 0
+            from rich.table import Table
+
+            table = Table(title=f"Backups in {backup_store.root}")
+            table.add_column("Backup ID", style="cyan")
+            table.add_column("Created", style="green")
+            table.add_column("Files", justify="right")
+            for snapshot in snapshots:
+                table.add_row(snapshot["id"], snapshot["created"], str(len(snapshot["files"])))
+            console.print(table)
+            return 0
+
+        if args.restore:
+            restored, removed = backup_store.restore(args.restore, args.dry_run)
+            if args.dry_run:
+                if args.json or events is not None:
+                    print_summary({"dry_run": True, "restored": restored, "removed": removed}, events)
+                console.print(f"[yellow]Would restore {restored} files and remove {removed} files[/yellow]")
+                return 0
+            undo_id = backup_store.commit()
+            if args.json or events is not None:
+                print_summary({"dry_run": False, "restored": restored, "removed": removed, "undo": undo_id}, events)
+            console.print(f"[green]✓ Restored {restored} files and removed {removed} files from backup {args.restore}[/green]")
+            if undo_id:
+                console.print(f"[blue]Undo with: --restore {undo_id}[/blue]")
+            return 0
+
+        if args.uninstall:
+            manifest = load_manifest(target_dir)
+            if not manifest:
+                return report_error(f"No install manifest found in {target_dir}, nothing to uninstall", args, events)
+            removed, modified = uninstall_files(target_dir, manifest, args.dry_run, events)
+            if args.json or events is not None:
+                print_summary({"dry_run": args.dry_run, "removed": removed,
+                               "modified": [str(path) for path in modified]}, events)
+            verb = "Would remove" if args.dry_run else "Removed"
+            console.print(f"[green]✓ {verb} {removed} installed files from {target_dir}[/green]")
+            if modified:
+                console.print(f"[yellow]⚠ Left {len(modified)} modified files in place:[/yellow]")
+                for path in modified[:10]:  # Show first 10 modified files
+                    console.print(f"  [yellow]•[/yellow] {path}")
+                if len(modified) > 10:
+                    console.print(f"  [yellow]... and {len(modified) - 10} more[/yellow]")
+            return 0
+
+        # Global installs back up exactly the files they overwrite or remove
+        backup = backup_store if args.global_install and not args.dry_run else None
         if args.global_install and target_dir.exists():
             if args.force:
                 # With --force, replace entire directory after backup
-                backup_created = create_backup(target_dir, args.dry_run)
                 if not args.dry_run:
-                    shutil.rmtree(target_dir)
-                    console.print(f"[yellow]Removed existing {target_dir} (--force enabled)[/yellow]")
+                    backup_store.save_tree()
+                    console.print(f"[yellow]Replacing existing {target_dir} (--force enabled)[/yellow]")
             else:
-                # Without --force, create backup and merge
-                backup_created = create_backup(target_dir, args.dry_run)
+                # Without --force, merge into the existing directory
                 merge_directories(source_dir, target_dir, args.dry_run)
 
+        # Global installs are built in a staging directory and swapped in at the end
+        work_dir = target_dir
+        if args.global_install and not args.dry_run:
+            work_dir = transaction.begin(clone=not args.force)
+            backup_store.work_dir = work_dir
+
         # Create target directory if it doesn't exist
-        if not target_dir.exists():
+        if not work_dir.exists():
             if not args.dry_run:
-                target_dir.mkdir(parents=True, exist_ok=True)
+                work_dir.mkdir(parents=True, exist_ok=True)
             console.print(f"[green]✓ Target directory will be created: {target_dir}[/green]")
 
-        # Get files to copy
-        console.print("[blue]Scanning source directory...[/blue]")
-        files_to_copy = get_files_to_copy(source_dir)
+        matcher = IgnoreMatcher.for_source(source_dir)
 
-        if not files_to_copy:
-            console.print("[yellow]⚠ No files found to copy[/yellow]")
-            return 0
+        # ~/.claude is the global counterpart of the project's .claude directory
+        scan_dir = source_dir / ".claude" if args.global_install else source_dir
+
+        # Files edited in ~/.claude are merged, unless --force replaces everything
+        merger = ThreeWayMerger(backup_store) if args.global_install and not args.force else None
 
-        # Check for conflicts (skip conflict check for global install without force)
-        conflicts = []
-        if not args.global_install or args.force:
-            conflicts = check_conflicts(target_dir, files_to_copy)
-            if conflicts and not args.force:
-                console.print(f"[red]✗ Found {len(conflicts)} existing files that would be overwritten:[/red]")
-                for conflict in conflicts[:10]:  # Show first 10 conflicts
-                    console.print(f"  [red]•[/red] {conflict}")
+        # Load the manifest of the previous install, if any
+        manifest = {} if args.full else load_manifest(work_dir)
+        if manifest:
+            console.print(f"[blue]Found install manifest with {len(manifest)} files, copying only changes[/blue]")
+
+        # Conflicts only block local installs without --force. That check has
+        # to finish before the first write, so it streams over the source once
+        # up front; a fresh target cannot conflict and skips it.
+        if not args.global_install and not args.force and not is_empty_dir(target_dir):
+            console.print("[blue]Checking for conflicts...[/blue]")
+            conflicts: List[Path] = []
+            with metrics.timer("conflict check"):
+                for conflict in iter_conflicts(target_dir, iter_source_files(source_dir, matcher), manifest):
+                    if not conflicts:
+                        console.error("[red]✗ Found existing files that would be overwritten:[/red]")
+                    if len(conflicts) < 10:  # Show first 10 conflicts
+                        console.error(f"  [red]•[/red] {conflict}")
+                    if events is not None:
+                        events.file("exists", conflict)
+                    conflicts.append(conflict)
+            if conflicts:
                 if len(conflicts) > 10:
-                    console.print(f"  [red]... and {len(conflicts) - 10} more[/red]")
-                console.print("\n[yellow]Use --force to overwrite existing files[/yellow]")
+                    console.error(f"  [red]... and {len(conflicts) - 10} more[/red]")
+                console.error(f"\n[yellow]Use --force to overwrite {len(conflicts)} existing files[/yellow]")
+                message = f"{len(conflicts)} existing files would be overwritten; use --force to overwrite them"
+                if events is not None:
+                    events.error(message)
+                elif args.json:
+                    print(json.dumps({"target": str(target_dir), "dry_run": args.dry_run, "error": message,
+                                      "conflicts": [str(path) for path in conflicts], "exit_status": 1}))
                 return 1
 
-        if conflicts and args.force:
-            console.print(f"[yellow]⚠ Will overwrite {len(conflicts)} existing files (--force enabled)[/yellow]")
+        # Scan and copy in a single streaming pass
+        with metrics.timer("scan and copy"):
+            stats = copy_files(scan_dir, work_dir, iter_source_files(scan_dir, matcher),
+                               args.dry_run, manifest, args.jobs, args.strategy, backup, merger, events)
+        metrics.count("files scanned", stats.scanned)
+        metrics.count("files copied", stats.copied)
+        metrics.count("files skipped", stats.skipped)
 
-        # Perform copy operation
-        copied_files, created_dirs = copy_files(source_dir, target_dir, files_to_copy, args.dry_run)
+        if not stats.scanned:
+            transaction.abort()
+            if args.json or events is not None:
+                print_summary({**summary_dict(target_dir, stats, args.dry_run, strategy=args.strategy),
+                               "exit_status": 0}, events)
+            console.print("[yellow]⚠ No files found to copy[/yellow]")
+            return 0
+
+        if stats.errors and transaction.active:
+            # Never swap in a partially built tree
+            transaction.abort()
+            console.error(f"[red]✗ Rolled back: {target_dir} was left unchanged[/red]")
+        elif transaction.active:
+            # Swapping would drop edits a running session made to files we also changed
+            changed = transaction.changed_during_staging()
+            if changed:
+                transaction.abort()
+                console.error("[red]✗ Files changed in the target while the install ran:[/red]")
+                for key in changed[:10]:  # Show first 10 changed files
+                    console.error(f"  [red]•[/red] {target_dir / key}")
+                if len(changed) > 10:
+                    console.error(f"  [red]... and {len(changed) - 10} more[/red]")
+                return report_error(f"Rolled back: {target_dir} was left unchanged; run the install again",
+                                    args, events, target=str(target_dir), changed=sorted(changed))
+
+        backup_created = None
+        if not args.dry_run and not (stats.errors and args.global_install):
+            with metrics.timer("backup, manifest and commit"):
+                if backup is not None and backup.files:
+                    backup.save(work_dir / MANIFEST_NAME)
+                    backup_created = backup.commit()
+                    if backup_created:
+                        console.print(f"[green]✓ Backed up {len(backup.files)} changed files as {backup_created}[/green]")
+                save_manifest(work_dir, scan_dir, stats.manifest)
+                if transaction.active:
+                    transaction.commit()
 
         # Display summary
-        display_summary(source_dir, target_dir, files_to_copy, copied_files, created_dirs, args.dry_run, backup_created, args.global_install)
+        if args.json or events is not None:
+            summary = summary_dict(target_dir, stats, args.dry_run, backup_created, args.strategy,
+                                   details=events is None)
+            if args.metrics:
+                summary["metrics"] = metrics.as_dict()
+            summary["exit_status"] = 1 if stats.errors else 0
+            print_summary(summary, events)
+        elif not console.quiet:
+            display_summary(scan_dir, target_dir, stats, args.dry_run, backup_created, args.global_install,
+                            args.strategy)
+
+        if stats.conflicts:
+            verb = "would conflict" if args.dry_run else f"kept your version; see the {MERGE_CONFLICT_SUFFIX} files"
+            console.print(f"\n[yellow]⚠ Merge conflicts in {len(stats.conflicts)} files ({verb}):[/yellow]")
+            for relative_path in stats.conflicts[:10]:  # Show first 10 conflicts
+                console.print(f"  [yellow]•[/yellow] {target_dir / relative_path}")
+            if len(stats.conflicts) > 10:
+                console.print(f"  [yellow]... and {len(stats.conflicts) - 10} more[/yellow]")
+
+        if stats.errors:
+            console.error(f"\n[red]✗ Failed to copy {len(stats.errors)} files:[/red]")
+            for relative_path, error in stats.errors[:10]:  # Show first 10 errors
+                console.error(f"  [red]•[/red] {relative_path}: {error}")
+            if len(stats.errors) > 10:
+                console.error(f"  [red]... and {len(stats.errors) - 10} more[/red]")
+            return 1
 
         if not args.dry_run:
             console.print(f"\n[green]✓ Successfully installed Claude Code scaffolding to {target_dir}[/green]")
@@ -386,7 +1939,7 @@ Examples:
                 console.print("2. Review and customize ~/.claude/agents/ configurations if needed")
                 console.print("3. The configuration will apply to all Claude Code sessions")
                 if backup_created:
-                    console.print(f"4. Your previous configuration is backed up at: {backup_created}")
+                    console.print(f"4. Undo this install with: uv run scripts/install.py --global --restore {backup_created}")
             else:
                 console.print("1. Navigate to your project directory")
                 console.print("2. Review and customize .claude/agents/ configurations")
@@ -397,16 +1950,24 @@ Examples:
 
     except KeyboardInterrupt:
         console.print("\n[yellow]Installation cancelled by user[/yellow]")
+        if events is not None:
+            events.error("Installation cancelled by user")
+        elif args.json:
+            print(json.dumps({"error": "Installation cancelled by user", "exit_status": 130}))
         return 130
     except PermissionError as e:
-        console.print(f"[red]✗ Permission denied: {e}[/red]")
-        return 1
+        return report_error(f"Permission denied: {e}", args, events)
     except OSError as e:
-        console.print(f"[red]✗ File system error: {e}[/red]")
-        return 1
+        return report_error(f"File system error: {e}", args, events)
     except Exception as e:
-        console.print(f"[red]✗ Unexpected error: {e}[/red]")
-        return 1
+        return report_error(f"Unexpected error: {e}", args, events)
+    finally:
+        # A half-built staging directory is never worth keeping
+        if transaction is not None and transaction.active and transaction.journal.get("state") == "staging":
+            transaction.abort()
+        if args.metrics and not console.quiet:
+            console.print(metrics.table("Install Metrics"))
+        profile.finish(console)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,312 @@
+#!/usr/bin/env -S uv run
+# /// script
+# requires-python = ">=3.11"
+# dependencies = [
+#     "rich>=13.0",
+# ]
+# ///
+"""
+Persistent reference index for agent names and MCP tool identifiers.
+
+Keeps an SQLite inverted index (.reference-index.sqlite in the project root)
+of every hyphenated name such as `creative-copywriter` and every `mcp__*`
+tool identifier, with the file, line and byte offset of each occurrence.
+Refreshing it stats the tree and re-reads only files whose size or
+modification time changed, so the maintenance scripts can look up which
+files mention a name instead of reading the whole repository:
+
+    rename_agents.py --index
+    replace_firecrawl.py --index
+
+Usage:
+    # Refresh the index and show where names occur
+    uv run scripts/reference_index.py creative-copywriter mcp__firecrawl__
+
+    # Rebuild from scratch
+    uv run scripts/reference_index.py --rebuild
+
+    # Occurrences as JSON, for other tools
+    uv run scripts/reference_index.py --json creative-copywriter
+"""
+
+import argparse
+import json
+import os
+import re
+import sqlite3
+import sys
+import time
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from scan_core import LazyConsole, walk_tree
+
+console = LazyConsole()
+
+INDEX_FILE_NAME = ".reference-index.sqlite"
+
+# Bumped whenever the schema or tokenizer changes; older indexes are rebuilt
+INDEX_VERSION = 1
+
+# Files that can reference agents or tools, as searched by rename_agents.py
+INDEXED_EXTENSIONS = {'.md', '.txt', '.json', '.yaml', '.yml', '.toml', '.py', '.js', '.ts'}
+
+# Directories never worth indexing
+SKIPPED_DIRS = {'.git', '.venv', 'node_modules', '__pycache__', 'target', 'build', 'dist'}
+
+# Runs of word characters and hyphens with an inner hyphen (agent names) or
+# an mcp__ prefix (tool identifiers). Anything a rename or replacement
+# matches lies inside one such token.
+TOKEN_PATTERN = re.compile(rb'[\w-]*?(?:\w-\w|mcp__)[\w-]*')
+
+# Names that are guaranteed to lie inside a single token
+LOOKUP_PATTERN = re.compile(r'[\w-]*(?:\w-\w|mcp__)[\w-]*', re.ASCII)
+
+SCHEMA = """
+CREATE TABLE files (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL UNIQUE,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL
+);
+CREATE TABLE tokens (
+    id INTEGER PRIMARY KEY,
+    token TEXT NOT NULL UNIQUE
+);
+CREATE TABLE postings (
+    token_id INTEGER NOT NULL REFERENCES tokens(id),
+    file_id INTEGER NOT NULL REFERENCES files(id),
+    line INTEGER NOT NULL,
+    offset INTEGER NOT NULL
+);
+CREATE INDEX postings_token ON postings(token_id);
+CREATE INDEX postings_file ON postings(file_id);
+"""
+
+
+def tokenize(data: bytes) -> Iterator[Tuple[str, int, int]]:
+    """Yield (token, line, byte_offset) for every indexed token in data."""
+    line, line_pos = 1, 0
+    for match in TOKEN_PATTERN.finditer(data):
+        start = match.start()
+        line += data.count(b'\n', line_pos, start)
+        line_pos = start
+        yield match.group().decode('ascii', 'replace'), line, start
+
+
+def iter_indexable_files(root: Path) -> Iterator[Tuple[str, os.stat_result]]:
+    """Yield (relative_posix_path, stat) for every file the index covers."""
+    for rel_path, entry in walk_tree(
+        root,
+        skip_dir=lambda name, rel_path: name in SKIPPED_DIRS,
+        select_file=lambda name, rel_path: os.path.splitext(name)[1].lower() in INDEXED_EXTENSIONS,
+        on_error=lambda e: None
+    ):
+        try:
+            yield rel_path, entry.stat()
+        except OSError:
+            continue
+
+
+class ReferenceIndex:
+    """On-disk inverted index from names to the files and lines that mention them."""
+
+    def __init__(self, root: Path, db_path: Optional[Path] = None):
+        self.root = root
+        self.db_path = db_path or root / INDEX_FILE_NAME
+        self.connection = sqlite3.connect(self.db_path)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        version = self.connection.execute("PRAGMA user_version").fetchone()[0]
+        if version != INDEX_VERSION:
+            self.rebuild()
+
+    def close(self) -> None:
+        self.connection.close()
+
+    def __enter__(self) -> "ReferenceIndex":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def rebuild(self) -> None:
+        """Drop everything and recreate an empty index."""
+        with self.connection:
+            for table in ("postings", "tokens", "files"):
+                self.connection.execute(f"DROP TABLE IF EXISTS {table}")
+            self.connection.executescript(SCHEMA)
+            self.connection.execute(f"PRAGMA user_version = {INDEX_VERSION}")
+
+    def refresh(self) -> Tuple[int, int]:
+        """Bring the index up to date with the files on disk.
+
+        Files are re-read only when their size or modification time differs
+        from what was indexed.
+
+        Returns:
+            tuple: (files_reindexed, files_removed)
+        """
+        known: Dict[str, Tuple[int, int, int]] = {
+            path: (file_id, size, mtime_ns)
+            for file_id, path, size, mtime_ns in self.connection.execute("SELECT id, path, size, mtime_ns FROM files")
+        }
+        token_ids: Dict[str, int] = {}
+        reindexed = 0
+
+        with self.connection:
+            for rel_path, st in iter_indexable_files(self.root):
+                row = known.pop(rel_path, None)
+                if row is not None and row[1] == st.st_size and row[2] == st.st_mtime_ns:
+                    continue
+                try:
+                    data = (self.root / rel_path).read_bytes()
+                except OSError:
+                    continue
+                if row is not None:
+                    self._forget(row[0])
+                file_id = self.connection.execute(
+                    "INSERT INTO files (path, size, mtime_ns) VALUES (?, ?, ?)",
+                    (rel_path, st.st_size, st.st_mtime_ns)
+                ).lastrowid
+                self.connection.executemany(
+                    "INSERT INTO postings (token_id, file_id, line, offset) VALUES (?, ?, ?, ?)",
+                    ((self._token_id(token, token_ids), file_id, line, offset) for token, line, offset in tokenize(data))
+                )
+                reindexed += 1
+
+            # Whatever was not seen on disk is gone
+            for file_id, _, _ in known.values():
+                self._forget(file_id)
+
+        return reindexed, len(known)
+
+    def _forget(self, file_id: int) -> None:
+        self.connection.execute("DELETE FROM postings WHERE file_id = ?", (file_id,))
+        self.connection.execute("DELETE FROM files WHERE id = ?", (file_id,))
+
+    def _token_id(self, token: str, cache: Dict[str, int]) -> int:
+        token_id = cache.get(token)
+        if token_id is None:
+            self.connection.execute("INSERT OR IGNORE INTO tokens (token) VALUES (?)", (token,))
+            token_id = self.connection.execute("SELECT id FROM tokens WHERE token = ?", (token,)).fetchone()[0]
+            cache[token] = token_id
+        return token_id
+
+    @staticmethod
+    def can_look_up(name: str) -> bool:
+        """Whether every occurrence of name is guaranteed to be indexed."""
+        return LOOKUP_PATTERN.fullmatch(name) is not None
+
+    def files_containing(self, names: Iterable[str]) -> Optional[Set[Path]]:
+        """Return the indexed files that contain any of names as a substring.
+
+        Returns None when some name is not of a shape the index covers, in
+        which case callers have to fall back to scanning.
+        """
+        names = list(names)
+        if not all(map(self.can_look_up, names)):
+            return None
+        if not names:
+            return set()
+        conditions = " OR ".join("instr(token, ?) > 0" for _ in names)
+        rows = self.connection.execute(
+            f"""SELECT path FROM files WHERE id IN (
+                    SELECT DISTINCT file_id FROM postings WHERE token_id IN (
+                        SELECT id FROM tokens WHERE {conditions}))""",
+            names
+        )
+        return {self.root / path for path, in rows}
+
+    def occurrences(self, name: str) -> List[Tuple[Path, int, int]]:
+        """Return (file, line, byte_offset) of every token containing name."""
+        rows = self.connection.execute(
+            """SELECT f.path, p.line, p.offset + instr(t.token, ?) - 1
+               FROM tokens t
+               JOIN postings p ON p.token_id = t.id
+               JOIN files f ON f.id = p.file_id
+               WHERE instr(t.token, ?) > 0
+               ORDER BY f.path, p.offset""",
+            (name, name)
+        )
+        return [(self.root / path, line, offset) for path, line, offset in rows]
+
+    def files(self) -> Set[Path]:
+        """Return every indexed file."""
+        return {self.root / path for path, in self.connection.execute("SELECT path FROM files")}
+
+    def file_count(self) -> int:
+        return self.connection.execute("SELECT COUNT(*) FROM files").fetchone()[0]
+
+
+def main() -> int:
+    """Main execution function."""
+    parser = argparse.ArgumentParser(description="Maintain and query the agent/tool reference index")
+    parser.add_argument("names", nargs="*", help="Agent names or mcp__ tool identifiers to look up")
+    parser.add_argument("--root", default=".", help="Project root to index (default: current directory)")
+    parser.add_argument("--rebuild", action="store_true", help="Discard the existing index and build it again")
+    parser.add_argument("--quiet", "-q", action="store_true", help="Only refresh the index; print nothing")
+    parser.add_argument("--json", action="store_true", help="Print the refresh counts and occurrences as JSON")
+    args = parser.parse_args()
+    console.quiet = args.quiet or args.json
+
+    root = Path(args.root).resolve()
+    if not root.is_dir():
+        console.error(f"[red]Error: {root} is not a directory[/red]")
+        return 1
+
+    try:
+        with ReferenceIndex(root) as index:
+            if args.rebuild:
+                index.rebuild()
+            start = time.perf_counter()
+            reindexed, removed = index.refresh()
+            console.print(
+                f"[green]✓[/green] Index {index.db_path} covers {index.file_count()} files "
+                f"({reindexed} re-read, {removed} removed) in {time.perf_counter() - start:.2f}s"
+            )
+
+            if args.json:
+                print(json.dumps({
+                    "index": str(index.db_path),
+                    "files": index.file_count(),
+                    "reindexed": reindexed,
+                    "removed": removed,
+                    "occurrences": {
+                        name: [
+                            {"file": str(path.relative_to(root)), "line": line, "offset": offset}
+                            for path, line, offset in index.occurrences(name)
+                        ]
+                        for name in args.names if index.can_look_up(name)
+                    },
+                }))
+                return 0
+
+            if console.quiet:
+                return 0
+
+            for name in args.names:
+                if not index.can_look_up(name):
+                    console.print(f"[yellow]⚠ {name!r} is not a hyphenated name or mcp__ identifier, skipping[/yellow]")
+                    continue
+                from rich.table import Table
+
+                hits = index.occurrences(name)
+                table = Table(title=f"{name} ({len(hits)} occurrences)")
+                table.add_column("File", style="cyan")
+                table.add_column("Line", justify="right", style="green")
+                table.add_column("Offset", justify="right")
+                for path, line, offset in hits[:50]:  # Show first 50
+                    table.add_row(str(path.relative_to(root)), str(line), str(offset))
+                console.print(table)
+                if len(hits) > 50:
+                    console.print(f"  ... and {len(hits) - 50} more")
+        return 0
+
+    except sqlite3.Error as e:
+        console.error(f"[red]Index error: {e}[/red]")
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -11,31 +11,65 @@ Agent renaming script for .claude/agents/ directory.
 This script renames agent files according to a predefined mapping and updates
 all references to these agents throughout the directory structure.
 
+References are rewritten on a pool of worker processes, one per CPU core by
+default. Files that cannot mention a renamed agent are ruled out by a byte
+search for the agents' team prefixes before any regex work. With --index, the
+files to update are looked up in the persistent reference index
+(reference_index.py) instead of walking and reading the whole tree.
+
+With --watch the script keeps running after the full pass. It renames agent
+files saved under an old name and updates references in each file as it
+is saved, reading only the changed files, so a save is handled in
+milliseconds whatever the size of the tree.
+
 Usage:
     python rename_agents.py
+    python rename_agents.py --jobs 8
+    python rename_agents.py --jobs 1    # update files one at a time in-process
+    python rename_agents.py --index     # only read files the index says mention an agent
+    python rename_agents.py --profile --trace-json rename-trace.json  # where the time goes
+    python rename_agents.py --json      # a JSON summary instead of tables, without importing rich
+    python rename_agents.py --ndjson >> events.jsonl  # a JSON line per renamed or updated file
+    python rename_agents.py --watch     # then keep renaming references in each file as it is saved
     # or if executable:
     ./rename_agents.py
 """
 
+import argparse
+import json
 import os
 import re
 import sys
-import logging
+import mmap
+import time
 from pathlib import Path
-from typing import Dict, Set, Tuple
-from rich.console import Console
-from rich.progress import Progress, TaskID
-from rich.table import Table
-
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+from typing import Dict, Iterable, Iterator, NamedTuple, Optional, Set, Tuple
+
+from scan_core import (
+    EventStream, LazyConsole, LazyLogger, Metrics, ProfileSession, TreeWatcher, add_profile_arguments,
+    add_watch_arguments, make_progress, map_parallel, rewrite_mapped_file, walk_tree, write_file_atomic
 )
-logger = logging.getLogger(__name__)
 
-# Initialize rich console
-console = Console()
+# Configured on first use, so importing this module sets nothing up
+logger = LazyLogger(__name__)
+
+# Initialize rich console; rich itself is imported on first output
+console = LazyConsole()
+
+# Phase timings and counts, shown with --metrics
+metrics = Metrics()
+
+# Common file extensions that might contain agent references
+UPDATE_EXTENSIONS = {'.md', '.txt', '.json', '.yaml', '.yml', '.toml', '.py', '.js', '.ts'}
+
+# Build and cache directories that are never updated; hidden ones are skipped too
+UPDATE_SKIPPED_DIRS = {'node_modules', '__pycache__', 'target', 'build', 'dist'}
+
+# Files at least this large are rewritten through a memory map, not read whole
+STREAMING_THRESHOLD = 1 << 20
+
+# Below this many files, starting worker processes costs more than it saves
+MIN_FILES_PER_POOL = 64
 
 # Agent renaming mapping
 AGENT_MAPPING = {
@@ -107,7 +141,7 @@ def get_files_that_need_renaming(agents_dir: Path) -> Dict[str, str]:
     return files_to_rename
 
 
-def rename_agent_files(files_to_rename: Dict[str, str]) -> Tuple[int, int]:
+def rename_agent_files(files_to_rename: Dict[str, str], events: Optional[EventStream] = None) -> Tuple[int, int]:
     """Rename agent files according to the mapping."""
     success_count = 0
     error_count = 0
@@ -122,65 +156,222 @@ def rename_agent_files(files_to_rename: Dict[str, str]) -> Tuple[int, int]:
             # Check if target already exists
             if new_file.exists():
                 console.print(f"[yellow]Warning: {new_file.name} already exists, skipping {old_file.name}[/yellow]")
+                if events is not None:
+                    events.file("skipped", old_file, reason=f"{new_file.name} already exists")
                 continue
             
             old_file.rename(new_file)
             console.print(f"[green]✓[/green] Renamed: {old_file.name} → {new_file.name}")
+            if events is not None:
+                events.file("renamed", old_file, to=str(new_file))
             success_count += 1
             
         except Exception as e:
-            console.print(f"[red]✗[/red] Failed to rename {old_path}: {e}")
+            console.error(f"[red]✗[/red] Failed to rename {old_path}: {e}")
+            if events is not None:
+                events.file("error", old_path, error=str(e))
             error_count += 1
             logger.error(f"Failed to rename {old_path}: {e}")
     
     return success_count, error_count
 
 
+def skip_update_dir(name: str, rel_path: str) -> bool:
+    """Whether a directory is left out of reference updates: hidden, build and cache ones are."""
+    return name.startswith('.') or name in UPDATE_SKIPPED_DIRS
+
+
+def select_update_file(name: str, rel_path: str) -> bool:
+    """Whether a file's type can hold agent references worth updating."""
+    return os.path.splitext(name)[1].lower() in UPDATE_EXTENSIONS
+
+
 def get_all_files_to_update() -> Set[Path]:
     """Get all files that might contain agent references."""
-    files_to_update = set()
-    
-    # Common file extensions that might contain agent references
-    extensions = {'.md', '.txt', '.json', '.yaml', '.yml', '.toml', '.py', '.js', '.ts'}
-    
-    for root, dirs, files in os.walk('.'):
-        # Skip hidden directories and common build/cache directories
-        dirs[:] = [d for d in dirs if not d.startswith('.') and d not in {'node_modules', '__pycache__', 'target', 'build', 'dist'}]
-        
-        for file in files:
-            file_path = Path(root) / file
-            if file_path.suffix.lower() in extensions:
-                files_to_update.add(file_path)
-    
-    return files_to_update
+    return {
+        Path(rel_path)
+        for rel_path, _ in walk_tree(
+            Path('.'),
+            skip_dir=skip_update_dir,
+            select_file=select_update_file,
+            on_error=lambda e: logger.warning(f"Cannot scan {e.filename}: {e.strerror}")
+        )
+    }
+
+
+def in_update_scope(file_path: Path) -> bool:
+    """Check whether get_all_files_to_update() would include a relative path."""
+    return file_path.suffix.lower() in UPDATE_EXTENSIONS and not any(
+        part.startswith('.') or part in UPDATE_SKIPPED_DIRS for part in file_path.parts[:-1]
+    )
+
+
+def get_indexed_files_to_update(mapping: Dict[str, str]) -> Tuple[Set[Path], int]:
+    """Get the files that mention a renamed agent from the reference index.
+
+    The index is refreshed first, which re-reads only files changed since
+    the last run. Falls back to get_all_files_to_update() if some name
+    cannot be looked up.
+
+    Returns:
+        tuple: (files_to_update, files_ruled_out_by_index)
+    """
+    from reference_index import ReferenceIndex
+
+    with ReferenceIndex(Path('.')) as index:
+        reindexed, removed = index.refresh()
+        console.print(f"[blue]Reference index refreshed: {reindexed} files re-read, {removed} removed[/blue]")
+        candidates = index.files_containing(old for old, new in mapping.items() if old != new)
+        if candidates is None:
+            console.print("[yellow]Warning: some agent names cannot be looked up in the index, scanning all files[/yellow]")
+            return get_all_files_to_update(), 0
+        in_scope = {path for path in index.files() if in_update_scope(path)}
+
+    files_to_update = candidates & in_scope
+    return files_to_update, len(in_scope) - len(files_to_update)
+
+
+def build_trie_pattern(words: Iterable[str]) -> str:
+    """Build a regex alternation of words factored into a prefix trie.
+
+    Names sharing a prefix such as "engineering-" share one branch, so each
+    text position is checked against a prefix once instead of once per name.
+    Longer names are preferred over their own prefixes.
+    """
+    trie: Dict[str, dict] = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[""] = {}  # A word ends here
+
+    def render(node: Dict[str, dict]) -> str:
+        branches = [re.escape(char) + render(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        ends_here = "" in node
+        if len(branches) == 1 and not ends_here:
+            return branches[0]
+        group = "(?:" + "|".join(branches) + ")"
+        # Greedy, so the longer name wins before falling back to this one
+        return group + "?" if ends_here else group
+
+    return render(trie)
+
+
+class ReferenceRewriter:
+    """Rewrites every renamed agent reference in a text in one pass.
+
+    All names are compiled once into a single trie-shaped regex. Matches
+    never overlap and replacements are not rescanned, so one rename cannot
+    feed into another. New and unchanged names are part of the pattern as
+    well and map to themselves: an already renamed reference such as
+    "creative-creative-copywriter" is consumed whole, which keeps the old
+    name inside it from being rewritten again on a rerun.
+    """
+
+    def __init__(self, mapping: Dict[str, str]):
+        self.replacements = {old: new for old, new in mapping.items() if old != new}
+        self.pattern: Optional[re.Pattern] = None
+        self.byte_pattern: Optional[re.Pattern] = None
+        if self.replacements:
+            words = set(mapping) | set(mapping.values())
+            # Use word boundaries to ensure exact matches
+            trie_pattern = build_trie_pattern(words)
+            self.pattern = re.compile(r'\b(?:' + trie_pattern + r')\b')
+            # The same names over raw UTF-8 bytes, for rewrite_mapped_file()
+            self.byte_pattern = re.compile(rb'\b(?:' + trie_pattern.encode('utf-8') + rb')\b')
+            self.byte_replacements = {old.encode('utf-8'): new.encode('utf-8') for old, new in self.replacements.items()}
+        # Team prefixes ("creative-", ...) that every renamed name starts with
+        self.literals = sorted({
+            old[:old.find('-') + 1] or old for old in self.replacements
+        })
+
+    def might_rewrite(self, file_path: Path) -> bool:
+        """Cheaply check whether a file can contain a reference to rename.
+
+        The file is mapped into memory and searched for the literal prefixes
+        without decoding it or running the regex. It may report files that
+        turn out to need no change, but never misses one that does.
+        """
+        if not self.literals:
+            return False
+        try:
+            with open(file_path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                return any(data.find(literal.encode('utf-8')) != -1 for literal in self.literals)
+        except ValueError:  # Empty files cannot be mapped
+            return False
+        except OSError:
+            return True  # Let the full update report the error
 
+    def rewrite(self, content: str) -> Tuple[str, int]:
+        """Return content with references renamed, and the number renamed."""
+        if self.pattern is None:
+            return content, 0
 
-def update_file_references(file_path: Path, mapping: Dict[str, str]) -> Tuple[bool, int]:
+        replacements_made = 0
+
+        def replace(match: re.Match) -> str:
+            nonlocal replacements_made
+            name = match.group()
+            new_name = self.replacements.get(name)
+            if new_name is None:
+                return name
+            replacements_made += 1
+            return new_name
+
+        return self.pattern.sub(replace, content), replacements_made
+
+    @staticmethod
+    def _is_word_char(char: str) -> bool:
+        return bool(char) and (char.isalnum() or char == '_')
+
+    def iter_edits(self, data) -> Iterator[Tuple[int, int, bytes]]:
+        """Yield (start, end, new_name) for every reference to rename in UTF-8 bytes."""
+        if self.byte_pattern is None:
+            return
+        for match in self.byte_pattern.finditer(data):
+            new_name = self.byte_replacements.get(match.group())
+            if new_name is None:
+                continue
+            start, end = match.span()
+            # Byte patterns only know ASCII word characters; like the text
+            # pattern, a name touching a non-ASCII letter is not a whole word
+            if start and data[start - 1] >= 0x80:
+                if self._is_word_char(data[max(0, start - 4):start].decode('utf-8', 'ignore')[-1:]):
+                    continue
+            if end < len(data) and data[end] >= 0x80:
+                if self._is_word_char(data[end:end + 4].decode('utf-8', 'ignore')[:1]):
+                    continue
+            yield start, end, new_name
+
+
+class ReferenceUpdate(NamedTuple):
+    """The outcome of updating references in one file."""
+    path: Path
+    updated: bool
+    replacements: int
+    skipped: bool  # Ruled out by the prefilter without being read
+
+
+def update_file_references(file_path: Path, rewriter: ReferenceRewriter) -> Tuple[bool, int]:
     """Update agent references in a single file."""
     try:
+        # Stream large files instead of holding them, and copies of them, in memory
+        if file_path.stat().st_size >= STREAMING_THRESHOLD:
+            replacements_made = rewrite_mapped_file(file_path, rewriter.iter_edits)
+            return replacements_made > 0, replacements_made
+        
         # Read file content
         with open(file_path, 'r', encoding='utf-8') as f:
             content = f.read()
         
         original_content = content
-        replacements_made = 0
-        
-        # Sort by length (longest first) to avoid partial replacements
-        sorted_mapping = sorted(mapping.items(), key=lambda x: len(x[0]), reverse=True)
+        content, replacements_made = rewriter.rewrite(content)
         
-        for old_name, new_name in sorted_mapping:
-            if old_name != new_name:  # Only process if names are different
-                # Use word boundaries to ensure exact matches
-                pattern = r'\b' + re.escape(old_name) + r'\b'
-                matches = re.findall(pattern, content)
-                if matches:
-                    content = re.sub(pattern, new_name, content)
-                    replacements_made += len(matches)
-        
-        # Write back if changes were made
+        # Write back if changes were made, never leaving a half-written file
         if content != original_content:
-            with open(file_path, 'w', encoding='utf-8') as f:
-                f.write(content)
+            write_file_atomic(file_path, content.encode('utf-8'))
             return True, replacements_made
         
         return False, 0
@@ -190,32 +381,145 @@ def update_file_references(file_path: Path, mapping: Dict[str, str]) -> Tuple[bo
         return False, 0
 
 
-def update_all_references(files_to_update: Set[Path], mapping: Dict[str, str]) -> Tuple[int, int]:
-    """Update agent references in all files."""
+# The rewriter each worker process compiles once, set by _init_worker()
+_worker_rewriter: Optional[ReferenceRewriter] = None
+
+
+def _init_worker(rewriter: ReferenceRewriter) -> None:
+    global _worker_rewriter
+    _worker_rewriter = rewriter
+
+
+def _update_in_worker(file_path: Path) -> ReferenceUpdate:
+    return prefilter_and_update(file_path, _worker_rewriter)
+
+
+def prefilter_and_update(file_path: Path, rewriter: ReferenceRewriter) -> ReferenceUpdate:
+    """Update references in a file unless the prefilter rules it out."""
+    if not rewriter.might_rewrite(file_path):
+        return ReferenceUpdate(file_path, False, 0, True)
+    return ReferenceUpdate(file_path, *update_file_references(file_path, rewriter), False)
+
+
+def iter_reference_updates(
+    files_to_update: Set[Path],
+    rewriter: ReferenceRewriter,
+    jobs: int
+) -> Iterator[ReferenceUpdate]:
+    """Update every file, yielding a ReferenceUpdate per file.
+
+    With more than one job the files are spread over a process pool, so the
+    regex work runs on all cores. The rewriter is sent to each worker once
+    when it starts rather than with every file.
+    """
+    # Batch files to cut inter-process overhead, while keeping chunks small
+    # enough for the load to stay balanced and the progress bar to move
+    chunksize = max(1, min(64, len(files_to_update) // (jobs * 8)))
+    yield from map_parallel(
+        _update_in_worker, files_to_update, jobs,
+        processes=True, chunksize=chunksize, min_items=MIN_FILES_PER_POOL,
+        initializer=_init_worker, initargs=(rewriter,),
+        metrics=metrics, phase="update references"
+    )
+
+
+def update_all_references(
+    files_to_update: Set[Path],
+    mapping: Dict[str, str],
+    jobs: Optional[int] = None,
+    events: Optional[EventStream] = None
+) -> Tuple[int, int, int]:
+    """Update agent references in all files, on `jobs` processes (default: one per core).
+
+    With an EventStream, each updated file is reported as its worker finishes.
+
+    Returns:
+        tuple: (files_updated, total_replacements, files_skipped_by_prefilter)
+    """
     files_updated = 0
     total_replacements = 0
+    files_skipped = 0
+    rewriter = ReferenceRewriter(mapping)
+    jobs = jobs or os.cpu_count() or 1
     
     console.print(f"\n[bold blue]Updating references in {len(files_to_update)} files...[/bold blue]")
     
-    with Progress() as progress:
+    with make_progress(console) as progress:
         task = progress.add_task("[green]Processing files...", total=len(files_to_update))
         
-        for file_path in files_to_update:
-            was_updated, replacements = update_file_references(file_path, mapping)
-            
+        for file_path, was_updated, replacements, skipped in iter_reference_updates(files_to_update, rewriter, jobs):
+            files_skipped += skipped
             if was_updated:
                 files_updated += 1
                 total_replacements += replacements
                 console.print(f"[green]✓[/green] Updated {file_path} ({replacements} replacements)")
+                if events is not None:
+                    events.file("updated", file_path, replacements=replacements)
             
             progress.update(task, advance=1)
     
-    return files_updated, total_replacements
+    return files_updated, total_replacements, files_skipped
+
+
+def watch_references(args: argparse.Namespace, events: Optional[EventStream] = None) -> int:
+    """Rename agent files and update references as files are saved, until interrupted.
+
+    The tree is watched in the scope get_all_files_to_update() walks, and
+    .claude/agents for agent files saved under an old name. Each changed
+    file goes through the same prefilter and rewriter as a full run, in
+    this process: a batch of saves is a handful of files, for which a
+    worker pool would only add latency.
+    """
+    agents_dir = get_agents_directory()
+    rewriter = ReferenceRewriter(AGENT_MAPPING)
+    with TreeWatcher.from_args(
+        args, [Path('.'), agents_dir], skip_dir=skip_update_dir, select_file=select_update_file
+    ) as watcher:
+        console.print(f"\n[bold blue]Watching for changes ({watcher.backend}), press Ctrl+C to stop...[/bold blue]")
+        if events is not None:
+            events.emit("watch", paths=[".", str(agents_dir)], backend=watcher.backend)
+        try:
+            for batch in watcher.batches():
+                start = time.perf_counter()
+                files_renamed = rename_errors = files_updated = total_replacements = 0
+                for file_path in batch.changed:
+                    if file_path.parent == agents_dir:
+                        new_name = AGENT_MAPPING.get(file_path.stem, file_path.stem)
+                        if file_path.suffix == '.md' and new_name != file_path.stem and file_path.exists():
+                            renamed, errors = rename_agent_files({str(file_path): str(agents_dir / f"{new_name}.md")},
+                                                                 events)
+                            files_renamed += renamed
+                            rename_errors += errors
+                        continue
+                    file_start = time.perf_counter()
+                    update = prefilter_and_update(file_path, rewriter)
+                    file_ms = (time.perf_counter() - file_start) * 1000
+                    if update.updated:
+                        files_updated += 1
+                        total_replacements += update.replacements
+                        console.print(f"[green]✓[/green] Updated {file_path} "
+                                      f"({update.replacements} replacements, {file_ms:.1f} ms)")
+                        if events is not None:
+                            events.file("updated", file_path, replacements=update.replacements,
+                                        ms=round(file_ms, 3))
+                # A batch holding only the files the last one wrote has nothing to report
+                if events is not None and (files_renamed or rename_errors or files_updated):
+                    events.emit(
+                        "batch", files=len(batch.changed), rescanned=batch.rescanned,
+                        files_renamed=files_renamed, rename_errors=rename_errors, files_updated=files_updated,
+                        replacements=total_replacements, ms=round((time.perf_counter() - start) * 1000, 3)
+                    )
+        except KeyboardInterrupt:
+            console.print("\n[bold blue]Stopped watching.[/bold blue]")
+    return 0
 
 
 def create_summary_table(rename_success: int, rename_errors: int, 
-                        files_updated: int, total_replacements: int) -> None:
+                        files_updated: int, total_replacements: int,
+                        files_skipped: int = 0, files_ruled_out: int = 0) -> None:
     """Create a summary table of the operation results."""
+    from rich.table import Table
+
     table = Table(title="Agent Renaming Summary")
     table.add_column("Operation", style="cyan")
     table.add_column("Count", style="magenta")
@@ -224,6 +528,10 @@ def create_summary_table(rename_success: int, rename_errors: int,
     table.add_row("Files renamed", str(rename_success), "✓ Success" if rename_errors == 0 else f"⚠ {rename_errors} errors")
     table.add_row("Files updated", str(files_updated), "✓ Complete")
     table.add_row("Total replacements", str(total_replacements), "✓ Complete")
+    if files_skipped:
+        table.add_row("Files skipped by prefilter", str(files_skipped), "✓ No agent prefixes")
+    if files_ruled_out:
+        table.add_row("Files ruled out by index", str(files_ruled_out), "✓ Not read")
     
     console.print("\n")
     console.print(table)
@@ -231,6 +539,62 @@ def create_summary_table(rename_success: int, rename_errors: int,
 
 def main() -> int:
     """Main execution function."""
+    parser = argparse.ArgumentParser(description="Rename agent files and update all references to them")
+    parser.add_argument(
+        "--jobs",
+        "-j",
+        type=int,
+        default=None,
+        metavar="N",
+        help=f"Number of worker processes for updating references (default: {os.cpu_count() or 1}, 1 runs in-process)"
+    )
+    parser.add_argument(
+        "--index",
+        action="store_true",
+        help="Use the persistent reference index to read only files that mention a renamed agent"
+    )
+    parser.add_argument(
+        "--metrics",
+        action="store_true",
+        help="Show phase timings and file counts when done"
+    )
+    parser.add_argument(
+        "--quiet",
+        "-q",
+        action="store_true",
+        help="Print only failures, on stderr; the exit status tells the result"
+    )
+    parser.add_argument(
+        "--json",
+        action="store_true",
+        help="Print a JSON summary instead of tables and messages"
+    )
+    parser.add_argument(
+        "--ndjson",
+        action="store_true",
+        help="Stream one JSON line per file renamed, updated or failed, then a summary line"
+    )
+    add_profile_arguments(parser)
+    add_watch_arguments(parser)
+    args = parser.parse_args()
+
+    if args.jobs is not None and args.jobs < 1:
+        parser.error("--jobs must be at least 1")
+    if args.profile_top < 1:
+        parser.error("--profile-top must be at least 1")
+    if args.json and args.ndjson:
+        parser.error("--json and --ndjson cannot be combined")
+    if args.watch and args.json:
+        parser.error("--watch reports as it goes: use --ndjson instead of --json")
+    if args.debounce < 0 or (args.poll is not None and args.poll <= 0):
+        parser.error("--debounce cannot be negative and --poll must be positive")
+
+    events = EventStream("rename_agents") if args.ndjson else None
+    console.quiet = args.quiet or args.json or args.ndjson
+    if console.quiet:
+        logger.set_root_level("WARNING")
+    profile = ProfileSession.from_args(metrics, args, "rename_agents.py")
+    profile.start()
     try:
         console.print("[bold green]Agent Renaming Script[/bold green]")
         console.print("This script will rename agent files and update all references.\n")
@@ -238,7 +602,7 @@ def main() -> int:
         # Check if agents directory exists
         agents_dir = get_agents_directory()
         if not agents_dir.exists():
-            console.print(f"[red]Error: {agents_dir} directory not found![/red]")
+            console.error(f"[red]Error: {agents_dir} directory not found![/red]")
             return 1
         
         # Show mapping summary
@@ -254,29 +618,72 @@ def main() -> int:
         console.print(f"\n[bold]Found {len(files_to_rename)} agent files to rename[/bold]")
         
         # Rename agent files
-        rename_success, rename_errors = rename_agent_files(files_to_rename)
+        with metrics.timer("rename agent files"):
+            rename_success, rename_errors = rename_agent_files(files_to_rename, events)
         
         # Get all files to update
-        files_to_update = get_all_files_to_update()
+        files_ruled_out = 0
+        with metrics.timer("find files to update"):
+            if args.index:
+                files_to_update, files_ruled_out = get_indexed_files_to_update(AGENT_MAPPING)
+            else:
+                files_to_update = get_all_files_to_update()
+        metrics.count("files to update", len(files_to_update))
+        metrics.count("files ruled out by index", files_ruled_out)
         
         # Update references
-        files_updated, total_replacements = update_all_references(files_to_update, AGENT_MAPPING)
+        with metrics.timer("update references"):
+            files_updated, total_replacements, files_skipped = update_all_references(
+                files_to_update, AGENT_MAPPING, args.jobs, events
+            )
+        metrics.count("files updated", files_updated)
+        metrics.count("replacements", total_replacements)
+        metrics.count("files skipped by prefilter", files_skipped)
         
         # Show summary
-        create_summary_table(rename_success, rename_errors, files_updated, total_replacements)
+        if args.json or events is not None:
+            summary = {
+                "files_renamed": rename_success,
+                "rename_errors": rename_errors,
+                "files_to_update": len(files_to_update),
+                "files_updated": files_updated,
+                "replacements": total_replacements,
+                "files_skipped_by_prefilter": files_skipped,
+                "files_ruled_out_by_index": files_ruled_out,
+            }
+            if args.metrics:
+                summary["metrics"] = metrics.as_dict()
+            if events is not None:
+                events.summary(**summary)
+            else:
+                print(json.dumps(summary))
+        elif not console.quiet:
+            create_summary_table(rename_success, rename_errors, files_updated, total_replacements,
+                                 files_skipped, files_ruled_out)
         
+        exit_status = 0
         if rename_errors > 0:
             console.print(f"\n[yellow]Warning: {rename_errors} files failed to rename[/yellow]")
-            return 1
+            exit_status = 1
+        else:
+            console.print("\n[bold green]✓ Agent renaming completed successfully![/bold green]")
         
-        console.print("\n[bold green]✓ Agent renaming completed successfully![/bold green]")
-        return 0
+        if args.watch:
+            return watch_references(args, events)
+        return exit_status
         
     except Exception as e:
-        console.print(f"[red]Script failed: {e}[/red]")
+        console.error(f"[red]Script failed: {e}[/red]")
+        if events is not None:
+            events.error(str(e))
         logger.error(f"Script failed: {e}")
         return 1
 
+    finally:
+        if args.metrics and not console.quiet:
+            console.print(metrics.table("Renaming Metrics"))
+        profile.finish(console)
+
 
 if __name__ == "__main__":
     sys.exit(main())
\ No newline at end of file
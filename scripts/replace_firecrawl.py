@@ -12,7 +12,25 @@ Replace Firecrawl MCP tools with FreeCrawl equivalents across the codebase.
 
 This script scans the codebase for Firecrawl tool references (mcp__firecrawl__*) 
 and replaces them with corresponding FreeCrawl tool names, providing detailed 
-logging and backup options.
+logging and backup options. Each file is read once: the analysis keeps a list of
+byte-offset edits that the apply step writes out, after checking the file has not
+changed in between.
+
+Other MCP tool migrations are described by JSON specs passed with --spec:
+
+    {
+      "name": "search-v2",
+      "description": "Search v1 → v2",
+      "renames": {"mcp__search__query": "mcp__search_v2__query"},
+      "patterns": [{"pattern": "mcp__search__([a-z_]+)", "replacement": "mcp__search_v2__\\\\1"}],
+      "tools": {"mcp__search__legacy_lookup": ["mcp__search_v2__query"], "mcp__search__debug": []}
+    }
+
+"renames" are exact, "patterns" are regexes with numbered groups only, and
+"tools" rewrites names in an agent's frontmatter `tools:` list, where one
+tool can become several or none. Every loaded spec is compiled into a single
+matcher, so the tree is searched once however many migrations run; the specs
+apply side by side, not one after another, so their renames do not chain.
 
 Usage:
     # Dry run to preview changes
@@ -23,22 +41,44 @@ Usage:
     
     # Execute replacements without backup
     python scripts/replace_firecrawl.py
+    
+    # Find target files through the persistent reference index
+    python scripts/replace_firecrawl.py --index
+    
+    # Limit which files are searched
+    python scripts/replace_firecrawl.py --include '*.md' --include '*.json' --exclude 'ai_docs'
+    
+    # Run several migrations in one pass ("firecrawl" is the built-in spec)
+    python scripts/replace_firecrawl.py --spec firecrawl --spec migrations/search-v2.json --dry-run
+    
+    # Show phase spans and the slowest files, and write a Chrome trace
+    python scripts/replace_firecrawl.py --dry-run --profile --trace-json firecrawl-trace.json
+    
+    # From a hook or another tool: a JSON summary, or nothing but the exit status.
+    # Neither can prompt, so they need --force or --dry-run
+    python scripts/replace_firecrawl.py --dry-run --json
+    python scripts/replace_firecrawl.py --force --quiet
+    
+    # Migrate file by file in bounded memory, writing a JSON line per changed file
+    python scripts/replace_firecrawl.py --force --ndjson >> events.jsonl
 """
 
+import fnmatch
+import hashlib
+import json
+import mmap
+import os
 import sys
 import re
-import shutil
 from pathlib import Path
-from typing import Dict, List, Tuple, Optional
-from dataclasses import dataclass
+from typing import Dict, Iterable, Iterator, List, Tuple, Optional
+from dataclasses import dataclass, field
 import logging
 
-import typer
-from rich.console import Console
-from rich.table import Table
-from rich.panel import Panel
-from rich.progress import Progress, SpinnerColumn, TextColumn
-from rich.prompt import Confirm
+from scan_core import (
+    EventStream, LazyConsole, Metrics, ProfileSession, RewriteTransaction, default_jobs, make_progress,
+    map_parallel, run_parallel, splice_edits, walk_tree
+)
 
 # Configure logging
 logging.basicConfig(
@@ -47,8 +87,71 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-console = Console()
-app = typer.Typer(help="Replace Firecrawl MCP tools with FreeCrawl equivalents")
+# rich is imported on first output, typer only by build_app(), so the
+# benchmarks can import ToolMigrator without either
+console = LazyConsole()
+
+# Files at least this large are rewritten through a memory map, not read whole
+STREAMING_THRESHOLD = 1 << 20
+
+# Agent frontmatter at the start of a file, and the tools: line within it
+FRONTMATTER_PATTERN = re.compile(rb'---[ \t]*\r?\n(.*?)^---[ \t]*$', re.DOTALL | re.MULTILINE)
+TOOLS_LINE_PATTERN = re.compile(rb'^tools:[ \t]*(.*?)[ \t]*\r?$', re.MULTILINE)
+
+# Characters that end the literal prefix of a regex
+REGEX_SPECIAL = re.compile(r'[*?{\\.^$+\[\]()]')
+
+# An escape in a replacement template, read as re.Match.expand() reads it:
+# \g<name>, an octal escape, a group number or any other escaped character
+TEMPLATE_ESCAPE = re.compile(rb'\\(?:g<([^>]*)>|(0[0-7]{0,2}|[1-7][0-7]{2})|([1-9][0-9]?)|(.))', re.DOTALL)
+
+# Files searched by default, as shell-style patterns
+DEFAULT_INCLUDE = ['*.md']
+
+# Directories and files never searched; --exclude adds to these
+DEFAULT_EXCLUDE = [
+    '.git', '.hg', '.svn', 'node_modules', '.venv', 'venv', '__pycache__',
+    '.tox', '.mypy_cache', '.pytest_cache', 'dist', 'build',
+]
+
+
+def compile_patterns(patterns: Iterable[str]) -> re.Pattern:
+    """Compile shell-style patterns into one regex (matches nothing if empty)."""
+    return re.compile('|'.join(fnmatch.translate(pattern) for pattern in patterns) or r'(?!)')
+
+
+def literal_prefix(pattern: str) -> str:
+    """Return the text every match of a regex starts with ('' if unknown)."""
+    if '|' in pattern:
+        return ''
+    special = REGEX_SPECIAL.search(pattern)
+    if special is None:
+        return pattern
+    prefix = pattern[:special.start()]
+    # A quantifier makes the character before it optional
+    return prefix[:-1] if special.group() in '*?{' else prefix
+
+
+def shift_template(template: bytes, offset: int, groups: int) -> bytes:
+    """Renumber the group references of a rule's replacement template.
+
+    Group n of a rule is group offset + n of the combined pattern it is
+    part of, while \\g<0> stays the whole match. Raises ValueError for a
+    reference to a group the rule does not have.
+    """
+    def shift(match: re.Match) -> bytes:
+        reference = match.group(1) if match.group(1) is not None else match.group(3)
+        if reference is None:
+            return match.group()  # Not a group reference
+        if not reference.isdigit():
+            raise ValueError(f"unknown group name {reference.decode('utf-8', 'replace')!r}")
+        index = int(reference)
+        if index > groups:
+            raise ValueError(f"invalid group reference {index}")
+        return b'\\g<%d>' % (offset + index if index else 0)
+
+    return TEMPLATE_ESCAPE.sub(shift, template)
+
 
 @dataclass
 class Replacement:
@@ -63,119 +166,440 @@ class FileChange:
     file_path: Path
     replacements: List[Tuple[str, str, int]]  # (old, new, count)
     total_changes: int
+    edits: List[Tuple[int, int, bytes]] = field(default_factory=list)  # (start, end, replacement) byte spans
+    size: int = 0
+    mtime_ns: int = 0
+    sha256: str = ""
+    content: Optional[bytes] = None  # Analyzed bytes, kept for files below STREAMING_THRESHOLD
+
+@dataclass
+class MigrationSpec:
+    """One tool migration: exact renames, regex patterns and frontmatter tools: rewrites."""
+    name: str
+    description: str = ""
+    renames: Dict[str, str] = field(default_factory=dict)
+    patterns: List[Tuple[str, str]] = field(default_factory=list)  # (regex, replacement template)
+    tools: Dict[str, List[str]] = field(default_factory=dict)  # tools: entry -> entries replacing it
+    
+    @classmethod
+    def from_json(cls, path: Path) -> "MigrationSpec":
+        """Load and validate a spec file; raises ValueError if it is malformed."""
+        data = json.loads(path.read_text(encoding='utf-8'))
+        if not isinstance(data, dict):
+            raise ValueError(f"{path}: a migration spec must be a JSON object")
+        unknown = set(data) - {'name', 'description', 'renames', 'patterns', 'tools'}
+        if unknown:
+            raise ValueError(f"{path}: unknown keys {', '.join(sorted(unknown))}")
+        
+        renames = data.get('renames', {})
+        if not isinstance(renames, dict) or not all(isinstance(value, str) for value in renames.values()):
+            raise ValueError(f"{path}: 'renames' must map tool names to tool names")
+        
+        patterns = []
+        for entry in data.get('patterns', []):
+            if not isinstance(entry, dict) or not isinstance(entry.get('pattern'), str) \
+                    or not isinstance(entry.get('replacement'), str):
+                raise ValueError(f"{path}: each pattern needs a 'pattern' and a 'replacement' string")
+            try:
+                compiled = re.compile(entry['pattern'])
+            except re.error as e:
+                raise ValueError(f"{path}: invalid pattern {entry['pattern']!r}: {e}") from None
+            if compiled.groupindex:
+                raise ValueError(f"{path}: pattern {entry['pattern']!r} uses named groups")
+            patterns.append((entry['pattern'], entry['replacement']))
+        
+        tools = data.get('tools', {})
+        if not isinstance(tools, dict) or not all(
+            isinstance(value, list) and all(isinstance(tool, str) for tool in value) for value in tools.values()
+        ):
+            raise ValueError(f"{path}: 'tools' must map tool names to lists of tool names")
+        
+        name = data.get('name', path.stem)
+        return cls(name, data.get('description', name), renames, patterns, tools)
+    
+    def marker(self) -> str:
+        """Return text that every reference this spec rewrites contains ('' if none)."""
+        literals = [*self.renames, *self.tools, *(literal_prefix(pattern) for pattern, _ in self.patterns)]
+        return os.path.commonprefix(literals) if literals else ''
+
+
+FIRECRAWL_MIGRATION = MigrationSpec(
+    name='firecrawl',
+    description='Firecrawl → FreeCrawl',
+    renames={
+        'mcp__firecrawl__firecrawl_scrape': 'mcp__freecrawl__scrape',
+        'mcp__firecrawl__firecrawl_batch_scrape': 'mcp__freecrawl__batch_scrape',
+        'mcp__firecrawl__firecrawl_search': 'mcp__freecrawl__search',
+        'mcp__firecrawl__firecrawl_extract': 'mcp__freecrawl__extract',
+        'mcp__firecrawl__firecrawl_crawl': 'mcp__freecrawl__crawl',
+        'mcp__firecrawl__firecrawl_map': 'mcp__freecrawl__map',
+        'mcp__firecrawl__firecrawl_check_crawl_status': 'mcp__freecrawl__check_crawl_status',
+        'mcp__firecrawl__firecrawl_deep_research': 'mcp__freecrawl__deep_research',
+        'mcp__firecrawl__firecrawl_generate_llmstxt': 'mcp__freecrawl__generate_llmstxt',
+    },
+    # Wildcard patterns for general replacements
+    patterns=[
+        (r'mcp__firecrawl__\*', 'mcp__freecrawl__*'),
+        (r'mcp__firecrawl__firecrawl_([a-zA-Z_]+)', r'mcp__freecrawl__\1'),
+    ],
+)
+
+# Specs that --spec accepts by name instead of a path
+BUILTIN_MIGRATIONS = {FIRECRAWL_MIGRATION.name: FIRECRAWL_MIGRATION}
 
-class FirecrawlReplacer:
-    """Main class for handling Firecrawl to FreeCrawl replacements."""
+
+def load_migration(value: str) -> MigrationSpec:
+    """Resolve a --spec value: a built-in migration name or a JSON spec file."""
+    if value in BUILTIN_MIGRATIONS:
+        return BUILTIN_MIGRATIONS[value]
+    return MigrationSpec.from_json(Path(value))
+
+class ToolMigrator:
+    """Main class for running tool migrations, Firecrawl to FreeCrawl by default."""
     
-    def __init__(self, root_dir: Path, dry_run: bool = False, backup: bool = False, force: bool = False):
+    def __init__(self, root_dir: Path, dry_run: bool = False, backup: bool = False, force: bool = False,
+                 use_index: bool = False, include: Optional[List[str]] = None,
+                 exclude: Optional[List[str]] = None, jobs: Optional[int] = None,
+                 specs: Optional[List[MigrationSpec]] = None):
         self.root_dir = root_dir
         self.dry_run = dry_run
         self.backup = backup
         self.force = force
+        self.use_index = use_index
+        self.jobs = jobs or default_jobs()
+        self.specs = specs or [FIRECRAWL_MIGRATION]
+        # Patterns match a file or directory name, or its path relative to root_dir
+        self.include_pattern = compile_patterns(include or DEFAULT_INCLUDE)
+        self.exclude_pattern = compile_patterns(DEFAULT_EXCLUDE + (exclude or []))
         self.file_changes: List[FileChange] = []
+        self.target_count = 0
+        self.changed_count = 0
+        self.change_count = 0
+        self.updated_count: Optional[int] = None
+        # Phase timings and counts, shown with --metrics
+        self.metrics = Metrics()
+        # Contents read while finding target files, handed on to analyze_file()
+        self._read_ahead: Dict[Path, Tuple[bytes, os.stat_result]] = {}
         
-        # Define the mapping from Firecrawl to FreeCrawl tools
-        self.tool_mappings = {
-            'mcp__firecrawl__firecrawl_scrape': 'mcp__freecrawl__scrape',
-            'mcp__firecrawl__firecrawl_batch_scrape': 'mcp__freecrawl__batch_scrape',
-            'mcp__firecrawl__firecrawl_search': 'mcp__freecrawl__search',
-            'mcp__firecrawl__firecrawl_extract': 'mcp__freecrawl__extract',
-            'mcp__firecrawl__firecrawl_crawl': 'mcp__freecrawl__crawl',
-            'mcp__firecrawl__firecrawl_map': 'mcp__freecrawl__map',
-            'mcp__firecrawl__firecrawl_check_crawl_status': 'mcp__freecrawl__check_crawl_status',
-            'mcp__firecrawl__firecrawl_deep_research': 'mcp__freecrawl__deep_research',
-            'mcp__firecrawl__firecrawl_generate_llmstxt': 'mcp__freecrawl__generate_llmstxt',
-        }
+        # Renames and patterns of every spec, which apply side by side
+        self.tool_mappings: Dict[str, str] = {}
+        for spec in self.specs:
+            for old, new in spec.renames.items():
+                if self.tool_mappings.setdefault(old, new) != new:
+                    raise ValueError(f"{spec.name} renames {old} to {new}, another spec to {self.tool_mappings[old]}")
+        self.wildcard_patterns = [pattern for spec in self.specs for pattern in spec.patterns]
         
-        # Wildcard patterns for general replacements
-        self.wildcard_patterns = [
-            (r'mcp__firecrawl__\*', 'mcp__freecrawl__*'),
-            (r'mcp__firecrawl__firecrawl_([a-zA-Z_]+)', r'mcp__freecrawl__\1'),
-        ]
-    
-    def find_target_files(self) -> List[Path]:
-        """Find all files that might contain Firecrawl references."""
-        target_patterns = [
-            ".claude/agents/*.md",
-            ".claude/commands/**/*.md",
-            "ai_docs/*.md",
-            "**/*.md"  # Catch any other markdown files
+        # Every rule in one bytes pattern: tool mappings first, longest first,
+        # then the wildcard patterns in spec order. Group r<i> names rule i.
+        self.byte_rules = [
+            (re.compile(re.escape(old.encode('utf-8'))), new.encode('utf-8'))
+            for old, new in sorted(self.tool_mappings.items(), key=lambda item: len(item[0]), reverse=True)
+        ] + [
+            (re.compile(pattern.encode('utf-8')), replacement.encode('utf-8'))
+            for pattern, replacement in self.wildcard_patterns
         ]
+        # The rules' shared literal prefix goes in front of the alternation,
+        # so the regex engine scans for it like str.find() and only tries the
+        # rules where it occurs
+        sources = [rule.pattern.decode('utf-8') for rule, _ in self.byte_rules]
+        prefix = os.path.commonprefix([literal_prefix(source) for source in sources]) if sources else ''
+        try:
+            self.byte_pattern = re.compile(re.escape(prefix).encode('utf-8') + b'(?:%s)' % b'|'.join(
+                b'(?P<r%d>%s)' % (index, source[len(prefix):].encode('utf-8')) for index, source in enumerate(sources)
+            ) if sources else rb'(?!)')
+        except re.error as e:
+            raise ValueError(f"The migration patterns cannot be combined: {e}") from None
+        # Each rule's replacement template, its group references renumbered
+        # to point into the combined pattern, so that a match expands on its
+        # own; re-running the rule on the matched text alone would lose the
+        # context its lookarounds need
+        self.templates: List[bytes] = []
+        for index, (rule, template) in enumerate(self.byte_rules):
+            try:
+                self.templates.append(shift_template(template, self.byte_pattern.groupindex[f'r{index}'], rule.groups))
+            except ValueError as e:
+                raise ValueError(f"Invalid replacement for {rule.pattern.decode('utf-8')!r}: {e}") from None
+        # (old, new) as shown in the summary for each rule
+        self.rule_labels = [
+            (old, new) for old, new in sorted(self.tool_mappings.items(), key=lambda item: len(item[0]), reverse=True)
+        ] + list(self.wildcard_patterns)
         
-        files = set()
-        for pattern in target_patterns:
-            files.update(self.root_dir.glob(pattern))
+        # Frontmatter tools: rewrites, as (rule index, replacement entries)
+        self.tool_rewrites: Dict[bytes, Tuple[int, List[bytes]]] = {}
+        for spec in self.specs:
+            for old, new in spec.tools.items():
+                if old.encode('utf-8') in self.tool_rewrites:
+                    raise ValueError(f"{spec.name} rewrites tools entry {old}, which another spec already does")
+                self.tool_rewrites[old.encode('utf-8')] = (len(self.rule_labels), [tool.encode('utf-8') for tool in new])
+                self.rule_labels.append((old, ', '.join(new) or '(removed)'))
         
-        # Filter to only include files that actually contain mcp__firecrawl__
-        filtered_files = []
-        for file_path in files:
+        # Text that every reference contains, for ruling files out quickly;
+        # None when some spec has no such text and every file is analyzed
+        markers = {spec.marker() for spec in self.specs}
+        self.markers: Optional[List[bytes]] = None
+        if '' not in markers:
+            self.markers = [
+                marker.encode('utf-8') for marker in sorted(markers)
+                if not any(other != marker and other in marker for other in markers)
+            ]
+    
+    def has_marker(self, data) -> bool:
+        """Check whether raw bytes may contain a reference to migrate."""
+        return self.markers is None or any(data.find(marker) != -1 for marker in self.markers)
+    
+    def find_indexed_target_files(self) -> Optional[List[Path]]:
+        """Look up the markdown files containing references in the reference index.
+
+        Refreshing the index re-reads only files changed since it was last
+        used, and the lookup is exact, so no other file is read. Returns None
+        when some spec's references are not of a shape the index covers.
+        """
+        if self.markers is None:
+            return None
+        from reference_index import ReferenceIndex
+
+        with ReferenceIndex(self.root_dir) as index:
+            reindexed, removed = index.refresh()
+            logger.info(f"Reference index refreshed: {reindexed} files re-read, {removed} removed")
+            files = index.files_containing(marker.decode('utf-8') for marker in self.markers)
+        if files is None:
+            return None
+        return sorted(path for path in files if self.is_selected(path.relative_to(self.root_dir).as_posix()))
+    
+    def _excluded(self, name: str, rel_path: str) -> bool:
+        return bool(self.exclude_pattern.match(name) or self.exclude_pattern.match(rel_path))
+    
+    def is_selected(self, rel_path: str) -> bool:
+        """Check a root-relative path against the include and exclude rules."""
+        parts = rel_path.split('/')
+        for depth, name in enumerate(parts, 1):
+            if self._excluded(name, '/'.join(parts[:depth])):
+                return False
+        return bool(self.include_pattern.match(parts[-1]) or self.include_pattern.match(rel_path))
+    
+    def iter_candidate_files(self) -> Iterator[Tuple[Path, os.stat_result]]:
+        """Walk the tree once, yielding (path, stat) for every included file.
+        
+        Excluded directories are pruned without being entered, and file
+        metadata comes from the os.scandir() entries. Symlinked directories
+        are not followed.
+        """
+        for rel_path, entry in walk_tree(
+            self.root_dir,
+            skip_dir=self._excluded,
+            select_file=lambda name, rel_path: not self._excluded(name, rel_path) and bool(
+                self.include_pattern.match(name) or self.include_pattern.match(rel_path)),
+            on_error=lambda e: logger.warning(f"Skipping {e.filename}: {e}")
+        ):
             try:
-                content = file_path.read_text(encoding='utf-8')
-                if 'mcp__firecrawl__' in content:
-                    filtered_files.append(file_path)
-            except (UnicodeDecodeError, PermissionError) as e:
-                logger.warning(f"Skipping {file_path}: {e}")
+                if entry.is_file():
+                    yield self.root_dir / rel_path, entry.stat()
+            except OSError as e:
+                logger.warning(f"Skipping {rel_path}: {e}")
+    
+    def _label(self, candidate: Tuple[Path, os.stat_result]) -> str:
+        return candidate[0].relative_to(self.root_dir).as_posix()
+    
+    def _probe(self, candidate: Tuple[Path, os.stat_result]) -> Optional[Path]:
+        # Small files are read whole and kept for analyze_file(); large ones
+        # are only searched through a memory map
+        file_path, st = candidate
+        self.metrics.count("files probed")
+        try:
+            with open(file_path, 'rb') as f:
+                if st.st_size >= STREAMING_THRESHOLD:
+                    with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                        return file_path if self.has_marker(data) else None
+                content = f.read()
+        except (OSError, ValueError) as e:
+            logger.warning(f"Skipping {file_path}: {e}")
+            return None
+        if not self.has_marker(content):
+            return None
+        self._read_ahead[file_path] = (content, st)
+        return file_path
+    
+    def find_target_files(self) -> List[Path]:
+        """Find all files that contain references to migrate.
+        
+        One pruned walk selects files by the include/exclude rules, and the
+        files are probed for references on a thread pool.
+        """
+        if self.use_index:
+            files = self.find_indexed_target_files()
+            if files is not None:
+                return files
+            logger.warning("The reference index cannot look up these migrations, scanning files instead")
         
-        return sorted(filtered_files)
+        found = map_parallel(self._probe, self.iter_candidate_files(), self.jobs, chunksize=16,
+                             metrics=self.metrics, phase="find target files", label=self._label)
+        return sorted(file_path for file_path in found if file_path is not None)
     
     def analyze_file(self, file_path: Path) -> Optional[FileChange]:
-        """Analyze a file for potential replacements."""
+        """Analyze a file for potential replacements.
+        
+        The returned FileChange carries the byte-offset edits along with the
+        size, mtime and hash of the contents they were computed from, so
+        apply_changes() does not need to read or search the file again.
+        """
         try:
-            content = file_path.read_text(encoding='utf-8')
-            original_content = content
-            replacements = []
-            
-            # Apply direct tool mappings
-            for old_tool, new_tool in self.tool_mappings.items():
-                if old_tool in content:
-                    count = content.count(old_tool)
-                    content = content.replace(old_tool, new_tool)
-                    replacements.append((old_tool, new_tool, count))
-            
-            # Apply wildcard pattern replacements
-            for pattern, replacement in self.wildcard_patterns:
-                matches = re.findall(pattern, content)
-                if matches:
-                    new_content = re.sub(pattern, replacement, content)
-                    if new_content != content:
-                        # Count approximate matches for reporting
-                        count = len(matches)
-                        replacements.append((pattern, replacement, count))
-                        content = new_content
-            
-            if content != original_content:
-                total_changes = sum(count for _, _, count in replacements)
-                return FileChange(file_path, replacements, total_changes)
-            
-            return None
+            snapshot = self._read_ahead.pop(file_path, None)
+            if snapshot is None:
+                with open(file_path, 'rb') as f:
+                    st = os.fstat(f.fileno())
+                    if st.st_size >= STREAMING_THRESHOLD:
+                        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                            return self._analyze_bytes(file_path, data, st, keep_content=False)
+                    snapshot = (f.read(), st)
+            return self._analyze_bytes(file_path, *snapshot, keep_content=True)
             
         except Exception as e:
             logger.error(f"Error analyzing {file_path}: {e}")
             return None
     
+    def _analyze_bytes(self, file_path: Path, data, st: os.stat_result, keep_content: bool) -> Optional[FileChange]:
+        edits = []
+        counts: Dict[int, int] = {}
+        for start, end, replacement, rules in self._iter_rule_edits(data):
+            edits.append((start, end, replacement))
+            for index in rules:
+                counts[index] = counts.get(index, 0) + 1
+        if not edits:
+            return None
+        
+        replacements = [(*self.rule_labels[index], count) for index, count in sorted(counts.items())]
+        return FileChange(
+            file_path,
+            replacements,
+            sum(counts.values()),
+            edits=edits,
+            size=st.st_size,
+            mtime_ns=st.st_mtime_ns,
+            sha256=hashlib.sha256(data).hexdigest(),
+            content=bytes(data) if keep_content else None,
+        )
+    
+    def _iter_rule_edits(self, data) -> Iterator[Tuple[int, int, bytes, Tuple[int, ...]]]:
+        # Yields (start, end, replacement, indexes of the rules applied). The
+        # frontmatter tools: list is rewritten as one edit, and matches inside
+        # it are left to that edit.
+        tools_edit = self._tools_edit(data)
+        for match in self.byte_pattern.finditer(data):
+            start, end = match.span()
+            if tools_edit is not None:
+                if start < tools_edit[1] and end > tools_edit[0]:
+                    continue
+                if start >= tools_edit[1]:
+                    yield tools_edit
+                    tools_edit = None
+            yield start, end, self._expand(match), (int(match.lastgroup[1:]),)
+        if tools_edit is not None:
+            yield tools_edit
+    
+    def _expand(self, match: re.Match) -> bytes:
+        template = self.templates[int(match.lastgroup[1:])]
+        # Renames are plain names, with nothing to expand
+        return match.expand(template) if b'\\' in template else template
+    
+    def _tools_edit(self, data) -> Optional[Tuple[int, int, bytes, Tuple[int, ...]]]:
+        """Rewrite the frontmatter tools: list, if any rule applies to it.
+        
+        Entries are rewritten by the specs' tools rules or else by the
+        combined matcher; every other byte of the line is kept as it was,
+        separators, spacing, quoting and flow-list brackets included. An
+        entry is dropped only when a rewrite makes it a duplicate of an
+        earlier one. A list left empty is written as [] so the agent does
+        not fall back to every tool.
+        """
+        frontmatter = FRONTMATTER_PATTERN.match(data)
+        if frontmatter is None:
+            return None
+        line = TOOLS_LINE_PATTERN.search(data, frontmatter.start(1), frontmatter.end(1))
+        if line is None:
+            return None
+        
+        value = line.group(1)
+        flow = value.startswith(b'[') and value.endswith(b']')
+        parts: List[Optional[bytes]] = (value[1:-1] if flow else value).split(b',')
+        rules: List[int] = []
+        seen: Dict[bytes, bool] = {}  # Entry -> whether a rewrite produced it
+        for position, part in enumerate(parts):
+            entry = part.strip()
+            if not entry:
+                continue
+            quote = entry[:1] if len(entry) > 1 and entry[:1] in b'"\'' and entry[-1:] == entry[:1] else b''
+            name = entry[len(quote):len(entry) - len(quote)]
+            rewrite = self.tool_rewrites.get(name)
+            if rewrite is not None:
+                index, names = rewrite
+                rules.append(index)
+            else:
+                pieces, offset = [], 0
+                for match in self.byte_pattern.finditer(name):
+                    pieces += (name[offset:match.start()], self._expand(match))
+                    rules.append(int(match.lastgroup[1:]))
+                    offset = match.end()
+                if not pieces:
+                    if seen.get(name):
+                        parts[position] = None  # An earlier rewrite already produced it
+                    else:
+                        seen.setdefault(name, False)
+                    continue
+                names = [b''.join(pieces) + name[offset:]]
+            kept = [new_name for new_name in dict.fromkeys(names) if new_name not in seen]
+            seen.update(dict.fromkeys(kept, True))
+            lead = part[:len(part) - len(part.lstrip())]
+            trail = part[len(part.rstrip()):]
+            parts[position] = lead + b', '.join(quote + new_name + quote for new_name in kept) + trail if kept else None
+        if not rules:
+            return None
+        
+        new_value = b','.join(part for part in parts if part is not None)
+        if parts[0] is None:
+            # The first entry went; the next one moves up without its leading space
+            new_value = new_value.lstrip(b' \t')
+        if flow or not new_value.strip():
+            new_value = b'[' + new_value + b']'
+        return line.start(1), line.end(1), new_value, tuple(rules)
+    
+    def iter_edits(self, data) -> Iterator[Tuple[int, int, bytes]]:
+        """Yield (start, end, replacement) for every reference in raw bytes."""
+        for start, end, replacement, _ in self._iter_rule_edits(data):
+            yield start, end, replacement
+    
+    def unchanged_since_analysis(self, file_change: FileChange) -> bool:
+        """Check that a file still holds the contents its edits were computed from.
+        
+        Matching size and mtime are trusted; otherwise the file is hashed, so a
+        file that was only touched is still updated.
+        """
+        st = file_change.file_path.stat()
+        if st.st_size != file_change.size:
+            return False
+        if st.st_mtime_ns == file_change.mtime_ns:
+            return True
+        with open(file_change.file_path, 'rb') as f:
+            return hashlib.file_digest(f, 'sha256').hexdigest() == file_change.sha256
+    
     def apply_changes(self, file_change: FileChange) -> bool:
         """Apply changes to a file."""
         try:
-            # Create backup if requested
-            if self.backup:
-                backup_path = file_change.file_path.with_suffix(
-                    file_change.file_path.suffix + '.backup'
-                )
-                shutil.copy2(file_change.file_path, backup_path)
-                logger.info(f"Created backup: {backup_path}")
+            if not self.unchanged_since_analysis(file_change):
+                logger.warning(f"Not updating {file_change.file_path}: it changed after it was analyzed")
+                return False
             
-            # Read current content
-            content = file_change.file_path.read_text(encoding='utf-8')
-            
-            # Apply all replacements
-            for old_tool, new_tool in self.tool_mappings.items():
-                content = content.replace(old_tool, new_tool)
-            
-            for pattern, replacement in self.wildcard_patterns:
-                content = re.sub(pattern, replacement, content)
+            # The backup, if requested, is taken just before the new contents replace the file
+            with RewriteTransaction(backup_suffix='.backup' if self.backup else None,
+                                    dry_run=self.dry_run) as transaction:
+                if file_change.content is None:
+                    # Large files are streamed through a memory map
+                    transaction.rewrite(file_change.file_path, lambda data: iter(file_change.edits))
+                else:
+                    transaction.write(file_change.file_path, splice_edits(file_change.content, file_change.edits))
             
+            for backup_path in transaction.backups:
+                logger.info(f"Created backup: {backup_path}")
             if not self.dry_run:
-                file_change.file_path.write_text(content, encoding='utf-8')
                 logger.info(f"Updated {file_change.file_path}")
             
             return True
@@ -184,9 +608,15 @@ class FirecrawlReplacer:
             logger.error(f"Error applying changes to {file_change.file_path}: {e}")
             return False
     
-    def generate_summary_table(self) -> Table:
+    @property
+    def title(self) -> str:
+        return " + ".join(spec.description or spec.name for spec in self.specs)
+    
+    def generate_summary_table(self):
         """Generate a summary table of all changes."""
-        table = Table(title="Firecrawl → FreeCrawl Replacement Summary")
+        from rich.table import Table
+
+        table = Table(title=f"{self.title} Replacement Summary")
         table.add_column("File", style="cyan")
         table.add_column("Changes", justify="right", style="green")
         table.add_column("Details", style="yellow")
@@ -208,78 +638,179 @@ class FirecrawlReplacer:
         
         return table
     
+    def _file_record(self, file_change: FileChange) -> dict:
+        return {
+            "changes": file_change.total_changes,
+            "replacements": [
+                {"old": old, "new": new, "count": count} for old, new, count in file_change.replacements
+            ],
+        }
+    
+    def summary(self, files: bool = True) -> dict:
+        """The outcome of run() as --json prints it, or of stream() without the files."""
+        summary = {
+            "migrations": [spec.name for spec in self.specs],
+            "dry_run": self.dry_run,
+            "target_files": self.target_count,
+            "files_to_change": self.changed_count,
+            "changes": self.change_count,
+            "files_updated": self.updated_count,
+        }
+        if files:
+            summary["files"] = [
+                {"file": file_change.file_path.relative_to(self.root_dir).as_posix(), **self._file_record(file_change)}
+                for file_change in self.file_changes
+            ]
+        return summary
+    
+    def _migrate(self, candidate: Tuple[Path, Optional[os.stat_result]]) -> Optional[Tuple[Optional[FileChange], bool]]:
+        # One file from probe to rewrite, for stream(). Returns None for a
+        # file without references, else (change or None, whether it was written)
+        file_path, st = candidate
+        if st is not None and self._probe(candidate) is None:
+            return None
+        file_change = self.analyze_file(file_path)
+        if file_change is None or self.dry_run:
+            return file_change, False
+        return file_change, self.apply_changes(file_change)
+    
+    def stream(self, events: EventStream) -> int:
+        """Migrate file by file, reporting each changed file to events as it is done.
+        
+        Probing, analysis and rewriting of a file happen together on the
+        thread pool, and nothing is kept once the file is reported, so memory
+        stays bounded however many files change. There is no confirmation
+        step: callers set force or dry_run.
+        """
+        candidates = None
+        if self.use_index:
+            with self.metrics.timer("find target files"):
+                targets = self.find_indexed_target_files()
+            if targets is None:
+                logger.warning("The reference index cannot look up these migrations, scanning files instead")
+            else:
+                # Index hits are known targets, so they skip the probe
+                candidates = [(file_path, None) for file_path in targets]
+                self.target_count = len(targets)
+        
+        updated = 0
+        with self.metrics.timer("migrate files"):
+            for candidate, outcome, error in run_parallel(
+                self._migrate, candidates if candidates is not None else self.iter_candidate_files(), self.jobs,
+                metrics=self.metrics, phase="migrate files", label=self._label
+            ):
+                relative_path = self._label(candidate)
+                if error is not None:
+                    events.file("error", relative_path, error=str(error))
+                    continue
+                if outcome is None:
+                    continue
+                if candidates is None:
+                    self.target_count += 1
+                file_change, applied = outcome
+                if file_change is None:
+                    continue
+                self.changed_count += 1
+                self.change_count += file_change.total_changes
+                if self.dry_run:
+                    action = "would-update"
+                elif applied:
+                    action = "updated"
+                    updated += 1
+                else:
+                    action = "failed"
+                events.file(action, relative_path, **self._file_record(file_change))
+        
+        if not self.dry_run:
+            self.updated_count = updated
+        self.metrics.count("target files", self.target_count)
+        self.metrics.count("files to change", self.changed_count)
+        self.metrics.count("changes", self.change_count)
+        if self.updated_count is not None:
+            self.metrics.count("files updated", self.updated_count)
+        return 0
+    
     def run(self) -> int:
         """Execute the replacement process."""
-        console.print(Panel.fit(
-            "🔄 Firecrawl → FreeCrawl Tool Replacement",
-            style="bold blue"
-        ))
+        if not console.quiet:
+            from rich.panel import Panel
+
+            console.print(Panel.fit(
+                f"🔄 {self.title} Tool Replacement",
+                style="bold blue"
+            ))
         
         if self.dry_run:
             console.print("🔍 Running in DRY RUN mode - no files will be modified")
         
         # Find target files
-        with Progress(
-            SpinnerColumn(),
-            TextColumn("[progress.description]{task.description}"),
-            console=console
-        ) as progress:
+        with make_progress(console) as progress:
             task = progress.add_task("Scanning for target files...", total=None)
-            target_files = self.find_target_files()
-            progress.update(task, completed=100)
+            with self.metrics.timer("find target files"):
+                target_files = self.find_target_files()
+            progress.update(task, total=len(target_files), completed=len(target_files))
+        self.target_count = len(target_files)
+        self.metrics.count("target files", len(target_files))
         
-        console.print(f"📁 Found {len(target_files)} files with Firecrawl references")
+        console.print(f"📁 Found {len(target_files)} files with references to migrate")
         
         if not target_files:
             console.print("✅ No files need updating!")
             return 0
         
         # Analyze files
-        with Progress(
-            SpinnerColumn(),
-            TextColumn("[progress.description]{task.description}"),
-            console=console
-        ) as progress:
+        with make_progress(console) as progress:
             task = progress.add_task("Analyzing files...", total=len(target_files))
             
-            for file_path in target_files:
-                file_change = self.analyze_file(file_path)
-                if file_change:
-                    self.file_changes.append(file_change)
-                progress.advance(task)
+            analyze_file = self.metrics.timed("analyze files", self.analyze_file,
+                                              lambda file_path: file_path.relative_to(self.root_dir).as_posix())
+            with self.metrics.timer("analyze files"):
+                for file_path in target_files:
+                    file_change = analyze_file(file_path)
+                    if file_change:
+                        self.file_changes.append(file_change)
+                    progress.advance(task)
         
         if not self.file_changes:
             console.print("✅ No changes needed!")
             return 0
         
         # Show summary
-        console.print(self.generate_summary_table())
+        if not console.quiet:
+            console.print(self.generate_summary_table())
         
-        total_files = len(self.file_changes)
-        total_changes = sum(fc.total_changes for fc in self.file_changes)
+        total_files = self.changed_count = len(self.file_changes)
+        total_changes = self.change_count = sum(fc.total_changes for fc in self.file_changes)
+        self.metrics.count("files to change", total_files)
+        self.metrics.count("changes", total_changes)
         
         console.print(f"\n📊 Summary: {total_changes} changes across {total_files} files")
         
         # Confirm changes in non-dry-run mode
         if not self.dry_run and not self.force:
+            from rich.prompt import Confirm
+
             if not Confirm.ask("Apply these changes?"):
                 console.print("❌ Operation cancelled")
                 return 1
         
         # Apply changes
         if not self.dry_run:
-            with Progress(
-                SpinnerColumn(),
-                TextColumn("[progress.description]{task.description}"),
-                console=console
-            ) as progress:
+            with make_progress(console) as progress:
                 task = progress.add_task("Applying changes...", total=len(self.file_changes))
                 
                 success_count = 0
-                for file_change in self.file_changes:
-                    if self.apply_changes(file_change):
-                        success_count += 1
-                    progress.advance(task)
+                apply_changes = self.metrics.timed(
+                    "apply changes", self.apply_changes,
+                    lambda file_change: file_change.file_path.relative_to(self.root_dir).as_posix()
+                )
+                with self.metrics.timer("apply changes"):
+                    for file_change in self.file_changes:
+                        if apply_changes(file_change):
+                            success_count += 1
+                        progress.advance(task)
+            self.updated_count = success_count
+            self.metrics.count("files updated", success_count)
             
             console.print(f"✅ Successfully updated {success_count}/{total_files} files")
             
@@ -290,30 +821,40 @@ class FirecrawlReplacer:
         
         return 0
 
-@app.command()
-def main(
-    dry_run: bool = typer.Option(
-        False, 
-        "--dry-run", 
-        help="Preview changes without modifying files"
-    ),
-    backup: bool = typer.Option(
-        False, 
-        "--backup", 
-        help="Create backup files before modification"
-    ),
-    force: bool = typer.Option(
-        False,
-        "--force",
-        help="Skip confirmation prompt"
-    ),
-    root_dir: Optional[str] = typer.Option(
-        None,
-        "--root-dir",
-        help="Root directory to search (defaults to current directory)"
-    )
-) -> None:
-    """Replace Firecrawl MCP tools with FreeCrawl equivalents across the codebase."""
+# The engine's name before it ran other migrations
+FirecrawlReplacer = ToolMigrator
+
+def run_cli(
+    dry_run: bool = False,
+    backup: bool = False,
+    force: bool = False,
+    root_dir: Optional[str] = None,
+    index: bool = False,
+    include: Optional[List[str]] = None,
+    exclude: Optional[List[str]] = None,
+    jobs: Optional[int] = None,
+    spec: Optional[List[str]] = None,
+    show_metrics: bool = False,
+    quiet: bool = False,
+    json_output: bool = False,
+    ndjson: bool = False,
+    profile: bool = False,
+    profile_top: int = 10,
+    trace_json: Optional[str] = None,
+    cprofile: Optional[str] = None
+) -> int:
+    """Run the command line's migration and return its exit status."""
+    if json_output and ndjson:
+        console.error("[red]❌ --json and --ndjson cannot be combined[/red]")
+        return 2
+    events = EventStream("replace_firecrawl") if ndjson else None
+    console.quiet = quiet or json_output or ndjson
+    if console.quiet:
+        logging.getLogger().setLevel(logging.WARNING)
+        if not (force or dry_run):
+            console.error("[red]❌ --quiet, --json and --ndjson cannot ask for confirmation; "
+                          "add --force or --dry-run[/red]")
+            return 2
     
     # Determine root directory
     if root_dir:
@@ -322,31 +863,175 @@ def main(
         root_path = Path.cwd()
     
     if not root_path.exists():
-        console.print(f"❌ Directory does not exist: {root_path}", style="red")
-        raise typer.Exit(1)
+        console.error(f"[red]❌ Directory does not exist: {root_path}[/red]")
+        return 1
     
     # Validate we're in the right place
     if not (root_path / ".claude").exists():
-        console.print(
-            f"⚠️  Warning: No .claude directory found in {root_path}\n"
-            "This might not be a Claude Code project directory.",
-            style="yellow"
-        )
-        if not Confirm.ask("Continue anyway?"):
-            raise typer.Exit(1)
+        if console.quiet:
+            # --force stands in for the answer a quiet run cannot be asked for
+            if not force:
+                console.error(f"[red]❌ No .claude directory found in {root_path}[/red]")
+                return 1
+        else:
+            from rich.prompt import Confirm
+
+            console.print(
+                f"⚠️  Warning: No .claude directory found in {root_path}\n"
+                "This might not be a Claude Code project directory.",
+                style="yellow"
+            )
+            if not Confirm.ask("Continue anyway?"):
+                return 1
+    
+    try:
+        specs = [load_migration(value) for value in spec or []]
+        replacer = ToolMigrator(root_path, dry_run=dry_run, backup=backup, force=force, use_index=index,
+                                include=include, exclude=exclude, jobs=jobs, specs=specs)
+    except (OSError, ValueError) as e:
+        console.error(f"[red]❌ Invalid migration spec: {e}[/red]")
+        return 1
     
+    session = ProfileSession(replacer.metrics, profile, profile_top, trace_json, cprofile, "replace_firecrawl.py")
+    session.start()
     try:
-        replacer = FirecrawlReplacer(root_path, dry_run=dry_run, backup=backup, force=force)
-        exit_code = replacer.run()
-        sys.exit(exit_code)
+        exit_code = replacer.run() if events is None else replacer.stream(events)
+        if json_output or events is not None:
+            summary = replacer.summary(files=events is None)
+            if show_metrics:
+                summary["metrics"] = replacer.metrics.as_dict()
+            if events is not None:
+                events.summary(**summary)
+            else:
+                print(json.dumps(summary))
+        return exit_code
         
     except KeyboardInterrupt:
-        console.print("\n❌ Operation cancelled by user", style="red")
-        raise typer.Exit(1)
+        console.error("\n[red]❌ Operation cancelled by user[/red]")
+        return 1
     except Exception as e:
-        console.print(f"❌ Error: {e}", style="red")
+        console.error(f"[red]❌ Error: {e}[/red]")
         logger.exception("Unexpected error occurred")
-        raise typer.Exit(1)
+        if events is not None:
+            events.error(str(e))
+        return 1
+    finally:
+        if show_metrics and not console.quiet:
+            console.print(replacer.metrics.table("Migration Metrics"))
+        session.finish(console)
+
+
+def build_app():
+    """Create the typer app; typer is imported here rather than with the module."""
+    import typer
+    
+    app = typer.Typer(help="Replace Firecrawl MCP tools with FreeCrawl equivalents, or run other tool migrations")
+    
+    @app.command()
+    def main(
+        dry_run: bool = typer.Option(
+            False, 
+            "--dry-run", 
+            help="Preview changes without modifying files"
+        ),
+        backup: bool = typer.Option(
+            False, 
+            "--backup", 
+            help="Create backup files before modification"
+        ),
+        force: bool = typer.Option(
+            False,
+            "--force",
+            help="Skip confirmation prompt"
+        ),
+        root_dir: Optional[str] = typer.Option(
+            None,
+            "--root-dir",
+            help="Root directory to search (defaults to current directory)"
+        ),
+        index: bool = typer.Option(
+            False,
+            "--index",
+            help="Find target files through the persistent reference index instead of reading every markdown file"
+        ),
+        include: Optional[List[str]] = typer.Option(
+            None,
+            "--include",
+            help=f"Shell-style pattern for files to search, matched against the name or root-relative path; "
+                 f"repeatable (default: {', '.join(DEFAULT_INCLUDE)})"
+        ),
+        exclude: Optional[List[str]] = typer.Option(
+            None,
+            "--exclude",
+            help=f"Shell-style pattern for files or directories to skip; repeatable, "
+                 f"added to the defaults ({', '.join(DEFAULT_EXCLUDE)})"
+        ),
+        jobs: Optional[int] = typer.Option(
+            None,
+            "--jobs",
+            "-j",
+            min=1,
+            help="Number of threads probing files for references"
+        ),
+        spec: Optional[List[str]] = typer.Option(
+            None,
+            "--spec",
+            help=f"Migration to run: a JSON spec file or a built-in name ({', '.join(BUILTIN_MIGRATIONS)}); "
+                 f"repeatable, all run in one pass (default: {FIRECRAWL_MIGRATION.name})"
+        ),
+        show_metrics: bool = typer.Option(
+            False,
+            "--metrics",
+            help="Show phase timings and file counts when done"
+        ),
+        quiet: bool = typer.Option(
+            False,
+            "--quiet",
+            "-q",
+            help="Print only failures, on stderr; needs --force or --dry-run"
+        ),
+        json_output: bool = typer.Option(
+            False,
+            "--json",
+            help="Print a JSON summary instead of tables; needs --force or --dry-run"
+        ),
+        ndjson: bool = typer.Option(
+            False,
+            "--ndjson",
+            help="Migrate file by file, streaming one JSON line per changed or failed file and then a summary "
+                 "line; needs --force or --dry-run"
+        ),
+        profile: bool = typer.Option(
+            False,
+            "--profile",
+            help="Show phase spans, per-file latency histograms and the slowest files when done"
+        ),
+        profile_top: int = typer.Option(
+            10,
+            "--profile-top",
+            min=1,
+            help="Number of slowest files --profile lists"
+        ),
+        trace_json: Optional[str] = typer.Option(
+            None,
+            "--trace-json",
+            help="Write phase spans and per-file timings as a Chrome trace-event file"
+        ),
+        cprofile: Optional[str] = typer.Option(
+            None,
+            "--cprofile",
+            help="Run under cProfile and save its statistics to this path (main thread only)"
+        )
+    ) -> None:
+        """Replace Firecrawl MCP tools with FreeCrawl equivalents across the codebase."""
+        raise typer.Exit(run_cli(
+            dry_run=dry_run, backup=backup, force=force, root_dir=root_dir, index=index, include=include,
+            exclude=exclude, jobs=jobs, spec=spec, show_metrics=show_metrics, quiet=quiet, json_output=json_output,
+            ndjson=ndjson, profile=profile, profile_top=profile_top, trace_json=trace_json, cprofile=cprofile
+        ))
+    
+    return app
+
 
 if __name__ == "__main__":
-    app()
\ No newline at end of file
+    build_app()()
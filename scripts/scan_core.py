@@ -0,0 +1,1133 @@
+"""
+Shared scanning and rewriting core for the maintenance scripts.
+
+install.py, rename_agents.py, replace_firecrawl.py, update_agent_frontmatter.py
+and reference_index.py all walk trees, rewrite files, fan work out to pools
+and report progress. This module holds the single implementation of each, so
+an optimization made here speeds up every tool:
+
+- walk_tree(): pruned os.scandir walk
+- write_file_atomic(), rewrite_mapped_file(), splice_edits(): atomic rewrites,
+  the latter streaming large files through a memory map
+- RewriteTransaction: stage rewrites of several files, optionally back the
+  originals up, then swap them all in
+- run_parallel(), map_parallel(): bounded thread or process pools
+- Metrics: counters and timers for a run, and with tracing enabled, phase
+  spans and per-file latencies for Chrome trace files and profile reports
+- ProfileSession, add_profile_arguments(): the --profile, --trace-json and
+  --cprofile options
+- LazyConsole, make_progress(): the console and progress bar every script
+  shows, neither of which imports rich before it is first used
+- LazyLogger: a module logger that imports and configures logging when it
+  first logs
+- EventStream: the --ndjson record per file operation and final summary
+- TreeWatcher, add_watch_arguments(): debounced batches of changed files,
+  from inotify or polling, and the --watch options
+
+The scripts import it as a sibling module, as they do reference_index.py.
+Importing it stays cheap: pools, json and rich are imported where used, so
+a --quiet or --json run that needs none of them never loads them.
+"""
+
+import mmap
+import os
+import stat
+import sys
+import threading
+import time
+from collections import Counter, deque
+from contextlib import contextmanager
+from itertools import chain, islice
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Set, Tuple
+
+# Ordered (start, end, replacement) byte spans to apply to a file
+Edits = Iterable[Tuple[int, int, bytes]]
+
+
+def walk_tree(
+    root: Path,
+    skip_dir: Optional[Callable[[str, str], bool]] = None,
+    select_file: Optional[Callable[[str, str], bool]] = None,
+    on_error: Optional[Callable[[OSError], None]] = None
+) -> Iterator[Tuple[str, os.DirEntry]]:
+    """Walk root lazily, yielding (relative_posix_path, entry) for each selected file.
+
+    skip_dir(name, rel_path) prunes a directory before it is opened, and
+    select_file(name, rel_path) picks files; both default to everything.
+    All files of a directory are yielded before descending, subdirectories
+    in listing order, so memory is bounded by the tree's depth and fan-out.
+    Like os.walk, symlinked directories are not followed (nor yielded).
+    Stats come from the entries: entry.stat() costs no extra path lookup.
+
+    An unreadable directory raises, unless on_error is given, in which case
+    it receives the error and the walk goes on.
+    """
+    pending = [""]
+    while pending:
+        prefix = pending.pop()
+        subdirs = []
+        try:
+            with os.scandir(root / prefix if prefix else root) as entries:
+                for entry in entries:
+                    rel_path = prefix + entry.name
+                    try:
+                        is_dir = entry.is_dir()
+                    except OSError:
+                        is_dir = False
+                    if is_dir:
+                        if not entry.is_symlink() and (skip_dir is None or not skip_dir(entry.name, rel_path)):
+                            subdirs.append(rel_path + "/")
+                    elif select_file is None or select_file(entry.name, rel_path):
+                        yield rel_path, entry
+        except OSError as e:
+            if on_error is None:
+                raise
+            on_error(e)
+        pending.extend(reversed(subdirs))
+
+
+def _tmp_path_for(path: Path) -> Path:
+    # Unique per process and thread, next to path so os.replace() stays on one filesystem
+    return path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+
+
+def _copy_mode(source: Path, target: Path) -> None:
+    # shutil.copymode() without importing shutil (and with it bz2 and lzma)
+    os.chmod(target, stat.S_IMODE(os.stat(source).st_mode))
+
+
+def write_file_atomic(path: Path, data: bytes) -> None:
+    """Replace path with data via a temporary file, keeping its permissions."""
+    tmp_path = _tmp_path_for(path)
+    try:
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        try:
+            _copy_mode(path, tmp_path)
+        except FileNotFoundError:
+            pass
+        os.replace(tmp_path, path)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+
+
+def splice_edits(content: bytes, edits: Edits) -> bytes:
+    """Return content with ordered (start, end, replacement) spans replaced."""
+    pieces = []
+    position = 0
+    for start, end, replacement in edits:
+        pieces.append(content[position:start])
+        pieces.append(replacement)
+        position = end
+    pieces.append(content[position:])
+    return b''.join(pieces)
+
+
+def _stream_edits(file_path: Path, find_edits: Callable[[mmap.mmap], Iterator[Tuple[int, int, bytes]]],
+                  tmp_path: Path) -> int:
+    # Writes file_path with its edits applied to tmp_path, which is created
+    # only once there is a first edit. Returns the number of edits.
+    out = None
+    edits = 0
+    try:
+        with open(file_path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            view = memoryview(data)
+            spans = find_edits(data)
+            try:
+                position = 0
+                for start, end, replacement in spans:
+                    if out is None:
+                        out = open(tmp_path, 'wb')
+                    out.write(view[position:start])
+                    out.write(replacement)
+                    position = end
+                    edits += 1
+                if out is not None:
+                    out.write(view[position:])
+                    out.close()
+            finally:
+                # The map cannot be closed while a view or regex scanner uses it
+                if hasattr(spans, 'close'):
+                    spans.close()
+                view.release()
+        if out is not None:
+            _copy_mode(file_path, tmp_path)
+    except BaseException:
+        if out is not None:
+            out.close()
+            tmp_path.unlink(missing_ok=True)
+        raise
+    return edits
+
+
+def rewrite_mapped_file(file_path: Path, find_edits: Callable[[mmap.mmap], Iterator[Tuple[int, int, bytes]]]) -> int:
+    """Apply byte-range edits to a file without loading it into memory.
+
+    The file is memory-mapped and find_edits yields ordered (start, end,
+    replacement) spans over it. Unchanged stretches are written straight
+    from the map into a temporary file next to the original, which then
+    atomically replaces it. A file without edits is left untouched.
+
+    Returns:
+        int: the number of edits applied
+    """
+    tmp_path = _tmp_path_for(file_path)
+    edits = _stream_edits(file_path, find_edits, tmp_path)
+    if edits:
+        try:
+            os.replace(tmp_path, file_path)
+        except BaseException:
+            tmp_path.unlink(missing_ok=True)
+            raise
+    return edits
+
+
+class RewriteTransaction:
+    """Stage rewrites of one or more files, then swap them all in.
+
+    write() and rewrite() only produce temporary files next to their
+    targets. commit() copies each original to `<name><backup_suffix>` when a
+    suffix is set, then os.replace()s the staged file over it, so a failure
+    while staging leaves every file untouched. Used as a context manager,
+    the transaction commits when the block succeeds and discards the staged
+    files when it raises. In dry-run mode nothing is written at all.
+    """
+
+    def __init__(self, backup_suffix: Optional[str] = None, dry_run: bool = False):
+        self.backup_suffix = backup_suffix
+        self.dry_run = dry_run
+        self.staged: Dict[Path, Path] = {}
+        self.backups: List[Path] = []
+
+    def __enter__(self) -> "RewriteTransaction":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None:
+            self.commit()
+        else:
+            self.abort()
+
+    def write(self, path: Path, data: bytes) -> None:
+        """Stage new contents for path."""
+        if self.dry_run:
+            return
+        tmp_path = _tmp_path_for(path)
+        try:
+            with open(tmp_path, 'wb') as f:
+                f.write(data)
+            try:
+                _copy_mode(path, tmp_path)
+            except FileNotFoundError:
+                pass
+        except BaseException:
+            tmp_path.unlink(missing_ok=True)
+            raise
+        self._stage(path, tmp_path)
+
+    def rewrite(self, path: Path, find_edits: Callable[[mmap.mmap], Iterator[Tuple[int, int, bytes]]]) -> int:
+        """Stage path with byte-range edits applied, streamed through a memory map.
+
+        Returns:
+            int: the number of edits; a file without any is not staged
+        """
+        if self.dry_run:
+            with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                spans = find_edits(data)
+                try:
+                    return sum(1 for _ in spans)
+                finally:
+                    if hasattr(spans, 'close'):
+                        spans.close()
+        tmp_path = _tmp_path_for(path)
+        edits = _stream_edits(path, find_edits, tmp_path)
+        if edits:
+            self._stage(path, tmp_path)
+        return edits
+
+    def _stage(self, path: Path, tmp_path: Path) -> None:
+        previous = self.staged.pop(path, None)
+        if previous is not None and previous != tmp_path:
+            previous.unlink(missing_ok=True)
+        self.staged[path] = tmp_path
+
+    def commit(self) -> List[Path]:
+        """Back up and replace every staged file; returns the files replaced."""
+        committed = []
+        try:
+            while self.staged:
+                path, tmp_path = next(iter(self.staged.items()))
+                if self.backup_suffix and path.exists():
+                    backup_path = path.with_name(path.name + self.backup_suffix)
+                    import shutil
+
+                    shutil.copy2(path, backup_path)
+                    self.backups.append(backup_path)
+                os.replace(tmp_path, path)
+                del self.staged[path]
+                committed.append(path)
+        finally:
+            self.abort()
+        return committed
+
+    def abort(self) -> None:
+        """Discard whatever is still staged."""
+        for tmp_path in self.staged.values():
+            tmp_path.unlink(missing_ok=True)
+        self.staged.clear()
+
+
+def default_jobs() -> int:
+    """Pick a worker count for I/O-bound work."""
+    return min(32, (os.cpu_count() or 1) + 4)
+
+
+def run_parallel(
+    func: Callable,
+    items: Iterable,
+    jobs: int,
+    max_pending: Optional[int] = None,
+    metrics: Optional["Metrics"] = None,
+    phase: str = "",
+    label: Callable[[Any], str] = str
+) -> Iterator[Tuple[object, object, Optional[OSError]]]:
+    """Apply func to each item, yielding (item, result, error) as calls complete.
+
+    Runs inline when jobs is 1; otherwise uses a thread pool of that size.
+    Items are pulled lazily and at most max_pending calls (default 4 per
+    worker) are in flight, so an unbounded iterable uses bounded memory.
+    OSErrors are returned per item; anything else propagates. When metrics
+    is tracing, each call is recorded as label(item) under phase.
+    """
+    if metrics is not None:
+        func = metrics.timed(phase, func, label)
+    if jobs <= 1:
+        for item in items:
+            try:
+                yield item, func(item), None
+            except OSError as e:
+                yield item, None, e
+        return
+
+    def outcome(future, item):
+        try:
+            return item, future.result(), None
+        except OSError as e:
+            return item, None, e
+
+    from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, as_completed, wait
+
+    max_pending = max_pending or jobs * 4
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        pending = {}
+        for item in items:
+            if len(pending) >= max_pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield outcome(future, pending.pop(future))
+            pending[executor.submit(func, item)] = item
+        for future in as_completed(pending):
+            yield outcome(future, pending[future])
+
+
+def map_parallel(
+    func: Callable,
+    items: Iterable,
+    jobs: int,
+    processes: bool = False,
+    chunksize: int = 1,
+    min_items: int = 0,
+    initializer: Optional[Callable] = None,
+    initargs: tuple = (),
+    metrics: Optional["Metrics"] = None,
+    phase: str = "",
+    label: Callable[[Any], str] = str
+) -> Iterator:
+    """Yield func(item) for each item, in order, from a thread or process pool.
+
+    Runs inline (calling initializer first) when jobs is 1 or there are
+    fewer than min_items items, where starting a pool would cost more than
+    it saves. Items are pulled lazily and sent in chunks of chunksize, with
+    at most 4 chunks per worker in flight, so an unbounded iterable uses
+    bounded memory. For processes, func must be a module-level function;
+    the initializer runs once per worker, so large shared state is sent
+    once rather than with every item. When metrics is tracing, each call is
+    recorded as label(item) under phase, in worker processes too.
+    """
+    tracing = metrics is not None and metrics.tracing
+    items = iter(items)
+    head = list(islice(items, min_items))
+    if jobs <= 1 or len(head) < min_items:
+        if initializer is not None:
+            initializer(*initargs)
+        yield from map(metrics.timed(phase, func, label) if tracing else func, chain(head, items))
+        return
+    from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+    if not processes:
+        executor_class, timed_func = ThreadPoolExecutor, metrics.timed(phase, func, label) if tracing else func
+    else:
+        # Workers time themselves and the timings travel back with the results
+        executor_class, timed_func = ProcessPoolExecutor, _TimedCall(func) if tracing else func
+
+    def results(chunk: list, future) -> Iterator:
+        if not (tracing and processes):
+            yield from future.result()
+            return
+        for item, (result, start_ns, end_ns, pid, tid) in zip(chunk, future.result()):
+            metrics.record_file(phase, label(item), start_ns, end_ns, pid, tid)
+            yield result
+
+    items = chain(head, items)
+    chunks = iter(lambda: list(islice(items, chunksize)), [])
+    with executor_class(max_workers=jobs, initializer=initializer, initargs=initargs) as executor:
+        pending = deque()
+        for chunk in chunks:
+            if len(pending) >= jobs * 4:
+                yield from results(*pending.popleft())
+            pending.append((chunk, executor.submit(_map_chunk, timed_func, chunk)))
+        while pending:
+            yield from results(*pending.popleft())
+
+
+def _map_chunk(func: Callable, chunk: list) -> list:
+    """Apply func to a chunk of items in a pool worker."""
+    return [func(item) for item in chunk]
+
+
+class _TimedCall:
+    # Picklable stand-in for func in worker processes, returning
+    # (result, start_ns, end_ns, pid, tid). perf_counter_ns() is a
+    # system-wide monotonic clock, so the times line up with the parent's.
+
+    def __init__(self, func: Callable):
+        self.func = func
+
+    def __call__(self, item):
+        start_ns = time.perf_counter_ns()
+        result = self.func(item)
+        return result, start_ns, time.perf_counter_ns(), os.getpid(), threading.get_native_id()
+
+
+class Metrics:
+    """Counters and accumulated wall-clock timers for one run; thread-safe.
+
+    With tracing enabled, every timer() block is also kept as a span and
+    per-file calls wrapped with timed() (or passed through run_parallel()
+    and map_parallel()) are recorded with their latency. Both go into
+    write_trace()'s Chrome trace and profile_tables()'s report. Tracing is
+    off by default, and then timed() hands back func itself, so per-file
+    work costs nothing extra.
+    """
+
+    # Upper bounds, in seconds, of the latency histogram buckets
+    LATENCY_BUCKETS = (1e-4, 1e-3, 1e-2, 1e-1, 1.0)
+
+    def __init__(self):
+        self.counters: Counter = Counter()
+        self.timings: Dict[str, float] = {}
+        self.tracing = False
+        self.events: List[dict] = []
+        self.file_times: Dict[str, List[Tuple[float, str]]] = {}
+        self._origin_ns = time.perf_counter_ns()
+        self._lock = threading.Lock()
+
+    def enable_tracing(self) -> None:
+        self.tracing = True
+
+    def count(self, name: str, amount: int = 1) -> None:
+        with self._lock:
+            self.counters[name] += amount
+
+    @contextmanager
+    def timer(self, name: str) -> Iterator[None]:
+        """Add the time spent in the block to the named timer."""
+        start_ns = time.perf_counter_ns()
+        try:
+            yield
+        finally:
+            end_ns = time.perf_counter_ns()
+            with self._lock:
+                self.timings[name] = self.timings.get(name, 0.0) + (end_ns - start_ns) / 1e9
+            if self.tracing:
+                self._add_event(name, "phase", start_ns, end_ns)
+
+    def timed(self, phase: str, func: Callable, label: Callable[[Any], str] = str) -> Callable:
+        """Return func recording each call's latency under phase, or func itself when not tracing."""
+        if not self.tracing:
+            return func
+
+        def call(item):
+            start_ns = time.perf_counter_ns()
+            try:
+                return func(item)
+            finally:
+                self.record_file(phase, label(item), start_ns, time.perf_counter_ns())
+        return call
+
+    def record_file(self, phase: str, label: str, start_ns: int, end_ns: int,
+                    pid: Optional[int] = None, tid: Optional[int] = None) -> None:
+        """Record one file's processing time, measured with time.perf_counter_ns()."""
+        with self._lock:
+            self.file_times.setdefault(phase, []).append(((end_ns - start_ns) / 1e9, label))
+        self._add_event(label, phase, start_ns, end_ns, pid, tid)
+
+    def _add_event(self, name: str, category: str, start_ns: int, end_ns: int,
+                   pid: Optional[int] = None, tid: Optional[int] = None) -> None:
+        # A Chrome trace "complete" event; times are in microseconds
+        event = {
+            "name": name,
+            "cat": category,
+            "ph": "X",
+            "ts": (start_ns - self._origin_ns) / 1000,
+            "dur": (end_ns - start_ns) / 1000,
+            "pid": pid or os.getpid(),
+            "tid": tid or threading.get_native_id(),
+        }
+        with self._lock:
+            self.events.append(event)
+
+    def as_dict(self) -> dict:
+        with self._lock:
+            return {"counters": dict(self.counters), "timings": dict(self.timings)}
+
+    def table(self, title: str = "Metrics"):
+        """Render the counters and timers as a rich Table."""
+        from rich.table import Table
+
+        table = Table(title=title)
+        table.add_column("Metric", style="cyan")
+        table.add_column("Value", justify="right", style="green")
+        data = self.as_dict()
+        for name, seconds in data["timings"].items():
+            table.add_row(name, f"{seconds * 1000:.1f} ms")
+        for name, value in data["counters"].items():
+            table.add_row(name, f"{value:,}")
+        return table
+
+    def write_trace(self, path: Path, process_name: str = "") -> None:
+        """Write the recorded spans and file calls as a Chrome trace-event file.
+
+        Open it in chrome://tracing or https://ui.perfetto.dev; each worker
+        thread or process gets its own lane.
+        """
+        with self._lock:
+            events = list(self.events)
+        metadata = []
+        if process_name:
+            metadata.append({"name": "process_name", "ph": "M", "pid": os.getpid(), "args": {"name": process_name}})
+        import json
+
+        trace = {"traceEvents": metadata + events, "displayTimeUnit": "ms", "otherData": self.as_dict()}
+        write_file_atomic(Path(path), json.dumps(trace).encode("utf-8"))
+
+    def profile_tables(self, top: int = 10) -> list:
+        """Render phase spans, per-file latency histograms and the slowest files as rich Tables."""
+        from rich.table import Table
+
+        with self._lock:
+            timings = dict(self.timings)
+            file_times = {phase: sorted(times, reverse=True) for phase, times in self.file_times.items()}
+
+        phases = Table(title="Phases")
+        phases.add_column("Phase", style="cyan", no_wrap=True)
+        phases.add_column("Total", justify="right", style="green")
+        phases.add_column("Files", justify="right")
+        phases.add_column("Mean", justify="right")
+        phases.add_column("p50", justify="right")
+        phases.add_column("p95", justify="right")
+        phases.add_column("Max", justify="right", style="yellow")
+        for name in [*timings, *(phase for phase in file_times if phase not in timings)]:
+            times = [seconds for seconds, _ in file_times.get(name, [])]
+            total = timings.get(name, sum(times))
+            if times:
+                ascending = times[::-1]
+                stats = [
+                    f"{len(times):,}",
+                    _format_seconds(sum(times) / len(times)),
+                    _format_seconds(ascending[(len(times) - 1) // 2]),
+                    _format_seconds(ascending[int((len(times) - 1) * 0.95)]),
+                    _format_seconds(times[0]),
+                ]
+            else:
+                stats = ["", "", "", "", ""]
+            phases.add_row(name, _format_seconds(total), *stats)
+        tables = [phases]
+
+        if file_times:
+            histogram = Table(title="Per-file latency")
+            histogram.add_column("Latency", style="cyan")
+            for phase in file_times:
+                histogram.add_column(phase, justify="right")
+            bounds = [0.0, *self.LATENCY_BUCKETS, float("inf")]
+            for low, high in zip(bounds, bounds[1:]):
+                if high == float("inf"):
+                    label = f">= {_format_bound(low)}"
+                elif low == 0.0:
+                    label = f"< {_format_bound(high)}"
+                else:
+                    label = f"{_format_bound(low)} - {_format_bound(high)}"
+                histogram.add_row(label, *(
+                    f"{sum(1 for seconds, _ in times if low <= seconds < high):,}" for times in file_times.values()
+                ))
+            tables.append(histogram)
+
+            slowest = Table(title=f"Slowest {top} files")
+            slowest.add_column("Phase", style="cyan")
+            slowest.add_column("File")
+            slowest.add_column("Time", justify="right", style="yellow")
+            ranked = sorted(
+                ((seconds, phase, label) for phase, times in file_times.items() for seconds, label in times[:top]),
+                reverse=True
+            )
+            for seconds, phase, label in ranked[:top]:
+                slowest.add_row(phase, label, _format_seconds(seconds))
+            tables.append(slowest)
+
+        return tables
+
+
+def _format_bound(seconds: float) -> str:
+    if seconds >= 1:
+        return f"{seconds:g} s"
+    if seconds >= 1e-3:
+        return f"{seconds * 1e3:g} ms"
+    return f"{seconds * 1e6:g} µs"
+
+
+def _format_seconds(seconds: float) -> str:
+    if seconds >= 1:
+        return f"{seconds:.2f} s"
+    if seconds >= 1e-3:
+        return f"{seconds * 1e3:.1f} ms"
+    return f"{seconds * 1e6:.0f} µs"
+
+
+class ProfileSession:
+    """Starts and reports what --profile, --trace-json and --cprofile ask for.
+
+    Call start() before the run and finish() after it, normally from a
+    finally block. cProfile only sees the main thread; run with one job to
+    have it include the per-file work.
+    """
+
+    def __init__(self, metrics: Metrics, show: bool = False, top: int = 10,
+                 trace_path: Optional[str] = None, cprofile_path: Optional[str] = None, name: str = ""):
+        self.metrics = metrics
+        self.show = show
+        self.top = top
+        self.trace_path = trace_path
+        self.cprofile_path = cprofile_path
+        self.name = name
+        self._profiler = None
+
+    @classmethod
+    def from_args(cls, metrics: Metrics, args, name: str = "") -> "ProfileSession":
+        """Build a session from the options add_profile_arguments() adds."""
+        return cls(metrics, args.profile, args.profile_top, args.trace_json, args.cprofile, name)
+
+    def start(self) -> None:
+        if self.show or self.trace_path:
+            self.metrics.enable_tracing()
+        if self.cprofile_path:
+            import cProfile
+
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+
+    def finish(self, console) -> None:
+        if self._profiler is not None:
+            self._profiler.disable()
+            self._profiler.dump_stats(self.cprofile_path)
+            self._profiler = None
+            console.print(f"[blue]cProfile statistics written to {self.cprofile_path}[/blue]")
+        if self.show and not getattr(console, "quiet", False):
+            for table in self.metrics.profile_tables(self.top):
+                console.print(table)
+        if self.trace_path:
+            try:
+                self.metrics.write_trace(Path(self.trace_path), self.name)
+                console.print(f"[blue]Trace written to {self.trace_path}[/blue]")
+            except OSError as e:
+                console.print(f"[yellow]⚠ Could not write trace {self.trace_path}: {e}[/yellow]")
+
+
+def add_profile_arguments(parser) -> None:
+    """Add --profile, --profile-top, --trace-json and --cprofile to an argparse parser."""
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Show phase spans, per-file latency histograms and the slowest files when done"
+    )
+    parser.add_argument(
+        "--profile-top",
+        type=int,
+        default=10,
+        metavar="N",
+        help="Number of slowest files --profile lists (default: 10)"
+    )
+    parser.add_argument(
+        "--trace-json",
+        metavar="PATH",
+        help="Write phase spans and per-file timings as a Chrome trace-event file"
+    )
+    parser.add_argument(
+        "--cprofile",
+        metavar="PATH",
+        help="Run under cProfile and save its statistics to PATH (main thread only)"
+    )
+
+
+class LazyConsole:
+    """Stands in for a rich Console, creating it (and importing rich) on first use.
+
+    While quiet is set, print() returns straight away without creating it,
+    so a run that only reports through --json, or not at all, never pays
+    for importing rich; error() still reports failures, on stderr. Any
+    other attribute is looked up on the Console.
+    """
+
+    def __init__(self, **kwargs):
+        self._kwargs = kwargs
+        self._console = None
+        self._quiet = False
+
+    @property
+    def quiet(self) -> bool:
+        return self._quiet
+
+    @quiet.setter
+    def quiet(self, value: bool) -> None:
+        self._quiet = value
+        if self._console is not None:
+            self._console.quiet = value
+
+    def rich(self):
+        """Return the underlying rich Console."""
+        if self._console is None:
+            from rich.console import Console
+
+            self._console = Console(quiet=self._quiet, **self._kwargs)
+        return self._console
+
+    def print(self, *objects, **kwargs) -> None:
+        if not self._quiet:
+            self.rich().print(*objects, **kwargs)
+
+    def error(self, message: str) -> None:
+        """Print a failure, which a quiet run still reports, as plain text on stderr."""
+        if not self._quiet:
+            self.rich().print(message)
+            return
+        # Failures are rare enough that parsing their markup may import rich
+        from rich.markup import render
+
+        print(render(message).plain, file=sys.stderr)
+
+    def __getattr__(self, name: str):
+        return getattr(self.rich(), name)
+
+
+class LazyLogger:
+    """Stands in for a logging.Logger, importing and configuring logging on first use.
+
+    The configuration is the one the scripts give logging.basicConfig(), so
+    a hook run that logs nothing never pays for importing logging. Levels
+    are given by name ("INFO", "WARNING"), which needs no import either.
+    """
+
+    FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+    def __init__(self, name: str, level: str = "INFO"):
+        self._name = name
+        self._level = level
+        self._logger = None
+
+    def set_root_level(self, level: str) -> None:
+        """Set the level of the root logger, now if logging is set up, otherwise once it is."""
+        self._level = level
+        if self._logger is not None:
+            import logging
+
+            logging.getLogger().setLevel(level)
+
+    def logger(self):
+        """Return the underlying logging.Logger."""
+        if self._logger is None:
+            import logging
+
+            logging.basicConfig(level=self._level, format=self.FORMAT)
+            self._logger = logging.getLogger(self._name)
+        return self._logger
+
+    def __getattr__(self, name: str):
+        return getattr(self.logger(), name)
+
+
+class _NullProgress:
+    # What make_progress() returns for a quiet console
+
+    def __enter__(self) -> "_NullProgress":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        pass
+
+    def add_task(self, *args, **kwargs) -> int:
+        return 0
+
+    def update(self, *args, **kwargs) -> None:
+        pass
+
+    def advance(self, *args, **kwargs) -> None:
+        pass
+
+
+def make_progress(console=None, transient: bool = False):
+    """The progress bar the scripts share: spinner, description, bar, count and elapsed time.
+
+    A quiet console gets a stand-in that shows nothing and imports nothing.
+    """
+    if isinstance(console, LazyConsole):
+        if console.quiet:
+            return _NullProgress()
+        console = console.rich()
+    elif console is not None and getattr(console, "quiet", False):
+        return _NullProgress()
+
+    from rich.progress import BarColumn, MofNCompleteColumn, Progress, SpinnerColumn, TextColumn, TimeElapsedColumn
+
+    return Progress(
+        SpinnerColumn(),
+        TextColumn("[progress.description]{task.description}"),
+        BarColumn(),
+        MofNCompleteColumn(),
+        TimeElapsedColumn(),
+        console=console,
+        transient=transient
+    )
+
+
+class EventStream:
+    """Writes a run's results as NDJSON: one JSON object per line.
+
+    Every record names the tool and the kind of event, and carries a Unix
+    timestamp. Scripts write a "file" record per file they change, would
+    change or fail on, then one "summary" record. Each record is written
+    and flushed as it happens, so a reader sees it straight away and a run
+    over any number of files holds none of them in memory.
+    """
+
+    def __init__(self, tool: str, stream=None):
+        import json
+
+        self.tool = tool
+        self.stream = stream if stream is not None else sys.stdout
+        self._dumps = json.dumps
+        self._lock = threading.Lock()
+
+    def emit(self, event: str, **fields) -> None:
+        record = {"ts": round(time.time(), 6), "tool": self.tool, "event": event, **fields}
+        line = self._dumps(record, ensure_ascii=False, default=str) + "\n"
+        with self._lock:
+            self.stream.write(line)
+            self.stream.flush()
+
+    def file(self, action: str, path, **fields) -> None:
+        """Record one file operation, such as "updated" or "error"."""
+        self.emit("file", action=action, path=str(path), **fields)
+
+    def summary(self, **fields) -> None:
+        self.emit("summary", **fields)
+
+    def error(self, message: str) -> None:
+        """Record a failure that ended the run."""
+        self.emit("error", message=message)
+
+
+class WatchBatch(NamedTuple):
+    """Files that changed under a TreeWatcher's roots since its last batch."""
+    changed: List[Path]  # Written, created or moved in, sorted
+    removed: List[Path]  # Deleted or moved out, sorted
+    rescanned: bool  # Events were lost, so changed lists every watched file
+
+
+# inotify(7) constants, from <sys/inotify.h>
+_IN_CLOSE_WRITE = 0x8
+_IN_MOVED_FROM = 0x40
+_IN_MOVED_TO = 0x80
+_IN_CREATE = 0x100
+_IN_DELETE = 0x200
+_IN_DELETE_SELF = 0x400
+_IN_MOVE_SELF = 0x800
+_IN_Q_OVERFLOW = 0x4000
+_IN_IGNORED = 0x8000
+_IN_ONLYDIR = 0x1000000
+_IN_ISDIR = 0x40000000
+_IN_NONBLOCK = 0o4000
+_IN_CLOEXEC = 0o2000000
+_WATCH_MASK = (_IN_CLOSE_WRITE | _IN_MOVED_FROM | _IN_MOVED_TO | _IN_CREATE | _IN_DELETE
+               | _IN_DELETE_SELF | _IN_MOVE_SELF | _IN_ONLYDIR)
+_EVENT_HEADER_SIZE = 16  # struct inotify_event: int wd; uint32_t mask, cookie, len
+
+
+class TreeWatcher:
+    """Reports the files that change under a set of roots, in debounced batches.
+
+    On Linux the roots and every directory under them that skip_dir() does
+    not prune get an inotify watch, so the kernel says which files changed
+    and nothing is rescanned: reacting to an edit costs the same however
+    large the tree is. A file is reported once it is closed after writing
+    or moved into place, never while it is half-written. Elsewhere, or when
+    inotify is unavailable or out of watches, the roots are polled every
+    poll_interval seconds by comparing the size and mtime of every file.
+
+    skip_dir and select_file are those of walk_tree(), called with paths
+    relative to the root; roots themselves are always watched. Events are
+    collected until none has arrived for debounce seconds (a save usually
+    writes, renames and touches a file within a few milliseconds), or for
+    at most max_delay seconds while edits keep coming, then yielded as one
+    WatchBatch by batches().
+    """
+
+    def __init__(
+        self,
+        roots: Iterable[Path],
+        skip_dir: Optional[Callable[[str, str], bool]] = None,
+        select_file: Optional[Callable[[str, str], bool]] = None,
+        debounce: float = 0.05,
+        max_delay: float = 1.0,
+        poll_interval: float = 1.0,
+        use_inotify: bool = True
+    ):
+        self.roots = list(roots)
+        self.skip_dir = skip_dir
+        self.select_file = select_file
+        self.debounce = debounce
+        self.max_delay = max_delay
+        self.poll_interval = poll_interval
+        self._fd = -1
+        self._libc = None
+        self._watches: Dict[int, Tuple[Path, str]] = {}  # Watch descriptor -> (root, directory prefix)
+        self._snapshot: Dict[Path, Tuple[int, int]] = {}
+        if use_inotify and sys.platform.startswith("linux"):
+            self._try_inotify()
+        if self._fd < 0:
+            self._snapshot = self._scan()
+
+    @classmethod
+    def from_args(cls, args, roots: Iterable[Path], **kwargs) -> "TreeWatcher":
+        """A watcher set up from the options add_watch_arguments() added."""
+        if args.poll is not None:
+            kwargs.update(poll_interval=args.poll, use_inotify=False)
+        return cls(roots, debounce=args.debounce / 1000, **kwargs)
+
+    @property
+    def backend(self) -> str:
+        return "inotify" if self._fd >= 0 else "polling"
+
+    def __enter__(self) -> "TreeWatcher":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+        self._watches.clear()
+
+    def files(self) -> List[Path]:
+        """Every watched file, as walk_tree() finds them."""
+        return sorted(self._scan())
+
+    def batches(self) -> Iterator[WatchBatch]:
+        """Yield a WatchBatch per burst of changes, forever; stop by closing the generator."""
+        if self._fd >= 0:
+            yield from self._inotify_batches()
+        else:
+            yield from self._polling_batches()
+
+    def _scan(self) -> Dict[Path, Tuple[int, int]]:
+        snapshot = {}
+        for root in self.roots:
+            for rel_path, entry in walk_tree(root, self.skip_dir, self.select_file, on_error=lambda e: None):
+                try:
+                    st = entry.stat()
+                except OSError:
+                    continue
+                snapshot[root / rel_path] = (st.st_size, st.st_mtime_ns)
+        return snapshot
+
+    def _polling_batches(self) -> Iterator[WatchBatch]:
+        while True:
+            time.sleep(self.poll_interval)
+            snapshot = self._scan()
+            changed = sorted(path for path, state in snapshot.items() if self._snapshot.get(path) != state)
+            removed = sorted(self._snapshot.keys() - snapshot.keys())
+            self._snapshot = snapshot
+            if changed or removed:
+                yield WatchBatch(changed, removed, False)
+
+    def _try_inotify(self) -> None:
+        try:
+            self._start_inotify()
+        except (OSError, AttributeError):
+            self.close()  # No inotify, or too few watches for the tree: poll instead
+
+    def _start_inotify(self) -> None:
+        import ctypes
+
+        libc = ctypes.CDLL(None, use_errno=True)
+        libc.inotify_init1.argtypes = [ctypes.c_int]
+        libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        libc.inotify_rm_watch.argtypes = [ctypes.c_int, ctypes.c_int]
+        self._libc = libc
+        self._get_errno = ctypes.get_errno
+        self._fd = libc.inotify_init1(_IN_NONBLOCK | _IN_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(self._get_errno(), "inotify_init1 failed")
+        for root in self.roots:
+            self._watch_tree(root, "")
+
+    def _add_watch(self, root: Path, prefix: str) -> None:
+        path = root / prefix if prefix else root
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(path), _WATCH_MASK)
+        if wd < 0:
+            errno = self._get_errno()
+            raise OSError(errno, os.strerror(errno), str(path))
+        self._watches[wd] = (root, prefix)
+
+    def _watch_tree(self, root: Path, prefix: str) -> List[Path]:
+        """Watch a directory and those under it; return the selected files already in it."""
+        found = []
+        pending = [prefix]
+        while pending:
+            prefix = pending.pop()
+            try:
+                # Watched before it is listed, so a file created in between is not missed
+                self._add_watch(root, prefix)
+                with os.scandir(root / prefix if prefix else root) as entries:
+                    for entry in entries:
+                        rel_path = prefix + entry.name
+                        if entry.is_dir(follow_symlinks=False):
+                            if self.skip_dir is None or not self.skip_dir(entry.name, rel_path):
+                                pending.append(rel_path + "/")
+                        elif self.select_file is None or self.select_file(entry.name, rel_path):
+                            found.append(root / rel_path)
+            except (FileNotFoundError, NotADirectoryError, PermissionError):
+                continue  # Gone again before it could be watched, or unreadable
+        return found
+
+    def _unwatch_tree(self, root: Path, prefix: str) -> None:
+        for wd, (watch_root, watch_prefix) in list(self._watches.items()):
+            if watch_root == root and watch_prefix.startswith(prefix):
+                self._libc.inotify_rm_watch(self._fd, wd)
+                del self._watches[wd]
+
+    def _read_events(self, changed: Set[Path], removed: Set[Path]) -> bool:
+        """Read the queued events into changed and removed; return False if some were lost."""
+        import struct
+
+        try:
+            data = os.read(self._fd, 1 << 16)
+        except BlockingIOError:
+            return True
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, length = struct.unpack_from("iIII", data, offset)
+            name = os.fsdecode(data[offset + _EVENT_HEADER_SIZE:offset + _EVENT_HEADER_SIZE + length].rstrip(b"\0"))
+            offset += _EVENT_HEADER_SIZE + length
+            if mask & _IN_Q_OVERFLOW:
+                return False
+            if mask & _IN_IGNORED:
+                self._watches.pop(wd, None)
+                continue
+            watch = self._watches.get(wd)
+            if watch is None or not name:
+                continue  # A watch already dropped, or an event on the watched directory itself
+            root, prefix = watch
+            rel_path = prefix + name
+            if mask & _IN_ISDIR:
+                if mask & (_IN_CREATE | _IN_MOVED_TO):
+                    if self.skip_dir is None or not self.skip_dir(name, rel_path):
+                        changed.update(self._watch_tree(root, rel_path + "/"))
+                elif mask & _IN_MOVED_FROM:
+                    self._unwatch_tree(root, rel_path + "/")
+            elif self.select_file is None or self.select_file(name, rel_path):
+                path = root / rel_path
+                if mask & (_IN_CLOSE_WRITE | _IN_MOVED_TO):
+                    changed.add(path)
+                    removed.discard(path)
+                elif mask & (_IN_DELETE | _IN_MOVED_FROM):
+                    removed.add(path)
+                    changed.discard(path)
+        return True
+
+    def _inotify_batches(self) -> Iterator[WatchBatch]:
+        import select
+
+        poller = select.poll()
+        poller.register(self._fd, select.POLLIN)
+        changed: Set[Path] = set()
+        removed: Set[Path] = set()
+        complete = True
+        first = last = 0.0
+        while True:
+            if changed or removed or not complete:
+                now = time.monotonic()
+                timeout = max(0.0, min(last + self.debounce, first + self.max_delay) - now)
+                ready = poller.poll(timeout * 1000)
+            else:
+                ready = poller.poll()
+            if ready:
+                now = time.monotonic()
+                if not (changed or removed or not complete):
+                    first = now
+                last = now
+                complete = self._read_events(changed, removed) and complete
+                # A steady stream of events never lets poll() time out
+                if not (changed or removed or not complete) or time.monotonic() < first + self.max_delay:
+                    continue
+            if not complete:
+                # The kernel queue overflowed: rebuild the watches and report everything
+                self.close()
+                self._try_inotify()
+                if self._fd < 0:
+                    self._snapshot = self._scan()
+                    yield WatchBatch(sorted(self._snapshot), [], True)
+                    yield from self._polling_batches()
+                    return
+                poller = select.poll()
+                poller.register(self._fd, select.POLLIN)
+                yield WatchBatch(self.files(), [], True)
+            else:
+                yield WatchBatch(sorted(changed), sorted(removed), False)
+            changed = set()
+            removed = set()
+            complete = True
+
+
+def add_watch_arguments(parser) -> None:
+    """Add the --watch, --debounce and --poll options every watching script shares."""
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="After the run, keep watching and process each file as it changes, until interrupted"
+    )
+    parser.add_argument(
+        "--debounce",
+        type=float,
+        default=50,
+        metavar="MS",
+        help="With --watch, wait for this many milliseconds without changes before processing them (default: 50)"
+    )
+    parser.add_argument(
+        "--poll",
+        type=float,
+        metavar="SECONDS",
+        help="With --watch, look for changes every SECONDS instead of using inotify"
+    )